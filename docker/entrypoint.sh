@@ -9,4 +9,12 @@ fab load_terms
 echo "Loadings dev fixtures..."
 fab load_devfixtures
 
+echo "Prebuilding website pages..."
+./manage.py prebuild_pages
+
+if [ -n "$ROCDATA_METRICS_DIR" ]; then
+    echo "Removing the metrics files of previous server processes..."
+    rm -f "$ROCDATA_METRICS_DIR"/*
+fi
+
 exec "$@"
\ No newline at end of file
@@ -5,6 +5,8 @@ import os
 import sys
 import uuid
 
+import yaml
+
 
 
 from fabric.api import env, task, put, sudo, local, cd, lcd, run, prompt
@@ -94,67 +96,31 @@ def graph_models(subsets="terms;standards;content"):
 
 
 
+TERMS_MANIFEST = 'data/terms/manifest.yml'   # the jurisdictions and vocabularies to load
+
 @task
 def create_jurisdictions():
+    """
+    Create the jurisdictions listed in data/terms/manifest.yml, or update them
+    if they exist (`load_terms` only creates the missing ones).
+    """
+    with open(TERMS_MANIFEST) as manifestf:
+        manifest = yaml.safe_load(manifestf.read())
     cmd_base = "./manage.py createjurisdiction --overwrite "
-    local(cmd_base + '--name Global --display_name "Global Terms" --language "en" ')
-    local(cmd_base + '--name Honduras --display_name "Secretaría de Educación de Honduras" --language "es" --country "HN"')
-    local(cmd_base + '--name Ghana --display_name "Ghana NaCCA" --language "en" --country "GH"')
-    local(cmd_base + '--name Australia --display_name "Australia" --language "en" --country "AU"')
-    local(cmd_base + '--name USA --display_name "United States" --language "en" --country "US"')
-    local(cmd_base + '--name Zambia --display_name "Zambia" --language "en" --country "ZM"')
-    local(cmd_base + '--name Kenya --display_name "Kenya" --language "en" --country "KE"')
-    local(cmd_base + '--name UK --display_name "United Kingdom" --language "en" --country "GB"')
-    local(cmd_base + '--name ASN --display_name "Achievement Standards Network" --language "en" --country "US"')
-    local(cmd_base + '--name KA --display_name "Khan Academy" --country "US"')
-    local(cmd_base + '--name LE --display_name "Learning Equality" ')
+    for juri_dict in manifest['jurisdictions']:
+        cmd = cmd_base + '--name {} '.format(juri_dict['name'])
+        for attr in ['display_name', 'language', 'country', 'notes']:
+            if juri_dict.get(attr):
+                cmd += '--{} "{}" '.format(attr, juri_dict[attr])
+        local(cmd)
 
 @task
 def load_terms():
     """
     Load the controlled vocabularies defined for all ROC jurisdiction.
+    See data/terms/manifest.yml for the list of jurisdictions and vocabularies.
     """
-    with settings(warn_only=True), hide('stdout', 'stderr', 'warnings'):
-        create_jurisdictions()
-    ALL_TERMS_FILES = [
-        # ROC Global
-        "data/terms/ContentNodeRelationKinds.yml",
-        "data/terms/DigitizationMethods.yml",
-        "data/terms/LicenseKinds.yml",
-        "data/terms/PublicationStatuses.yml",
-        "data/terms/TermRelationKinds.yml",
-        "data/terms/StandardNodeRelationKinds.yml",
-        "data/terms/ContentNodeRelationKinds.yml",
-        "data/terms/ContentStandardRelationKinds.yml",
-        # "data/terms/CognitiveProcessDimensions.yml",
-        # "data/terms/KnowledgeDimensions.yml",
-        # Ghana
-        "https://raw.githubusercontent.com/rocdata/standards-ghana/main/terms/Values.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-ghana/main/terms/CoreCompetencies.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-ghana/main/terms/KeyPhases.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-ghana/main/terms/CurriculumElements.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-ghana/main/terms/GradeLevels.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-ghana/main/terms/Subjects.yml",
-        #
-        # Honduras
-        "https://raw.githubusercontent.com/rocdata/standards-honduras/main/terms/Areas.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-honduras/main/terms/CurriculumElements.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-honduras/main/terms/Grados.yml",
-        #
-        # USA
-        "https://raw.githubusercontent.com/rocdata/standards-usa/main/terms/Subjects.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-usa/main/terms/CCSSCurriculumElements.yml",
-        "https://raw.githubusercontent.com/rocdata/standards-usa/main/terms/GradeLevels.yml",
-        #
-        #
-        # CONTENT VOCABS
-        "data/terms/KhanAcademyContentNodeKinds.yml",
-        "data/terms/KolibriContentNodeKinds.yml",
-    ]
-    for terms_url in ALL_TERMS_FILES:
-        if "raw.githubusercontent" in terms_url:
-            terms_url += '?flush_cache=True'  # bypass 5 minute cache
-        local('./manage.py loadterms "{}" --overwrite'.format(terms_url))
+    local('./manage.py loadterms --overwrite --manifest ' + TERMS_MANIFEST)
 
 
 
@@ -178,11 +144,18 @@ DEV_FIXTURES_MODELS = [
     {"class": "ContentStandardRelation", "filename": "contantstandardrelations.yaml"},
 ]
 
+# NDJSON fixtures written by `dumpfixtures` (much faster to load than the YAML)
+DEV_FIXTURES_DIR = "data/fixtures/dev"
+
 @task
 def load_devfixtures():
     """
     Load sample documents, crosswalks, content collections, and content correlations.
     """
+    if os.path.exists(os.path.join(DEV_FIXTURES_DIR, "manifest.json")):
+        print("Loading fixtures from", DEV_FIXTURES_DIR)
+        local("./manage.py loadfixtures " + DEV_FIXTURES_DIR)
+        return
     for model in DEV_FIXTURES_MODELS:
         srcpath = "data/fixtures/" + model['filename']
         if os.path.exists(srcpath):
@@ -200,16 +173,11 @@ def dump_devfixtures(update=False):
     currently in the DB as fixtures (used only in development).
     """
     update = (update and update.lower() == 'true')  # defaults to False
-    for model in DEV_FIXTURES_MODELS:
-        destpath = "data/fixtures/" + model['filename']
-        if os.path.exists(destpath) and not update:
-            print('File', destpath, 'already exists. Delete file or re-run with :update=true')
-            sys.exit(-1)
-        print("Exporting fixtures for", model['class'], "to", destpath)
-        dumpdata_cmd = "./manage.py dumpdata --natural-foreign --format=yaml "  # --natural-primary ?
-        dumpdata_cmd += "standards." + model['class']
-        dumpdata_cmd += " > " + destpath
-        local(dumpdata_cmd)
+    if os.path.exists(DEV_FIXTURES_DIR) and not update:
+        print('Directory', DEV_FIXTURES_DIR, 'already exists. Delete it or re-run with :update=true')
+        sys.exit(-1)
+    print("Exporting fixtures to", DEV_FIXTURES_DIR)
+    local("./manage.py dumpfixtures " + DEV_FIXTURES_DIR)
 
 
 # KOLIBRI CONTENT COLLECTIONS
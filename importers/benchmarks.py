@@ -0,0 +1,497 @@
+import abc
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+import yaml
+
+from importers.management.commands.stdimport_hackathon import DOCS_TO_IMPORT_BY_SOURCE_ID
+from importers.management.commands.stdimport_hackathon import DOCS_DUMPDATA_FILENAME, NODES_DUMPDATA_FILENAME
+from standards.benchmarks import get_git_commit, get_peak_rss_kb
+from standards.models import Jurisdiction, StandardsDocument
+from standards.registry import term_registry
+from standards.synthetic import make_text
+
+
+IMPORTER_BENCHMARK_MODES = ['fresh', 'update']
+
+# Jurisdiction that holds the benchmark content collection and vocabularies
+IMPORTER_BENCHMARK_JURISDICTION = 'ImporterBench'
+
+# The hackathon importer only imports the documents it knows about
+HACKATHON_BENCHMARK_SOURCE_ID = 'zambia-math-5to7'
+
+# Vocabularies needed by ccimport_kolibri (from data/terms/)
+KOLIBRI_VOCABULARY_FILES = ['KolibriContentNodeKinds.yml', 'LicenseKinds.yml']
+
+KOLIBRI_LEAF_KINDS = ['video', 'audio', 'exercise', 'document', 'html5']
+
+KOLIBRI_FILE_PRESETS = {
+    'video': ('mp4', 'high_res_video'),
+    'audio': ('mp3', 'audio'),
+    'exercise': ('perseus', 'exercise'),
+    'document': ('pdf', 'document'),
+    'html5': ('zip', 'html5_zip'),
+}
+
+
+
+
+# INPUT DATA
+################################################################################
+
+def make_hex_id(rng):
+    return uuid.UUID(int=rng.getrandbits(128)).hex
+
+
+def make_kolibri_node(rng, kind, files_per_node):
+    """
+    Return a Kolibri tree node dict (without children) of `kind`.
+    """
+    node = dict(
+        id=make_hex_id(rng),
+        content_id=make_hex_id(rng),
+        kind=kind,
+        title=make_text(rng, 4),
+        description=make_text(rng, 16),
+        author='Example author',
+        lang_id='en',
+        license_name='CC BY',
+        license_description=None,
+        license_owner='Example',
+    )
+    if kind != 'topic':
+        extension, preset = KOLIBRI_FILE_PRESETS[kind]
+        node['files'] = [
+            dict(checksum=make_hex_id(rng), extension=extension, file_size=rng.randint(1000, 50000000),
+                 lang_id='en', preset=preset)
+            for i in range(files_per_node)
+        ]
+    if kind == 'exercise':
+        node['assessmentmetadata'] = dict(number_of_assessments=rng.randint(1, 20))
+    return node
+
+
+def make_kolibri_tree(rng, depth, fanout, files_per_node):
+    """
+    Return a Kolibri channel tree (as produced by the Kolibri DB exports used by
+    ``ccimport_kolibri``) with `fanout` children per topic, topics at the first
+    `depth` - 1 levels, and content nodes with `files_per_node` files at level `depth`.
+    """
+    def make_children(level):
+        children = []
+        for i in range(fanout):
+            if level < depth:
+                node = make_kolibri_node(rng, 'topic', files_per_node)
+                node['children'] = make_children(level + 1)
+            else:
+                node = make_kolibri_node(rng, rng.choice(KOLIBRI_LEAF_KINDS), files_per_node)
+            children.append(node)
+        return children
+
+    return dict(
+        channel_id=make_hex_id(rng),
+        title=make_text(rng, 3) + ' channel',
+        description=make_text(rng, 20),
+        license_description=None,
+        license_owner='Example',
+        lang_id='en',
+        children=make_children(1),
+    )
+
+
+def make_terms_data(rng, name, depth, fanout):
+    """
+    Return the data of a vocabulary YAML file (as read by ``loadterms``) with a
+    tree of terms `depth` levels deep and `fanout` children per term.
+    """
+    def make_terms(prefix, level):
+        terms = []
+        for i in range(fanout):
+            term = dict(term='{}{}'.format(prefix, i + 1), label=make_text(rng, 2), definition=make_text(rng, 10))
+            if level < depth:
+                term['children'] = make_terms(term['term'] + '.', level + 1)
+            terms.append(term)
+        return terms
+
+    return dict(
+        type='ControlledVocabulary',
+        jurisdiction=IMPORTER_BENCHMARK_JURISDICTION,
+        name=name,
+        label=name,
+        language='en',
+        country=None,
+        terms=make_terms('T', 1),
+    )
+
+
+def make_hackathon_dumpdatas(rng, depth, fanout):
+    """
+    Return the hackathon dumpdata lists ``(docs, nodes)`` (as read by
+    ``stdimport_hackathon``) for one document with a tree of nodes `depth`
+    levels deep below the hackathon root and `fanout` children per node.
+    """
+    docs = [dict(model='hackathon.curriculumdocument', pk=1,
+                 fields=dict(source_id=HACKATHON_BENCHMARK_SOURCE_ID, title=make_text(rng, 3)))]
+    pks = itertools.count(1)
+    nodes = []
+
+    def add_node(path, sort_order, level):
+        pk = next(pks)
+        nodes.append(dict(model='hackathon.standardnode', pk=pk, fields=dict(
+            document=1, path=path, sort_order=sort_order, identifier='N' + str(pk),
+            title=make_text(rng, 12), notes='', extra_fields={})))
+        if level < depth:
+            for i in range(fanout):
+                add_node(path + '{:04d}'.format(i + 1), i + 1, level + 1)
+
+    add_node('0001', 1, 0)
+    return docs, nodes
+
+
+def mutate_tree(rng, nodes, changes, text_key, make_node):
+    """
+    Simulate an update of the tree of node dicts `nodes` (in place): change the
+    `text_key` of a fraction `changes` of the nodes, and remove the last child
+    and add a new child ``make_node()`` in that fraction of the children lists.
+    """
+    for node in nodes:
+        if rng.random() < changes:
+            node[text_key] = make_text(rng, 4)
+        if node.get('children'):
+            mutate_tree(rng, node['children'], changes, text_key, make_node)
+    if nodes and rng.random() < changes:
+        nodes.pop()
+    if rng.random() < changes:
+        nodes.append(make_node())
+
+
+def count_tree_nodes(nodes):
+    return sum(1 + count_tree_nodes(node.get('children') or []) for node in nodes)
+
+
+def write_json(data, path):
+    with open(path, 'w') as outf:
+        json.dump(data, outf)
+
+
+def write_yaml(data, path):
+    with open(path, 'w') as outf:
+        yaml.safe_dump(data, outf, sort_keys=False)
+
+
+
+
+# IMPORTERS
+################################################################################
+
+class ImporterBenchmark(abc.ABC):
+    """
+    Generates the input files of an importer command in `workdir` and runs it.
+    ``setup`` writes the files for the fresh and update imports and creates the
+    data the importer needs; ``run(mode)`` imports the fresh or the update files.
+    ``num_nodes`` is the number of nodes (or terms) imported in each mode.
+    """
+    name = None
+
+    def __init__(self, workdir, rng, depth, fanout, files_per_node, term_files, changes, workers):
+        self.workdir = os.path.join(workdir, self.name)
+        os.makedirs(self.workdir, exist_ok=True)
+        self.rng = rng
+        self.depth = depth
+        self.fanout = fanout
+        self.files_per_node = files_per_node
+        self.term_files = term_files
+        self.changes = changes
+        self.workers = workers
+        self.num_nodes = {}
+
+    @abc.abstractmethod
+    def setup(self):
+        """
+        Write the input files of the fresh and update imports in ``workdir``
+        and create the data the importer needs.
+        """
+
+    @abc.abstractmethod
+    def run(self, mode):
+        """
+        Run the importer on the input files of `mode` (``fresh`` or ``update``).
+        """
+
+
+def get_benchmark_jurisdiction():
+    juri, _ = Jurisdiction.objects.get_or_create(name=IMPORTER_BENCHMARK_JURISDICTION,
+                                                 defaults=dict(display_name='Importer benchmarks'))
+    return juri
+
+
+class KolibriImporterBenchmark(ImporterBenchmark):
+    name = 'ccimport_kolibri'
+
+    def setup(self):
+        get_benchmark_jurisdiction()
+        for name, defaults in [('LE', dict(display_name='Learning Equality')), ('Global', dict(display_name='Global Terms'))]:
+            Jurisdiction.objects.get_or_create(name=name, defaults=defaults)
+        terms_dir = os.path.join(settings.BASE_DIR, 'data', 'terms')
+        call_command('loadterms', *[os.path.join(terms_dir, filename) for filename in KOLIBRI_VOCABULARY_FILES],
+                     overwrite=True, workers=1)
+        tree = make_kolibri_tree(self.rng, self.depth, self.fanout, self.files_per_node)
+        self.num_nodes['fresh'] = count_tree_nodes(tree['children'])
+        write_json(tree, os.path.join(self.workdir, 'fresh.json'))
+        mutate_tree(self.rng, tree['children'], self.changes, 'title',
+                    lambda: make_kolibri_node(self.rng, self.rng.choice(KOLIBRI_LEAF_KINDS), self.files_per_node))
+        self.num_nodes['update'] = count_tree_nodes(tree['children'])
+        write_json(tree, os.path.join(self.workdir, 'update.json'))
+
+    def run(self, mode):
+        call_command('ccimport_kolibri', os.path.join(self.workdir, mode + '.json'),
+                     jurisdiction=IMPORTER_BENCHMARK_JURISDICTION, name='kolibribench',
+                     update=(mode == 'update'))
+
+
+class LoadtermsImporterBenchmark(ImporterBenchmark):
+    name = 'loadterms'
+
+    def setup(self):
+        get_benchmark_jurisdiction()
+        new_terms = itertools.count(1)
+        for mode in IMPORTER_BENCHMARK_MODES:
+            os.makedirs(os.path.join(self.workdir, mode), exist_ok=True)
+        self.num_nodes = dict(fresh=0, update=0)
+        for i in range(self.term_files):
+            name = 'BenchVocab{}'.format(i)
+            termsdata = make_terms_data(self.rng, name, self.depth, self.fanout)
+            self.num_nodes['fresh'] += count_tree_nodes(termsdata['terms'])
+            write_yaml(termsdata, os.path.join(self.workdir, 'fresh', name + '.yml'))
+            mutate_tree(self.rng, termsdata['terms'], self.changes, 'label',
+                        lambda: dict(term='New{}'.format(next(new_terms)), label=make_text(self.rng, 2)))
+            self.num_nodes['update'] += count_tree_nodes(termsdata['terms'])
+            write_yaml(termsdata, os.path.join(self.workdir, 'update', name + '.yml'))
+
+    def run(self, mode):
+        call_command('loadterms', os.path.join(self.workdir, mode), overwrite=(mode == 'update'),
+                     workers=self.workers)
+
+
+class HackathonImporterBenchmark(ImporterBenchmark):
+    name = 'stdimport_hackathon'
+
+    def setup(self):
+        doc_info = DOCS_TO_IMPORT_BY_SOURCE_ID[HACKATHON_BENCHMARK_SOURCE_ID]
+        juri, _ = Jurisdiction.objects.get_or_create(name=doc_info['jurisdiction'],
+                                                     defaults=dict(display_name=doc_info['jurisdiction'],
+                                                                   country=doc_info['country']))
+        StandardsDocument.objects.filter(jurisdiction=juri, name=doc_info['name']).delete()
+        docs, nodes = make_hackathon_dumpdatas(self.rng, self.depth, self.fanout)
+        write_json(docs, os.path.join(self.workdir, DOCS_DUMPDATA_FILENAME))
+        write_json(nodes, os.path.join(self.workdir, NODES_DUMPDATA_FILENAME))
+        # the importer replaces the whole document when re-importing it
+        self.num_nodes = dict(fresh=len(nodes), update=len(nodes))
+
+    def run(self, mode):
+        call_command('stdimport_hackathon', dumpdatas_dir=self.workdir, source_id=[HACKATHON_BENCHMARK_SOURCE_ID])
+
+
+IMPORTER_BENCHMARKS = dict((cls.name, cls) for cls in [
+    KolibriImporterBenchmark,
+    LoadtermsImporterBenchmark,
+    HackathonImporterBenchmark,
+])
+
+
+
+
+# MEASUREMENTS
+################################################################################
+
+class QueryCounter:
+    """
+    Database execute wrapper that counts queries without keeping their SQL
+    (unlike ``CaptureQueriesContext``, whose memory would show up in tracemalloc).
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class PeakSnapshotter(threading.Thread):
+    """
+    Take a tracemalloc snapshot every time the traced memory grows by more than
+    `growth` (a fraction) since the last snapshot, so the allocation sites close
+    to the peak are known even if the memory is freed before the import ends.
+    """
+    def __init__(self, interval=0.01, growth=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.growth = growth
+        self.snapshot = None
+        self.snapshot_size = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.take_snapshot_if_grown()
+
+    def take_snapshot_if_grown(self):
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.snapshot_size * (1 + self.growth):
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.take_snapshot_if_grown()
+
+
+def get_top_allocations(snapshot, top):
+    """
+    Return the `top` allocation sites (source lines) in the tracemalloc `snapshot`.
+    """
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, threading.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ])
+    allocations = []
+    for stat in snapshot.statistics('lineno')[:top]:
+        frame = stat.traceback[0]
+        filename = frame.filename
+        if filename.startswith(settings.BASE_DIR):
+            filename = os.path.relpath(filename, settings.BASE_DIR)
+        allocations.append(dict(
+            site='{}:{}'.format(filename, frame.lineno),
+            size_kb=round(stat.size / 1024, 1),
+            count=stat.count,
+        ))
+    return allocations
+
+
+def measure_import(run, num_nodes, top=10):
+    """
+    Call ``run()`` twice, each time in a transaction that is rolled back: once
+    to measure the time and number of queries, and once with tracemalloc on to
+    measure the peak traced memory and the `top` allocation sites at that peak.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        counter = QueryCounter()
+        with transaction.atomic(), connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        with transaction.atomic():
+            tracemalloc.start()
+            snapshotter = PeakSnapshotter()
+            snapshotter.start()
+            try:
+                run()
+            finally:
+                snapshotter.stop()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            transaction.set_rollback(True)
+
+    return dict(
+        nodes=num_nodes,
+        seconds=seconds,
+        nodes_per_sec=num_nodes / seconds if seconds else None,
+        queries=counter.count,
+        queries_per_node=counter.count / num_nodes if num_nodes else None,
+        tracemalloc_peak_kb=round(peak / 1024, 1),
+        top_allocations=get_top_allocations(snapshotter.snapshot, top) if snapshotter.snapshot else [],
+    )
+
+
+
+
+# BENCHMARK
+################################################################################
+
+def run_importer_benchmarks(workdir, importers=None, modes=None, depth=3, fanout=8, files_per_node=2,
+                            term_files=4, changes=0.1, workers=1, top=10, seed=0, log=None):
+    """
+    Benchmark the `importers` (names from ``IMPORTER_BENCHMARKS``) in `modes`
+    (``fresh`` imports into an empty collection/vocabulary/document, and
+    ``update`` re-imports a modified version of the data over the fresh import)
+    using input files generated in `workdir`. Nothing is saved to the database.
+    Returns the results as a dict that can be saved as JSON and compared using
+    ``compare_importer_benchmarks``.
+    """
+    importers = importers or list(IMPORTER_BENCHMARKS)
+    modes = modes or IMPORTER_BENCHMARK_MODES
+    results = {}
+    for name in importers:
+        rng = random.Random('{}-{}'.format(name, seed))   # same data whichever importers run
+        benchmark = IMPORTER_BENCHMARKS[name](workdir, rng, depth, fanout, files_per_node,
+                                              term_files, changes, workers)
+        with transaction.atomic():
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                benchmark.setup()
+            for mode in modes:
+                if mode == 'update':
+                    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                        benchmark.run('fresh')
+                key = '{} {}'.format(name, mode)
+                results[key] = measure_import(lambda: benchmark.run(mode), benchmark.num_nodes[mode], top=top)
+                if log:
+                    log(format_importer_result_line(key, results[key]))
+            transaction.set_rollback(True)
+        term_registry.invalidate()   # may have cached the rolled back terms
+    return dict(
+        meta=dict(
+            date=datetime.datetime.utcnow().isoformat() + 'Z',
+            commit=get_git_commit(),
+            python=platform.python_version(),
+            database=connection.vendor,
+            shape=dict(depth=depth, fanout=fanout, files_per_node=files_per_node,
+                       term_files=term_files, changes=changes, seed=seed),
+            peak_rss_kb=get_peak_rss_kb(),
+        ),
+        results=results,
+    )
+
+
+def format_importer_result_line(key, result):
+    return '{:<28} nodes={:>6} {:9.1f} nodes/s queries={:>6} ({:.2f}/node) peak={:9.1f}KB'.format(
+        key, result['nodes'], result['nodes_per_sec'], result['queries'],
+        result['queries_per_node'], result['tracemalloc_peak_kb'])
+
+
+def compare_importer_benchmarks(baseline, current, max_regression=0.2):
+    """
+    Compare the importer benchmark results `current` to `baseline` (as returned
+    by ``run_importer_benchmarks``) and return a list of regressions: imports
+    whose throughput dropped or whose peak memory grew by more than
+    `max_regression` (a fraction), or that make more queries.
+    """
+    regressions = []
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        if result['nodes_per_sec'] < base['nodes_per_sec'] * (1 - max_regression):
+            regressions.append('{}: nodes/s {:.1f} -> {:.1f}'.format(key, base['nodes_per_sec'], result['nodes_per_sec']))
+        if result['queries'] > base['queries']:
+            regressions.append('{}: queries {} -> {}'.format(key, base['queries'], result['queries']))
+        if result['tracemalloc_peak_kb'] > base['tracemalloc_peak_kb'] * (1 + max_regression):
+            regressions.append('{}: peak memory {:.1f}KB -> {:.1f}KB'.format(
+                key, base['tracemalloc_peak_kb'], result['tracemalloc_peak_kb']))
+    return regressions
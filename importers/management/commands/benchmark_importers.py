@@ -0,0 +1,77 @@
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from importers.benchmarks import IMPORTER_BENCHMARKS, IMPORTER_BENCHMARK_MODES
+from importers.benchmarks import compare_importer_benchmarks, run_importer_benchmarks
+from standards.benchmarks import load_benchmarks, save_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Measure the throughput (nodes per second), queries, and tracemalloc peak
+    memory and top allocation sites of the importers, in fresh and update modes,
+    using generated input files of configurable size and shape. All imported
+    data is rolled back. Save the results as JSON and optionally compare them
+    to the results of a previous run.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("--importers", default=",".join(IMPORTER_BENCHMARKS), help="Comma-separated importer names")
+        parser.add_argument("--modes", default=",".join(IMPORTER_BENCHMARK_MODES), help="Comma-separated modes (fresh, update)")
+        parser.add_argument("--depth", type=int, default=3, help="Depth of the generated trees")
+        parser.add_argument("--fanout", type=int, default=8, help="Number of children per tree node")
+        parser.add_argument("--files_per_node", type=int, default=2, help="Number of files per Kolibri content node")
+        parser.add_argument("--term_files", type=int, default=4, help="Number of vocabulary YAML files")
+        parser.add_argument("--changes", type=float, default=0.1, help="Fraction of nodes changed, added, and removed for updates")
+        parser.add_argument("--workers", type=int, default=1, help="Processes used by loadterms to parse the YAML files")
+        parser.add_argument("--top", type=int, default=10, help="Number of top allocation sites to report")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed used to generate the input files")
+        parser.add_argument("--workdir", help="Keep the generated input files in this directory")
+        parser.add_argument("--output", help="Save the results to this JSON file")
+        parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+        parser.add_argument("--max_regression", type=float, default=0.2, help="Allowed throughput drop and memory increase (fraction)")
+
+
+    def handle(self, *args, **options):
+        importers = [name.strip() for name in options['importers'].split(',') if name.strip()]
+        unknown = set(importers) - set(IMPORTER_BENCHMARKS)
+        if unknown:
+            print('Unknown importers', ', '.join(sorted(unknown)), '(choose from', ', '.join(IMPORTER_BENCHMARKS) + ')')
+            sys.exit(-3)
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        if set(modes) - set(IMPORTER_BENCHMARK_MODES):
+            print('Unknown modes', options['modes'], '(choose from', ', '.join(IMPORTER_BENCHMARK_MODES) + ')')
+            sys.exit(-3)
+        if options['depth'] < 1 or options['fanout'] < 1:
+            print('ERROR: --depth and --fanout must be at least 1')
+            sys.exit(-3)
+
+        kwargs = dict(importers=importers, modes=modes, depth=options['depth'], fanout=options['fanout'],
+                      files_per_node=options['files_per_node'], term_files=options['term_files'],
+                      changes=options['changes'], workers=options['workers'], top=options['top'],
+                      seed=options['seed'], log=print)
+        if options['workdir']:
+            benchmarks = run_importer_benchmarks(options['workdir'], **kwargs)
+        else:
+            with tempfile.TemporaryDirectory() as workdir:
+                benchmarks = run_importer_benchmarks(workdir, **kwargs)
+
+        for key, result in benchmarks['results'].items():
+            print('Top allocation sites for', key)
+            for allocation in result['top_allocations']:
+                print('  {:>10.1f}KB {:>8} blocks  {}'.format(allocation['size_kb'], allocation['count'], allocation['site']))
+        print('Peak RSS: {:.1f} MB'.format(benchmarks['meta']['peak_rss_kb'] / 1024))
+        if options['output']:
+            save_benchmarks(benchmarks, options['output'])
+            print('Saved results to', options['output'])
+
+        if options['compare']:
+            baseline = load_benchmarks(options['compare'])
+            regressions = compare_importer_benchmarks(baseline, benchmarks, max_regression=options['max_regression'])
+            if regressions:
+                print('Regressions compared to', options['compare'], '(commit {})'.format(baseline['meta']['commit']))
+                for regression in regressions:
+                    print('  ' + regression)
+                sys.exit(-9)
+            print('No regressions compared to', options['compare'])
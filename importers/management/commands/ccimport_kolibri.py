@@ -7,12 +7,14 @@ from django.core.management.base import BaseCommand
 import pycountry
 import requests
 
-from standards.models import Jurisdiction, Term, jurisdictions
+from standards.models import Jurisdiction, jurisdictions
 from standards.models import ContentCollection, ContentNode
+from standards.registry import term_registry
 from standards.utils import ensure_country_code, ensure_language_code
 
 
 # Studio Source URL templates
+STUDIO_SOURCE_DOMAIN = "studio.learningequality.org"
 STUDIO_SOURCE_URL_BASE_TMPL = "https://studio.learningequality.org/en/channels/{channel_id}"
 STUDIO_FILE_URL_BASE = "https://studio.learningequality.org/content/storage/"
 
@@ -25,21 +27,64 @@ KOLIBRI_CONTENTNODE_SOURCE_URL_TMPL = "{demoserver}/en/learn/#/topics/c/{node_id
 # e.g. http://alejandro-demo.learningequality.org/en/learn/#/topics/c/a1602eb28a014abb9d5e724eaed42e23
 
 
-KOLIBRI_KIND_TO_ContentNodeKind_MAP = {}
-kind_terms = Term.objects.filter(
-    vocabulary__jurisdiction__name="LE",
-    vocabulary__name="KolibriContentNodeKinds")
-for kind_term in kind_terms:
-    KOLIBRI_KIND_TO_ContentNodeKind_MAP[kind_term.path] = kind_term
+# Number of ids per query when loading the existing nodes with --deterministic_ids
+EXISTING_IDS_BATCH_SIZE = 500
 
+# Filled in by `load_kolibri_term_maps` when the command runs
+KOLIBRI_KIND_TO_ContentNodeKind_MAP = {}
 KOLIBRI_LICENSE_NAME_TO_LicenseKind_MAP = {}
-license_terms = Term.objects.filter(
-    vocabulary__jurisdiction__name="LE",
-    vocabulary__name="LicenseKinds")
-for license_term in license_terms:
-    KOLIBRI_LICENSE_NAME_TO_LicenseKind_MAP[license_term.label] = license_term
 
 
+def load_kolibri_term_maps():
+    """
+    Load the Terms used for the Kolibri content node kinds and license names
+    from the term registry. Done when the command runs rather than at import
+    time, so the maps reflect the current vocabularies.
+    """
+    KOLIBRI_KIND_TO_ContentNodeKind_MAP.clear()
+    kinds_vocab = term_registry.get_vocabulary("LE", "KolibriContentNodeKinds")
+    for kind_term in (kinds_vocab.terms_by_path.values() if kinds_vocab else []):
+        KOLIBRI_KIND_TO_ContentNodeKind_MAP[kind_term.path] = kind_term.to_model()
+
+    KOLIBRI_LICENSE_NAME_TO_LicenseKind_MAP.clear()
+    licenses_vocab = term_registry.get_vocabulary("LE", "LicenseKinds")
+    for license_term in (licenses_vocab.terms_by_path.values() if licenses_vocab else []):
+        KOLIBRI_LICENSE_NAME_TO_LicenseKind_MAP[license_term.label] = license_term.to_model()
+
+
+
+
+def derive_contentnode_id(col, source_id):
+    """
+    Return the deterministic id for the content node with `source_id` in `col`,
+    computed from ``(collection_id, source_domain, source_id)``.
+    """
+    idfield = ContentNode._meta.get_field('id')
+    return idfield.derive_id(col.collection_id, col.source_domain, source_id)
+
+
+def load_existing_contentnode_ids(col, kolibri_tree):
+    """
+    Return the set of derived ids of the nodes in `kolibri_tree` that already
+    exist in `col`, loaded in batches of ``EXISTING_IDS_BATCH_SIZE`` ids, so the
+    importer can decide locally to insert or update (or move) each node.
+    """
+    derived_ids = [derive_contentnode_id(col, '')]
+    stack = list(kolibri_tree['children'])
+    while stack:
+        node_dict = stack.pop()
+        derived_ids.append(derive_contentnode_id(col, node_dict['id']))
+        stack.extend(node_dict.get('children', []))
+    existing_ids = set()
+    for start in range(0, len(derived_ids), EXISTING_IDS_BATCH_SIZE):
+        batch = derived_ids[start:start+EXISTING_IDS_BATCH_SIZE]
+        for node_id, collection_id in ContentNode.objects.filter(id__in=batch).values_list('id', 'collection_id'):
+            if collection_id != col.id:
+                print('ERROR: content node', node_id, 'derived from channel', col.collection_id,
+                      'already exists in another content collection', collection_id)
+                sys.exit(-9)
+            existing_ids.add(node_id)
+    return existing_ids
 
 
 def import_col_from_kolibri_channel(col, kolibri_tree, options):
@@ -53,7 +98,7 @@ def import_col_from_kolibri_channel(col, kolibri_tree, options):
     col.title = kolibri_tree['title']
     col.description = kolibri_tree['description']
     if col.source_domain is None:
-        col.source_domain = "studio.learningequality.org"
+        col.source_domain = STUDIO_SOURCE_DOMAIN
     col.collection_id = kolibri_tree['channel_id']
     col.digitization_method = "kolibri_channel"
     col.publication_status = "publicdraft"
@@ -88,14 +133,17 @@ def import_col_from_kolibri_channel(col, kolibri_tree, options):
     col.save()
 
     # 2. Add root content node
-    root = add_collection_root_node(col, kolibri_tree)
+    root = add_collection_root_node(col, kolibri_tree, options)
 
     # 3. Recursively add children
-    add_children_recursive(root, kolibri_tree['children'], options)
+    existing_ids = None
+    if options.get('deterministic_ids'):
+        existing_ids = load_existing_contentnode_ids(col, kolibri_tree)
+    add_children_recursive(root, kolibri_tree['children'], options, existing_ids=existing_ids)
 
 
 
-def add_collection_root_node(col, kolibri_tree):
+def add_collection_root_node(col, kolibri_tree, options):
     """
     Get or create the collection root node. Note this is a logically "hidden"
     node that should not be visible to end users of the ROC server.
@@ -103,7 +151,11 @@ def add_collection_root_node(col, kolibri_tree):
     try:
         root = col.root
     except ContentNode.DoesNotExist:
+        root_id = ''
+        if options.get('deterministic_ids'):
+            root_id = derive_contentnode_id(col, '')
         root = ContentNode.objects.create(
+            id=root_id,
             collection=col,
             title='HIDDEN ROOT of ' + col.name,
             description='HIDDEN ROOT of ' + col.name,
@@ -113,9 +165,11 @@ def add_collection_root_node(col, kolibri_tree):
 
 
 
-def add_children_recursive(rocparentnode, children, options):
+def add_children_recursive(rocparentnode, children, options, existing_ids=None):
     """
     Add `children` (list of Kolibri node dicts) to `rocparentnode` (ContentNode).
+    With ``--deterministic_ids``, `existing_ids` are the derived ids of the nodes
+    of the channel that already exist (see ``load_existing_contentnode_ids``).
     """
     print('  - Adding', len(children), 'children to', rocparentnode.title)
 
@@ -129,12 +183,25 @@ def add_children_recursive(rocparentnode, children, options):
 
         source_id = child_dict['id']   # Kolibri node_id (unique within channel)
         children_source_ids.add(source_id)
+        if existing_ids is not None:
+            derived_id = derive_contentnode_id(rocparentnode.collection, source_id)
 
         if source_id in oldchildren_by_source_id:
-            # CASE A: updating an existing node
+            # CASE A1: updating an existing node
             child_node = oldchildren_by_source_id[source_id]
+        elif existing_ids is not None and derived_id in existing_ids:
+            # CASE A2: updating an existing node that moved to this parent
+            child_node = ContentNode.objects.get(id=derived_id)
+            child_node.parent = rocparentnode    # moved (with its subtree) on save below
+        elif existing_ids is not None:
+            # CASE B1: adding a new node with a known id (inserted on save below)
+            child_node = ContentNode(
+                id=derived_id,
+                collection=rocparentnode.collection,
+                parent=rocparentnode,
+                source_id=source_id)
         else:
-            # CASE B: adding a new node
+            # CASE B2: adding a new node
             child_node = ContentNode.objects.create(
                 collection=rocparentnode.collection,
                 parent=rocparentnode,
@@ -202,15 +269,18 @@ def add_children_recursive(rocparentnode, children, options):
         child_node.extra_fields = node_extra_fields
 
         # Save child_node info to DB and recurse into children
-        child_node.save()
+        # (new nodes with derived ids must be inserted, never update another node)
+        child_node.save(force_insert=child_node._state.adding)
         if 'children' in child_dict:
-            add_children_recursive(child_node, child_dict['children'], options)
+            add_children_recursive(child_node, child_dict['children'], options, existing_ids=existing_ids)
 
     # STEP 2: Mark any non-updated `oldchildren` nodes as retired
     ############################################################################
     retired_sort_order = float(len(children) + 1)  # put retired nodes last
     for old_source_id, old_child in oldchildren_by_source_id.items():
         if old_source_id not in children_source_ids:
+            if existing_ids is not None and old_child.id in existing_ids:
+                continue    # moved to another parent in the channel
             old_child.publication_status = "retired"
             old_child.sort_order = retired_sort_order
             retired_sort_order += 1.0
@@ -241,6 +311,9 @@ class Command(BaseCommand):
         #
         # workflow
         parser.add_argument("--update", action='store_true', help="Update an existing collection with new data.")
+        parser.add_argument("--deterministic_ids", action='store_true', help="Derive the collection id from (source_domain, channel_id) and the ids of new "
+                                 "nodes from (collection_id, source_domain, source_id), so each channel can be "
+                                 "imported only once (in one jurisdiction and under one name)")
 
 
     def handle(self, *args, **options):
@@ -248,6 +321,8 @@ class Command(BaseCommand):
         if 'demoserver' in options and options['demoserver'] and options['demoserver'].endswith('/'):
             options['demoserver'] = options['demoserver'].rstrip('/')
 
+        load_kolibri_term_maps()
+
         # Parse and validate Jurisdiction
         jurisdiction_name = options['jurisdiction']
         try:
@@ -298,8 +373,19 @@ class Command(BaseCommand):
             language = ensure_language_code(language_raw)
             col.language = language
 
+        # Derive the collection id from the channel id when creating it
+        if options['deterministic_ids'] and not updating_existing:
+            idfield = ContentCollection._meta.get_field('id')
+            col.id = idfield.derive_id(col.source_domain or STUDIO_SOURCE_DOMAIN, kolibri_tree['channel_id'])
+            other_col = ContentCollection.objects.filter(id=col.id).select_related('jurisdiction').first()
+            if other_col:
+                print('ERROR: channel', kolibri_tree['channel_id'], 'was already imported as content collection',
+                      other_col.name, 'in jurisdiction', other_col.jurisdiction.name)
+                print('Use ./manage.py ccimport_kolibri --update with this --name and --jurisdiction to update it.')
+                sys.exit(-9)
+
         # Save the collection
-        col.save()
+        col.save(force_insert=not updating_existing)
 
         # Add collection nodes
         import_col_from_kolibri_channel(col, kolibri_tree, options)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+from collections import defaultdict
+import json
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from standards.models import Jurisdiction
+from standards.models import StandardNode, StandardsDocument
+
+
+DUMPDATAS_DIR = os.path.join(settings.BASE_DIR, "..", "standards-hackathon", "dumpdatas")
+DOCS_DUMPDATA_FILENAME = "hackathon_CurriculumDocument_data.json"
+NODES_DUMPDATA_FILENAME = "hackathon_StandardNode_data.json"
+JUDGMENTS_DUMPDATA_FILENAME = "hackathon_HumanRelevanceJudgment_data.json"
+
+# Hackathon DB node paths are materialized paths made of 4-character steps
+PATH_STEPLEN = 4
+
+
+DOCS_TO_IMPORT_BY_SOURCE_ID = {
+    # "CCSSM": {
+    #     "source_id": "CCSSM",
+    #     "jurisdiction": "USA",
+    #     "name": "CCSS.Math",
+    #     "title": "Common Core State Standards for Mathematics",
+    #     "language": "en",
+    #     "country": "US",
+    #     "publisher": "NGA Center for Best Practices and the Council of Chief State School Officers",
+    #     "license_description": "© Copyright 2010. National Governors Association Center for Best Practices and Council of Chief State School Officers. All rights reserved.",
+    #     "digitization_method": "hackathon_import",
+    #     "source_doc": "http://www.corestandards.org/Math/",
+    # },
+    "kicd-secondary-vol-ii": {
+        "source_id": "kicd-secondary-vol-ii",
+        "jurisdiction": "Kenya",
+        "name": "KICD-SEC-volII",
+        "title": "KICD Secondary Curriculum Vol II",
+        "language": "en",
+        "country": "KE",
+        "publisher": "Kenya Institute of Education",
+        "license_description": "© 2002, Kenya Institute of Education",
+        "digitization_method": "hackathon_import",
+        "source_doc": "https://drive.google.com/file/d/1lEqE85xMmgZTr-t2Z-KbUCgBi4NVDzPv/view",
+    },
+    "zambia-math-5to7": {
+        "source_id": "zambia-math-5to7",
+        "jurisdiction": "Zambia",
+        "name": "zambia-math-5to7",
+        "title": "Zambia mathematics syllabus and competencies",
+        "language": "en",
+        "country": "ZM",
+        "publisher": "Curriculum Development Centre, Lusaka, Zambia",
+        "license_description": "© Zambia Ministry of Education, Science, Vocational Training and Early Education",
+        "digitization_method": "hackathon_import",
+        "source_doc": "https://drive.google.com/file/d/16yi0ALDhhPBRP4Q0v_dZZoVTcoZb9jUK/view",
+    },
+    "zambia-english-5to7": {
+        "source_id": "zambia-english-5to7",
+        "jurisdiction": "Zambia",
+        "name": "zambia-english-5to7",
+        "title": "Zambia English syllabus and competencies",
+        "language": "en",
+        "country": "ZM",
+        "publisher": "Curriculum Development Centre, Lusaka, Zambia",
+        "license_description": "© Zambia Ministry of Education, Science, Vocational Training and Early Education",
+        "digitization_method": "hackathon_import",
+        "source_doc": "https://drive.google.com/file/d/17ey31c8yQ_cgDOK9P8rB7n0s9KOhveRc/view"
+    },
+}
+
+# TEMPORARILY SKIPPED (to import later or from other sources)
+#     {   "source_id": gov.uk.math
+#     {   "source_id": gov.uk.science
+#     {   "source_id": australia_standards_australia_science_f-10
+#     {   "source_id": australia_standards_australia_mathematics_f-10
+#     {   "source_id": australia_standards_technologies_f-10
+#     {   "source_id": australia_standards_australia_work_studies_f-10
+#     {   "source_id": CA-CTE
+
+
+# PERMANENTLY SKIPPED (because better version available)
+#   khan_academy_us
+#   kenya-math
+#   KICDvolumeII
+
+
+
+# Dicts processing
+################################################################################
+
+def group_nodes_by_parent_path(doc_nodes):
+    """
+    Group the hackathon node dicts `doc_nodes` of a document by the path of their
+    parent in a single pass. Returns a dict ``{parent_path: children}`` in which
+    the children are sorted by ``sort_order``; the root node has parent path ``""``.
+    """
+    children_by_parent_path = defaultdict(list)
+    for nd in doc_nodes:
+        path = nd['fields']['path']
+        assert len(path) % PATH_STEPLEN == 0, 'unexpected node path ' + path
+        children_by_parent_path[path[:-PATH_STEPLEN]].append(nd)
+    for children in children_by_parent_path.values():
+        children.sort(key=lambda nd: nd["fields"]["sort_order"])
+    return children_by_parent_path
+
+
+
+# Django models
+################################################################################
+
+def build_standard_nodes(stddoc, children_by_parent_path, tree_id):
+    """
+    Build the unsaved ``StandardNode`` s for the document `stddoc` in depth-first
+    order, with ``id``, ``parent``, and the MPTT fields (``tree_id``, ``lft``,
+    ``rght``, ``level``) precomputed so they can be saved using ``bulk_create``.
+    The hackathon root node is replaced by a new ROOT node for the document.
+    """
+    roots = children_by_parent_path.get("", [])
+    assert len(roots) == 1, 'expected a single root node per document'
+    # allocate ids for all nodes at once (the hackathon root is replaced by ROOT)
+    num_nodes = sum(len(children) for children in children_by_parent_path.values())
+    new_ids = iter(StandardNode._meta.get_field('id').allocate_ids(num_nodes))
+
+    def new_node(**kwargs):
+        return StandardNode(id=next(new_ids), document=stddoc, tree_id=tree_id, **kwargs)
+
+    counter = 1
+    root = new_node(description='ROOT', sort_order=1.0, parent=None, level=0, lft=counter)
+    nodes = [root]
+    stack = [(root, enumerate(children_by_parent_path[roots[0]['fields']['path']]))]
+    while stack:
+        parent, children_iter = stack[-1]
+        i, child_dict = next(children_iter, (None, None))
+        counter += 1
+        if child_dict is None:
+            parent.rght = counter
+            stack.pop()
+            continue
+        child_node = new_node(
+            parent_id=parent.id,
+            level=parent.level + 1,
+            lft=counter,
+            # kind=child_dict["fields"]["kind"]     # TODO
+            sort_order=float(i+1),
+            notation=child_dict["fields"]["identifier"],
+            description=child_dict["fields"]["title"],
+            notes=child_dict["fields"]["notes"],
+            extra_fields=child_dict["fields"]["extra_fields"],
+            source_id=child_dict['pk'],
+        )
+        nodes.append(child_node)
+        stack.append((child_node, enumerate(children_by_parent_path[child_dict['fields']['path']])))
+    return nodes
+
+
+def import_doc(doc_dict, doc_nodes, juri):
+    """
+    Create the ``StandardsDocument`` for the hackathon `doc_dict` with the nodes
+    in `doc_nodes`, replacing any previously imported version of the document.
+    """
+    doc = doc_dict["fields"]
+    doc_info = DOCS_TO_IMPORT_BY_SOURCE_ID[doc["source_id"]]
+
+    # 1. Document
+    try:
+        stddoc = StandardsDocument.objects.get(name=doc_info["name"], jurisdiction=juri)
+        print("Deleting old version of curriculum document...")
+        stddoc.delete()
+    except StandardsDocument.DoesNotExist:
+        pass
+
+    stddoc = StandardsDocument(name=doc_info["name"], jurisdiction=juri)
+    stddoc.title = doc_info['title']
+    stddoc.language = doc_info['language']
+    stddoc.publisher = doc_info['publisher']
+    stddoc.license_description = doc_info['license_description']
+    stddoc.digitization_method = doc_info['digitization_method']
+    stddoc.source_doc = doc_info['source_doc']
+    stddoc.source_id = doc_dict['pk']
+    stddoc.save()
+    print('Created document', stddoc)
+
+    # 2. Nodes
+    print("Found", len(doc_nodes), 'nodes for this document')
+    children_by_parent_path = group_nodes_by_parent_path(doc_nodes)
+    tree_id = StandardNode._tree_manager._get_next_tree_id()
+    nodes = build_standard_nodes(stddoc, children_by_parent_path, tree_id)
+    StandardNode.objects.bulk_create(nodes, batch_size=500)
+    print('Created', len(nodes), 'standard nodes (including ROOT)')
+    return stddoc
+
+
+
+# CLI
+################################################################################
+
+class Command(BaseCommand):
+    """
+    Import curriculum standards documents from the October 2019 hackathon DB
+    dumpdata JSON files (see ``DOCS_TO_IMPORT_BY_SOURCE_ID`` for the list).
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("--dumpdatas_dir", default=DUMPDATAS_DIR, help="Directory with the hackathon dumpdata JSON files")
+        parser.add_argument("--source_id", action='append', help="Import only the document with this source_id (can be repeated)")
+
+
+    def handle(self, *args, **options):
+        source_ids_to_import = options['source_id'] or list(DOCS_TO_IMPORT_BY_SOURCE_ID.keys())
+        for source_id in source_ids_to_import:
+            if source_id not in DOCS_TO_IMPORT_BY_SOURCE_ID:
+                print('ERROR: unknown hackathon document source_id', source_id)
+                sys.exit(-3)
+
+        # Resolve jurisdictions
+        juri_names = set(DOCS_TO_IMPORT_BY_SOURCE_ID[sid]["jurisdiction"] for sid in source_ids_to_import)
+        juris_by_name = Jurisdiction.objects.in_bulk(juri_names, field_name='name')
+        for juri_name in juri_names:
+            if juri_name not in juris_by_name:
+                print('Jurisdiction', juri_name, 'does not exist yet')
+                print('Use the ./manage.py createjurisdiction command to create it')
+                sys.exit(-5)
+
+        # Load documents
+        docs_path = os.path.join(options['dumpdatas_dir'], DOCS_DUMPDATA_FILENAME)
+        with open(docs_path) as docsf:
+            docs_list = json.load(docsf)
+        docs_by_pk = dict(
+            (doc_dict["pk"], doc_dict) for doc_dict in docs_list
+            if doc_dict["fields"]["source_id"] in source_ids_to_import
+        )
+
+        # Load nodes and group them by document in one pass
+        nodes_path = os.path.join(options['dumpdatas_dir'], NODES_DUMPDATA_FILENAME)
+        with open(nodes_path) as nodesf:
+            allnodes_list = json.load(nodesf)
+        nodes_by_doc_pk = defaultdict(list)
+        for nd in allnodes_list:
+            if nd['fields']['document'] in docs_by_pk:
+                nodes_by_doc_pk[nd['fields']['document']].append(nd)
+        del allnodes_list
+
+        for doc_pk, doc_dict in docs_by_pk.items():
+            doc = doc_dict["fields"]
+            print('Importing doc  source_id=' , doc["source_id"], 'titled', doc["title"])
+            juri = juris_by_name[DOCS_TO_IMPORT_BY_SOURCE_ID[doc["source_id"]]["jurisdiction"]]
+            with transaction.atomic():
+                import_doc(doc_dict, nodes_by_doc_pk[doc_pk], juri)
+
+        print('DONE')
@@ -32,6 +32,17 @@ urlpatterns = [
 ]
 
 
+# METRICS
+################################################################################
+
+from standards.metrics import metrics_view
+
+urlpatterns += [
+    path('metrics', metrics_view, name='metrics'),     # before the jurisdictions
+]
+
+
+
 # JURISDICTIONS
 ################################################################################
 from standards.api import JurisdictionViewSet
@@ -84,6 +95,21 @@ urlpatterns += [
     ),
 ]
 
+# Vocabulary FULL
+# We wire up /{juri}/terms/{vocab.name}/full manually so it takes precedence
+# over the term detail endpoint (a term with path `full` is not reachable).
+juri_vocab_full = ControlledVocabularyViewSet.as_view({
+    'get': 'full',
+}, detail=True, suffix="Full")
+
+urlpatterns += format_suffix_patterns([
+    re_path(
+        r'^(?P<jurisdiction_name>[\w_\-]*)/terms/(?P<name>[\w_\-]*)/full$',
+        juri_vocab_full,
+        name='jurisdiction-vocabulary-full'
+    ),
+], allowed=ALLOWED_FORMATS)
+
 # Term DETAIL
 # We wire up /{juri}/terms/{vocab.name}/{term.path} manually because the default
 # behavior of drf-nested-routers introduces an extra slash ..//{term.path}.
@@ -97,6 +123,22 @@ urlpatterns += format_suffix_patterns([
 
 
 
+# SKOS DUMPS
+################################################################################
+
+from standards.views import skos_dump
+
+urlpatterns += [
+    re_path(r'^skos\.(?P<rdf_format>nt|ttl)$', skos_dump, name='skos-dump'),
+    re_path(
+        r'^(?P<jurisdiction_name>[\w_\-]*)/skos\.(?P<rdf_format>nt|ttl)$',
+        skos_dump,
+        name='jurisdiction-skos-dump'
+    ),
+]
+
+
+
 # STANDARDS
 ################################################################################
 
@@ -137,9 +179,12 @@ urlpatterns += format_suffix_patterns(jurisdiction_router.urls, allowed=ALLOWED_
 ################################################################################
 
 from django.contrib import admin
+from standards.views import slow_queries_report
 from website.views import PublicModelIndexView, PublicModelDetailView
 
 urlpatterns += [
+    # staff-only report of the slow queries log (before the admin catch-all)
+    path('admin/slowqueries/', slow_queries_report, name='admin-slowqueries'),
     # Django admin site
     path('admin/',  admin.site.urls),
     # staff-only admin docs
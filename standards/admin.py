@@ -1,6 +1,15 @@
+from django import forms
 from django.contrib import admin
-from mptt.admin import MPTTModelAdmin
-from mptt.admin import DraggableMPTTAdmin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
 from standards.models import Jurisdiction, UserProfile
 from standards.models import ControlledVocabulary, Term, TermRelation
@@ -10,6 +19,180 @@ from standards.models import ContentCollection, ContentNode, ContentNodeRelation
 from standards.models import ContentCorrelation, ContentStandardRelation
 
 
+# Changelists of tables with more rows than this show the estimated count
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Number of nodes loaded per request in the lazy tree views
+ADMIN_TREE_PAGE_SIZE = 200
+
+
+
+
+# ADMIN HELPERS FOR LARGE TABLES
+################################################################################
+
+def get_estimated_count(model, using):
+    """
+    Return the approximate number of rows in the table of `model` from the
+    database statistics (PostgreSQL) or the largest rowid (SQLite), or None.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'sqlite':
+            cursor.execute('SELECT MAX(_rowid_) FROM ' + table)
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:    # -1 when never analyzed
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Use the estimated row count for unfiltered changelists of large tables
+    instead of an exact ``COUNT(*)`` that scans the whole table.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = get_estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Admin for tables with millions of rows: estimated counts, and no second
+    ``COUNT(*)`` of the whole table for the "N total" link of filtered results.
+    Use ``AutocompleteFilter`` for the list filters on foreign keys, and
+    ``raw_id_fields`` or ``autocomplete_fields`` for all the relation widgets.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    List filter on a foreign key or M2M field that searches the related objects
+    using the admin autocomplete view (the related model admin must have
+    ``search_fields``) instead of listing all of them in the sidebar.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = '%s__%s__exact' % (field_path, field.target_field.name)
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.related_model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(field.remote_field, model_admin.admin_site),
+        )
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is not None,
+            'param': self.lookup_kwarg,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'widget': self.form_field.widget.render(
+                self.lookup_kwarg, self.lookup_val, attrs={'id': 'filter_' + self.lookup_kwarg}),
+        }
+
+
+class AutocompleteFilterMediaMixin:
+    """
+    Adds the select2 scripts used by ``AutocompleteFilter`` to the changelist.
+    """
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(None, self.admin_site).media
+
+
+class LazyTreeAdminMixin:
+    """
+    Replaces the whole-forest MPTT changelist with a tree view per document (or
+    collection) at ``tree/<root_id>/`` that loads the children of each node on
+    demand, ``ADMIN_TREE_PAGE_SIZE`` nodes at a time. Subclasses set
+    ``tree_root_field`` (the FK to the document or collection) and
+    ``tree_label_fields`` (the fields used by ``get_tree_label``).
+    """
+    tree_root_field = None
+    tree_label_fields = []
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('tree/<str:root_id>/', self.admin_site.admin_view(self.tree_view), name='%s_%s_tree' % info),
+            path('tree/<str:root_id>/nodes/', self.admin_site.admin_view(self.tree_nodes_view),
+                 name='%s_%s_tree_nodes' % info),
+        ] + super().get_urls()
+
+    def get_tree_label(self, node):
+        return str(node)
+
+    def get_tree_root(self, root_id):
+        root_model = self.model._meta.get_field(self.tree_root_field).related_model
+        return get_object_or_404(root_model, pk=root_id)
+
+    def tree_view(self, request, root_id):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        root = self.get_tree_root(root_id)
+        info = self.model._meta.app_label, self.model._meta.model_name
+        context = dict(
+            self.admin_site.each_context(request),
+            title='{} tree of {}'.format(self.model._meta.verbose_name.capitalize(), root),
+            opts=self.model._meta,
+            root=root,
+            nodes_url=reverse('admin:%s_%s_tree_nodes' % info, args=[root.pk], current_app=self.admin_site.name),
+        )
+        return TemplateResponse(request, 'admin/lazy_tree.html', context)
+
+    def tree_nodes_view(self, request, root_id):
+        """
+        The JSON list of the children of the node ``?parent=<id>`` (or of the
+        top-level nodes), starting at ``?offset=<n>``.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            offset = 0
+        nodes = self.model._tree_manager.filter(**{self.tree_root_field + '_id': root_id})
+        nodes = nodes.filter(parent_id=request.GET.get('parent') or None)
+        nodes = nodes.only('id', 'lft', 'rght', *self.tree_label_fields).order_by('tree_id', 'lft')
+        page = list(nodes[offset:offset + ADMIN_TREE_PAGE_SIZE + 1])
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return JsonResponse({
+            'nodes': [
+                {
+                    'id': node.id,
+                    'label': self.get_tree_label(node),
+                    'url': reverse('admin:%s_%s_change' % info, args=[node.id], current_app=self.admin_site.name),
+                    'num_descendants': (node.rght - node.lft - 1) // 2,
+                }
+                for node in page[:ADMIN_TREE_PAGE_SIZE]
+            ],
+            'next_offset': offset + ADMIN_TREE_PAGE_SIZE if len(page) > ADMIN_TREE_PAGE_SIZE else None,
+        })
+
+
+
 
 # JURISDICTIONS and USERS
 ################################################################################
@@ -23,6 +206,9 @@ class JurisdictionAdmin(admin.ModelAdmin):
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
+    list_select_related = ["user", "jurisdiction"]
+    raw_id_fields = ("user",)
+    autocomplete_fields = ["jurisdiction"]
     model = UserProfile
 
 
@@ -36,22 +222,26 @@ class ControlledVocabularyAdmin(admin.ModelAdmin):
     list_display = ["name", "kind", "label", "jurisdiction", "id", "date_created", "date_modified"]
     list_filter = ("jurisdiction", "language")
     search_fields = ["id", "name", "label", "alt_label", "hidden_label", "description", "notes"]
+    autocomplete_fields = ["jurisdiction"]
     model = ControlledVocabulary
 
 
 @admin.register(Term)
-class TermAdmin(admin.ModelAdmin):
+class TermAdmin(AutocompleteFilterMediaMixin, LargeTableAdmin):
     list_display = ["vocabulary", "path", "label", "notation", "language", "id", "date_created", "date_modified"]
-    list_filter = ("vocabulary", "language")
+    list_filter = (("vocabulary", AutocompleteFilter), "language")
     search_fields = ["id", "path", "label", "alt_label", "hidden_label", "notation", "definition", "notes"]
+    autocomplete_fields = ["vocabulary"]
     model = Term
 
 
 @admin.register(TermRelation)
-class TermRelationAdmin(admin.ModelAdmin):
+class TermRelationAdmin(AutocompleteFilterMediaMixin, LargeTableAdmin):
     list_display = ["id", "source", "kind", "target_uri", "target", "date_created", "date_modified"]
-    list_filter = ("kind", "source", "target", "target_uri")
-    search_fields = ["id", "path", "label", "alt_label", "hidden_label", "notation", "definition", "notes"]
+    list_select_related = ["source__vocabulary__jurisdiction", "target__vocabulary__jurisdiction"]
+    list_filter = ("kind", ("source", AutocompleteFilter), ("target", AutocompleteFilter))
+    search_fields = ["id", "target_uri", "notes"]
+    autocomplete_fields = ["jurisdiction", "source", "target"]
     readonly_fields = ["id"]
     model = TermRelation
 
@@ -63,20 +253,37 @@ class TermRelationAdmin(admin.ModelAdmin):
 
 @admin.register(StandardsDocument)
 class StandardsDocumentAdmin(admin.ModelAdmin):
-    list_display = ["name", "id", "jurisdiction", "title", "version", "publication_status", "digitization_method"]
+    list_display = ["name", "id", "jurisdiction", "title", "version", "publication_status", "digitization_method", "tree"]
+    list_select_related = ["jurisdiction"]
     list_filter = ("jurisdiction", "publication_status", "subjects")
     search_fields = ["id", "title", "name", "description", "publisher", "notes"]
+    autocomplete_fields = ["jurisdiction", "license", "subjects", "education_levels"]
     readonly_fields = ["id"]
     model = StandardsDocument
 
+    def tree(self, obj):
+        return format_html('<a href="{}">Standard nodes</a>', reverse('admin:standards_standardnode_tree', args=[obj.id]))
+
 
 @admin.register(StandardNode)
-class StandardNodeAdmin(DraggableMPTTAdmin):
-    list_display = ["tree_actions", "indented_title", "notation", "list_id", "title"]
-    list_display_links=["indented_title",]
-    list_filter = ("document__jurisdiction", "document", "kind", "language", "concept_keywords")
-    search_fields = ["id", "notation", "title", "description", "concept_keywords", "notes", "extra_fields"]
+class StandardNodeAdmin(LazyTreeAdminMixin, AutocompleteFilterMediaMixin, LargeTableAdmin):
+    list_display = ["id", "notation", "list_id", "title", "document", "level"]
+    list_select_related = ["document"]
+    list_filter = (("document__jurisdiction", AutocompleteFilter), ("document", AutocompleteFilter), "kind", "language")
+    search_fields = ["id", "notation", "title", "description", "notes"]
+    ordering = ("tree_id", "lft")
+    raw_id_fields = ("parent",)
+    autocomplete_fields = ["document", "kind", "subjects", "education_levels", "concept_terms"]
     readonly_fields = ["id"]
+    tree_root_field = "document"
+    tree_label_fields = ["notation", "description"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(None)
+
+    def get_tree_label(self, node):
+        return ' '.join(part for part in [node.notation, node.description[0:120]] if part)
+
 
 
 
@@ -86,15 +293,19 @@ class StandardNodeAdmin(DraggableMPTTAdmin):
 @admin.register(StandardsCrosswalk)
 class StandardsCrosswalkAdmin(admin.ModelAdmin):
     list_display = ["id", "title", "digitization_method", "jurisdiction"]
+    list_select_related = ["jurisdiction"]
     list_filter = ("jurisdiction", "digitization_method", "subjects", "education_levels")
+    search_fields = ["id", "title", "description", "publisher"]
+    autocomplete_fields = ["jurisdiction", "license", "subjects", "education_levels"]
     readonly_fields = ["id"]
 
 
 @admin.register(StandardNodeRelation)
-class StandardNodeRelationAdmin(admin.ModelAdmin):
+class StandardNodeRelationAdmin(AutocompleteFilterMediaMixin, LargeTableAdmin):
     list_display = ["id", "source", "kind", "target"]
     raw_id_fields = ("source", "target",)
-    list_filter = ("crosswalk__jurisdiction", "crosswalk", "kind", "crosswalk__subjects", "crosswalk__education_levels")
+    autocomplete_fields = ["crosswalk", "kind"]
+    list_filter = (("crosswalk__jurisdiction", AutocompleteFilter), ("crosswalk", AutocompleteFilter), "kind")
     readonly_fields = ["id"]
 
 
@@ -106,29 +317,44 @@ class StandardNodeRelationAdmin(admin.ModelAdmin):
 
 @admin.register(ContentCollection)
 class ContentCollectionAdmin(admin.ModelAdmin):
-    list_display = ["name", "id", "jurisdiction", "collection_id", "version", "publication_status"]
+    list_display = ["name", "id", "jurisdiction", "collection_id", "version", "publication_status", "tree"]
+    list_select_related = ["jurisdiction"]
     list_filter = ("jurisdiction", "publication_status", "subjects")
     search_fields = ["id", "name", "description", "notes"]
+    autocomplete_fields = ["jurisdiction", "license", "subjects", "education_levels"]
     readonly_fields = ["id"]
     model = ContentCollection
 
+    def tree(self, obj):
+        return format_html('<a href="{}">Content nodes</a>', reverse('admin:standards_contentnode_tree', args=[obj.id]))
+
 
 @admin.register(ContentNode)
-class ContentNodeAdmin(DraggableMPTTAdmin):
-    list_display = ["tree_actions", "indented_title", "source_id"]
-    list_display_links=["indented_title",]
+class ContentNodeAdmin(LazyTreeAdminMixin, AutocompleteFilterMediaMixin, LargeTableAdmin):
+    list_display = ["id", "title", "source_id", "collection", "level"]
+    list_select_related = ["collection"]
     raw_id_fields = ("parent",)
-    list_filter = ("collection", "kind", "language", "concept_keywords")
-    search_fields = ["id", "title", "description", "concept_keywords", "notes", "extra_fields"]
+    autocomplete_fields = ["collection", "kind", "license", "subjects", "education_levels", "concept_terms"]
+    list_filter = (("collection", AutocompleteFilter), "kind", "language")
+    search_fields = ["id", "title", "description", "notes"]
+    ordering = ("tree_id", "lft")
     readonly_fields = ["id"]
-    expand_tree_by_default = False
+    tree_root_field = "collection"
+    tree_label_fields = ["title"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(None)
+
+    def get_tree_label(self, node):
+        return node.title[0:120]
 
 
 @admin.register(ContentNodeRelation)
-class ContentNodeRelationAdmin(admin.ModelAdmin):
+class ContentNodeRelationAdmin(AutocompleteFilterMediaMixin, LargeTableAdmin):
     list_display = ["id", "source", "kind", "target", "date_modified"]
     raw_id_fields = ("source", "target",)
-    list_filter = ("kind", "source", "target")
+    autocomplete_fields = ["jurisdiction", "kind"]
+    list_filter = (("jurisdiction", AutocompleteFilter), "kind")
     readonly_fields = ["id"]
     model = ContentNodeRelation
 
@@ -141,19 +367,19 @@ class ContentNodeRelationAdmin(admin.ModelAdmin):
 @admin.register(ContentCorrelation)
 class ContentCorrelationAdmin(admin.ModelAdmin):
     list_display = ["title", "id", "jurisdiction", "version", "publication_status"]
+    list_select_related = ["jurisdiction"]
     list_filter = ("jurisdiction", "publication_status", "subjects", "education_levels")
+    search_fields = ["id", "title", "description", "publisher"]
+    autocomplete_fields = ["jurisdiction", "license", "subjects", "education_levels"]
     readonly_fields = ["id"]
     model = ContentCorrelation
 
 
 @admin.register(ContentStandardRelation)
-class ContentStandardRelationAdmin(admin.ModelAdmin):
+class ContentStandardRelationAdmin(AutocompleteFilterMediaMixin, LargeTableAdmin):
     list_display = ["id", "correlation", "contentnode", "kind", "standardnode", "date_modified"]
     raw_id_fields = ("contentnode", "standardnode",)
-    list_filter = ("correlation", "kind")
+    autocomplete_fields = ["correlation", "kind"]
+    list_filter = (("correlation", AutocompleteFilter), "kind")
     readonly_fields = ["id"]
     model = ContentStandardRelation
-
-
-
-
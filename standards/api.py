@@ -1,18 +1,27 @@
 from collections import OrderedDict
+import hashlib
 
+from django.core.cache import cache
+from django.db.models import Count, Max, Prefetch, prefetch_related_objects
 from django.shortcuts import get_object_or_404
-from django.http.response import HttpResponseRedirect
+from django.http.response import HttpResponseNotModified, HttpResponseRedirect
+from django.utils.http import parse_etags, quote_etag
+from mptt.utils import get_cached_trees
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
 from standards.models import Jurisdiction
 from standards.serializers import JurisdictionSerializer
-from standards.publishing import get_publishing_context
+from standards.publishing import get_base_url, get_publishing_context
+from standards.timing import record_cache_access, timing_phase
 
 from standards.models import ControlledVocabulary, Term, TermRelation
 from standards.serializers import ControlledVocabularySerializer, TermSerializer, TermRelationSerializer
+from standards.serializers import FullControlledVocabularySerializer
 
 from standards.models import StandardsDocument, StandardNode
 from standards.models import StandardsCrosswalk, StandardNodeRelation
@@ -25,6 +34,7 @@ from standards.serializers import ContentCollectionSerializer, ContentNodeSerial
 from standards.serializers import ContentCorrelationSerializer, ContentStandardRelationSerializer
 from standards.serializers import FullContentCollectionSerializer
 from standards.serializers import FullStandardsDocumentSerializer
+from standards.serializers import SubtreeStandardNodeSerializer, SubtreeContentNodeSerializer
 
 
 # HELPERS
@@ -40,6 +50,9 @@ def LargeResultsSetPagination(size=100):
 
 
 TREE_DATA_SKIP_KEYS = ["lft", "rght", "tree_id"]   # MPTT internal impl. details
+TREE_DATA_NESTED_KEYS = ["children", "terms"]      # lists of nested objects data
+
+VOCABULARY_FULL_CACHE_TIMEOUT = 60 * 60  # the ETag in the cache key changes on updates
 
 class CustomHTMLRendererRetrieve:
     """
@@ -56,13 +69,17 @@ class CustomHTMLRendererRetrieve:
         queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True, context={'request': request})
         publishing_context = get_publishing_context(request=request)
+        with timing_phase('serialize'):
+            datas = serializer.data
         processed_datas = []
-        for data in serializer.data:
-            processed_data = self.process_uris(data, publishing_context=publishing_context)
-            processed_datas.append(processed_data)
+        with timing_phase('process_uris'):
+            for data in datas:
+                processed_data = self.process_uris(data, publishing_context=publishing_context)
+                processed_datas.append(processed_data)
         if request.accepted_renderer.format == 'html':
             # HTML browsing
-            htmlized_datas = [self.htmlize_data_values(pd) for pd in processed_datas]
+            with timing_phase('htmlize'):
+                htmlized_datas = [self.htmlize_data_values(pd) for pd in processed_datas]
             class_name = queryset.model.__name__
             context = {'class_name': class_name, 'datas': htmlized_datas}
             return Response(context, template_name=self.template_name_list)
@@ -78,30 +95,40 @@ class CustomHTMLRendererRetrieve:
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         publishing_context = get_publishing_context(request=request)
-        processed_data = self.process_uris(serializer.data, publishing_context=publishing_context)
+        processed_data = self.serialize_and_process_uris(serializer, publishing_context)
         if request.accepted_renderer.format == 'html':
             # HTML browsing
-            htmlized_data = self.htmlize_data_values(processed_data)
+            with timing_phase('htmlize'):
+                htmlized_data = self.htmlize_data_values(processed_data)
             context = {'data': htmlized_data, 'object': instance}
             return Response(context, template_name=self.template_name)
         else:
             # JSON + API
             return Response(processed_data)
 
+    def serialize_and_process_uris(self, serializer, publishing_context):
+        """
+        Return the ``serializer.data`` processed by ``process_uris``, timing the
+        two phases separately (see ``standards.timing``).
+        """
+        with timing_phase('serialize'):
+            data = serializer.data
+        with timing_phase('process_uris'):
+            return self.process_uris(data, publishing_context=publishing_context)
+
     def process_uris(self, data, publishing_context=None):
         """
         Transform absolute path like `/terms/Ghana` to absolute URI for a given
         `publishing_context` context, e.g. `http://localhost:8000/terms/Ghana`.
         """
+        base_url = get_base_url(publishing_context)
         processed_data = OrderedDict()
         for key, value in data.items():
             if key in TREE_DATA_SKIP_KEYS:
                 continue
             if isinstance(value, str) and key.endswith('uri') and value.startswith('/'):
-                pc = publishing_context
-                base_url = pc['scheme'] + '://' + pc['netloc'] + pc['path_prefix']
                 processed_data[key] = base_url + value
-            elif key == 'children' and isinstance(value, list):
+            elif key in TREE_DATA_NESTED_KEYS and isinstance(value, list):
                 newchildren = []
                 for child in value:
                     if isinstance(child, dict):
@@ -146,6 +173,111 @@ class CustomHTMLRendererRetrieve:
 
 
 
+SUBTREE_DEFAULT_DEPTH = 1
+SUBTREE_SHAPES = ["nested", "flat"]     # values of ?format= for /subtree
+
+class SubtreeContentNegotiation(DefaultContentNegotiation):
+    """
+    The ``/subtree`` actions use ``?format=nested`` and ``?format=flat`` for the
+    shape of the result, so these values do not select a renderer (use a format
+    suffix like ``subtree.json?format=flat`` or the Accept header instead).
+    """
+
+    def filter_renderers(self, renderers, format):
+        if format in SUBTREE_SHAPES:
+            return renderers
+        return super().filter_renderers(renderers, format)
+
+
+def get_full_tree_root(viewset_class, **filters):
+    """
+    Load all the nodes of the tree matching `filters` in a single query, with
+    the related objects of the ``/subtree`` action of `viewset_class`, and
+    return the root nested using ``get_cached_trees`` (``None`` if empty).
+    """
+    model = viewset_class.queryset.model
+    nodes = model._tree_manager.filter(**filters).order_by('tree_id', 'lft') \
+        .select_related(*viewset_class.subtree_select_related) \
+        .prefetch_related(*viewset_class.subtree_prefetch_related)
+    roots = get_cached_trees(nodes)
+    return roots[0] if roots else None
+
+
+class SubtreeMixin:
+    """
+    Adds the ``/subtree?depth=N`` action to MPTT node viewsets: the node and
+    its descendants up to `depth` levels below it, selected by ``tree_id``,
+    ``lft`` range, and ``level`` in a single query and nested using
+    ``get_cached_trees``. The nodes at the last level link to their children.
+    With ``?format=flat`` the result is the list of nodes in tree order, each
+    with its ``parent_id``. Subclasses define ``subtree_serializer_class``,
+    ``subtree_select_related``, ``subtree_prefetch_related``, and the relation
+    used by the children links ``subtree_link_select_related``.
+    """
+    subtree_serializer_class = None
+    subtree_select_related = []
+    subtree_prefetch_related = []
+    subtree_link_select_related = None
+
+    def get_subtree_depth(self, request):
+        depth = request.query_params.get('depth', SUBTREE_DEFAULT_DEPTH)
+        try:
+            depth = int(depth)
+        except (TypeError, ValueError):
+            depth = -1
+        if depth < 0:
+            raise ValidationError({'depth': 'Must be a non-negative integer.'})
+        return depth
+
+    @action(detail=True, methods=['get'], content_negotiation_class=SubtreeContentNegotiation)
+    def subtree(self, request, *args, **kwargs):
+        flat = request.query_params.get('format') == 'flat'
+        node = get_object_or_404(self.get_queryset().prefetch_related(None), pk=kwargs['pk'])
+        max_level = node.level + self.get_subtree_depth(request)
+        model = self.queryset.model
+        nodes = model._tree_manager.filter(
+            tree_id=node.tree_id,
+            lft__range=(node.lft, node.rght),
+            level__lte=max_level,
+        ).order_by('lft').select_related(*self.subtree_select_related).prefetch_related(*self.subtree_prefetch_related)
+        nodes = list(nodes)
+        root = get_cached_trees(nodes)[0]
+        # links to the children of the nodes at the last level, in one query
+        last_level_nodes = [n for n in nodes if n.level == max_level and n.rght - n.lft > 1]
+        children_queryset = model._tree_manager.select_related(self.subtree_link_select_related).order_by('lft')
+        prefetch_related_objects(last_level_nodes, Prefetch('children', queryset=children_queryset))
+
+        context = dict(self.get_serializer_context(), subtree_max_level=max_level, subtree_flat=flat)
+        publishing_context = get_publishing_context(request=request)
+        if flat:
+            serializer = self.subtree_serializer_class(nodes, many=True, context=context)
+            with timing_phase('serialize'):
+                datas = serializer.data
+            with timing_phase('process_uris'):
+                processed_datas = [self.process_uris(data, publishing_context=publishing_context) for data in datas]
+            if request.accepted_renderer.format == 'html':
+                # HTML browsing
+                with timing_phase('htmlize'):
+                    htmlized_datas = [self.htmlize_data_values(pd) for pd in processed_datas]
+                context = {'class_name': model.__name__, 'datas': htmlized_datas}
+                return Response(context, template_name=self.template_name_list)
+            else:
+                # JSON + API
+                return Response(processed_datas)
+
+        serializer = self.subtree_serializer_class(root, context=context)
+        processed_data = self.serialize_and_process_uris(serializer, publishing_context)
+        if request.accepted_renderer.format == 'html':
+            # HTML browsing
+            with timing_phase('htmlize'):
+                htmlized_data = self.htmlize_data_values(processed_data)
+            context = {'data': htmlized_data, 'object': root}
+            return Response(context, template_name=self.template_name)
+        else:
+            # JSON + API
+            return Response(processed_data)
+
+
 
 
 # JURISDICTION
@@ -174,6 +306,49 @@ class ControlledVocabularyViewSet(CustomHTMLRendererRetrieve, viewsets.ModelView
     def get_queryset(self):
         return self.queryset.filter(jurisdiction__name=self.kwargs['jurisdiction_name'])
 
+    @action(detail=True, methods=['get'])
+    def full(self, request, *args, **kwargs):
+        """
+        Vocabulary snapshot with all its terms nested by path. The ``ETag`` is
+        computed from the vocabulary and terms modification dates and the terms
+        count, so clients can sync vocabularies using conditional requests.
+        """
+        instance = self.get_object()
+        publishing_context = get_publishing_context(request=request)
+        stats = Term.objects.filter(vocabulary=instance).order_by().aggregate(
+            max_date_modified=Max('date_modified'),
+            count=Count('id'),
+        )
+        etag_key = ':'.join(str(part) for part in [
+            instance.id,
+            instance.date_modified.isoformat(),
+            stats['max_date_modified'].isoformat() if stats['max_date_modified'] else '',
+            stats['count'],
+            publishing_context.base_url,
+            request.accepted_renderer.format,
+        ])
+        etag = quote_etag(hashlib.md5(etag_key.encode('utf-8')).hexdigest())
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        cache_key = 'vocabulary-full:' + etag
+        processed_data = cache.get(cache_key)
+        record_cache_access(hit=processed_data is not None)
+        if processed_data is None:
+            serializer = FullControlledVocabularySerializer(instance, context={'request': request})
+            processed_data = self.serialize_and_process_uris(serializer, publishing_context)
+            cache.set(cache_key, processed_data, VOCABULARY_FULL_CACHE_TIMEOUT)
+        if request.accepted_renderer.format == 'html':
+            # HTML browsing
+            with timing_phase('htmlize'):
+                htmlized_data = self.htmlize_data_values(processed_data)
+            context = {'data': htmlized_data, 'object': instance}
+            return Response(context, template_name=self.template_name, headers={'ETag': etag})
+        else:
+            # JSON + API
+            return Response(processed_data, headers={'ETag': etag})
+
 
 class TermViewSet(CustomHTMLRendererRetrieve, viewsets.ModelViewSet):
     # /{juri}/terms/{vocab.name}/               GET(list) POST(create)
@@ -224,12 +399,14 @@ class StandardsDocumentViewSet(CustomHTMLRendererRetrieve, viewsets.ModelViewSet
             jurisdiction__name=kwargs['jurisdiction_name'],
             pk=kwargs['pk']
         )
-        serializer = FullStandardsDocumentSerializer(instance, context={'request': request})
+        tree_root = get_full_tree_root(StandardNodeViewSet, document=instance)
+        serializer = FullStandardsDocumentSerializer(instance, context={'request': request, 'tree_root': tree_root})
         publishing_context = get_publishing_context(request=request)
-        processed_data = self.process_uris(serializer.data, publishing_context=publishing_context)
+        processed_data = self.serialize_and_process_uris(serializer, publishing_context)
         if request.accepted_renderer.format == 'html':
             # HTML browsing
-            htmlized_data = self.htmlize_data_values(processed_data)
+            with timing_phase('htmlize'):
+                htmlized_data = self.htmlize_data_values(processed_data)
             context = {'data': htmlized_data, 'object': instance}
             return Response(context, template_name=self.template_name)
         else:
@@ -237,15 +414,21 @@ class StandardsDocumentViewSet(CustomHTMLRendererRetrieve, viewsets.ModelViewSet
             return Response(processed_data)
 
 
-class StandardNodeViewSet(CustomHTMLRendererRetrieve, viewsets.ModelViewSet):
+class StandardNodeViewSet(SubtreeMixin, CustomHTMLRendererRetrieve, viewsets.ModelViewSet):
     # /{juri}/standardnodes/{sn.id}
     queryset = StandardNode.objects.all()
     serializer_class = StandardNodeSerializer
     pagination_class = LargeResultsSetPagination(100)
     template_name = 'standards/standardnode_detail.html'
+    subtree_serializer_class = SubtreeStandardNodeSerializer
+    subtree_select_related = ['document__jurisdiction', 'parent__document__jurisdiction', 'kind__vocabulary__jurisdiction']
+    subtree_prefetch_related = ['subjects', 'education_levels', 'concept_terms']
+    subtree_link_select_related = 'document__jurisdiction'
 
     def get_queryset(self):
-        return self.queryset.filter(document__jurisdiction__name=self.kwargs['jurisdiction_name'])
+        queryset = self.queryset.filter(document__jurisdiction__name=self.kwargs['jurisdiction_name'])
+        # used in the URLs of the node and of its parent
+        return queryset.select_related('document__jurisdiction', 'parent__document__jurisdiction')
 
 
 # STANDARDS CROSSWALKS
@@ -293,28 +476,37 @@ class ContentCollectionViewSet(CustomHTMLRendererRetrieve, viewsets.ModelViewSet
             jurisdiction__name=kwargs['jurisdiction_name'],
             pk=kwargs['pk']
         )
-        serializer = FullContentCollectionSerializer(instance, context={'request': request})
+        tree_root = get_full_tree_root(ContentNodeViewSet, collection=instance)
+        serializer = FullContentCollectionSerializer(instance, context={'request': request, 'tree_root': tree_root})
         publishing_context = get_publishing_context(request=request)
-        processed_data = self.process_uris(serializer.data, publishing_context=publishing_context)
+        processed_data = self.serialize_and_process_uris(serializer, publishing_context)
         if request.accepted_renderer.format == 'html':
             # HTML browsing
-            htmlized_data = self.htmlize_data_values(processed_data)
+            with timing_phase('htmlize'):
+                htmlized_data = self.htmlize_data_values(processed_data)
             context = {'data': htmlized_data, 'object': instance}
             return Response(context, template_name=self.template_name)
         else:
             # JSON + API
             return Response(processed_data)
 
-class ContentNodeViewSet(CustomHTMLRendererRetrieve, viewsets.ModelViewSet):
+class ContentNodeViewSet(SubtreeMixin, CustomHTMLRendererRetrieve, viewsets.ModelViewSet):
     # /{juri}/contentnodes/{c.id}
     queryset = ContentNode.objects.all()
     serializer_class = ContentNodeSerializer
     partial=True
     pagination_class = LargeResultsSetPagination(100)
     template_name = 'standards/contentnode_detail.html'
+    subtree_serializer_class = SubtreeContentNodeSerializer
+    subtree_select_related = ['collection__jurisdiction', 'parent__collection__jurisdiction',
+                              'kind__vocabulary__jurisdiction', 'license__vocabulary__jurisdiction']
+    subtree_prefetch_related = ['subjects', 'education_levels', 'concept_terms']
+    subtree_link_select_related = 'collection__jurisdiction'
 
     def get_queryset(self):
-        return self.queryset.filter(collection__jurisdiction__name=self.kwargs['jurisdiction_name'])
+        queryset = self.queryset.filter(collection__jurisdiction__name=self.kwargs['jurisdiction_name'])
+        # used in the URLs of the node and of its parent
+        return queryset.select_related('collection__jurisdiction', 'parent__collection__jurisdiction')
 
 
 class ContentNodeRelationViewSet(CustomHTMLRendererRetrieve, viewsets.ModelViewSet):
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class StandardsConfig(AppConfig):
     name = 'standards'
+
+    def ready(self):
+        # connect the model signals that invalidate the term registry
+        from standards.registry import connect_term_registry_signals
+        connect_term_registry_signals()
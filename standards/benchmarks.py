@@ -0,0 +1,231 @@
+import datetime
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+import requests
+
+from standards.models import ControlledVocabulary, Term, TermRelation
+from standards.models import StandardsDocument, StandardNode, StandardNodeRelation
+from standards.models import ContentCollection, ContentStandardRelation
+
+
+# Hot endpoints: name -> path template filled in using `get_benchmark_path_kwargs`
+BENCHMARK_ENDPOINTS = {
+    'jurisdiction-detail': '/{juri}',
+    'vocabulary-detail': '/{juri}/terms/{vocab}',
+    'term-detail': '/{juri}/terms/{vocab}/{term}',
+    'standardnode-list': '/{juri}/standardnodes',
+    'standardnode-detail': '/{juri}/standardnodes/{standardnode}',
+    'document-full': '/{juri}/documents/{document}/full',
+    'contentcollection-full': '/{juri}/contentcollections/{collection}/full',
+    'termrelation-list': '/{juri}/termrels',
+    'standardnoderel-list': '/{juri}/standardnoderels',
+    'contentstandardrel-list': '/{juri}/contentstandardrels',
+}
+
+BENCHMARK_FORMATS = ['json', 'html']
+
+BENCHMARK_PERCENTILES = [50, 95, 99]
+
+
+
+
+# MEASUREMENTS
+################################################################################
+
+def percentile(values, p):
+    """
+    Return the `p`-th percentile of `values` using linear interpolation.
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    k = (len(values) - 1) * p / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def get_peak_rss_kb():
+    """
+    Return the peak resident set size of this process in kilobytes.
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == 'darwin' else maxrss   # macOS reports bytes
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_benchmark_path_kwargs(juri):
+    """
+    Return the values used to fill in the endpoint path templates for `juri`.
+    """
+    vocab = ControlledVocabulary.objects.filter(jurisdiction=juri).first()
+    return dict(
+        juri=juri.name,
+        vocab=vocab.name,
+        term=Term.objects.filter(vocabulary=vocab).first().path,
+        standardnode=StandardNode.objects.filter(document__jurisdiction=juri, level=1).first().id,
+        document=StandardsDocument.objects.filter(jurisdiction=juri).first().id,
+        collection=ContentCollection.objects.filter(jurisdiction=juri).first().id,
+    )
+
+
+def get_dataset_stats(juri):
+    return dict(
+        jurisdiction=juri.name,
+        terms=Term.objects.filter(vocabulary__jurisdiction=juri).count(),
+        termrelations=TermRelation.objects.filter(jurisdiction=juri).count(),
+        standardnodes=StandardNode.objects.filter(document__jurisdiction=juri).count(),
+        standardnoderels=StandardNodeRelation.objects.filter(crosswalk__jurisdiction=juri).count(),
+        contentstandardrels=ContentStandardRelation.objects.filter(correlation__jurisdiction=juri).count(),
+    )
+
+
+class ClientTransport:
+    """
+    Make requests in-process using the Django test client (without the silk
+    profiler), which also allows counting the database queries per request.
+    """
+    name = 'client'
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST='localhost')
+
+    def get(self, path):
+        middleware = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+        with override_settings(MIDDLEWARE=middleware), CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = self.client.get(path)
+            elapsed = time.perf_counter() - start
+        return response.status_code, len(response.content), elapsed, len(ctx.captured_queries)
+
+
+class HttpTransport:
+    """
+    Make requests to a running server at `base_url`, e.g. ``http://localhost:8000``.
+    Query counts are not available (reported as None).
+    """
+    name = 'http'
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def get(self, path):
+        start = time.perf_counter()
+        response = self.session.get(self.base_url + path)
+        elapsed = time.perf_counter() - start
+        return response.status_code, len(response.content), elapsed, None
+
+
+
+
+# BENCHMARK
+################################################################################
+
+def benchmark_endpoint(transport, path, iterations, warmup):
+    """
+    Request `path` `warmup` + `iterations` times and return the statistics of
+    the measured requests (latencies in milliseconds).
+    """
+    for i in range(warmup):
+        transport.get(path)
+    latencies, num_queries = [], []
+    for i in range(iterations):
+        status, num_bytes, elapsed, queries = transport.get(path)
+        if status != 200:
+            raise ValueError('GET {} returned status {}'.format(path, status))
+        latencies.append(elapsed * 1000)
+        num_queries.append(queries)
+    result = dict(
+        path=path,
+        iterations=iterations,
+        mean_ms=sum(latencies) / len(latencies),
+        min_ms=min(latencies),
+        max_ms=max(latencies),
+    )
+    for p in BENCHMARK_PERCENTILES:
+        result['p{}_ms'.format(p)] = percentile(latencies, p)
+    result['queries'] = None if num_queries[0] is None else max(num_queries)
+    result['bytes'] = num_bytes
+    return result
+
+
+def run_benchmarks(transport, juri, endpoints=None, formats=None, iterations=50, warmup=5, log=None):
+    """
+    Benchmark the hot `endpoints` (names from ``BENCHMARK_ENDPOINTS``) for the
+    jurisdiction `juri` in all `formats` and return the results as a dict that
+    can be saved as JSON and compared using ``compare_benchmarks``.
+    """
+    endpoints = endpoints or list(BENCHMARK_ENDPOINTS)
+    formats = formats or BENCHMARK_FORMATS
+    path_kwargs = get_benchmark_path_kwargs(juri)
+    results = {}
+    for name in endpoints:
+        for fmt in formats:
+            path = BENCHMARK_ENDPOINTS[name].format(**path_kwargs) + '.' + fmt
+            key = '{} {}'.format(name, fmt)
+            results[key] = benchmark_endpoint(transport, path, iterations, warmup)
+            if log:
+                log(format_result_line(key, results[key]))
+    return dict(
+        meta=dict(
+            date=datetime.datetime.utcnow().isoformat() + 'Z',
+            commit=get_git_commit(),
+            transport=transport.name,
+            python=platform.python_version(),
+            database=connection.vendor,
+            dataset=get_dataset_stats(juri),
+            peak_rss_kb=get_peak_rss_kb() if transport.name == 'client' else None,
+        ),
+        results=results,
+    )
+
+
+def format_result_line(key, result):
+    return '{:<32} p50={:8.1f}ms p95={:8.1f}ms p99={:8.1f}ms queries={:>4} bytes={:>9}'.format(
+        key, result['p50_ms'], result['p95_ms'], result['p99_ms'],
+        '-' if result['queries'] is None else result['queries'], result['bytes'])
+
+
+def compare_benchmarks(baseline, current, max_regression=0.2, metric='p95_ms'):
+    """
+    Compare the benchmark results `current` to `baseline` (as returned by
+    ``run_benchmarks``) and return a list of regressions: endpoints whose
+    `metric` latency grew by more than `max_regression` (a fraction) or whose
+    number of queries increased.
+    """
+    regressions = []
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        if base[metric] and result[metric] > base[metric] * (1 + max_regression):
+            regressions.append('{}: {} {:.1f}ms -> {:.1f}ms'.format(key, metric, base[metric], result[metric]))
+        if base['queries'] is not None and result['queries'] is not None and result['queries'] > base['queries']:
+            regressions.append('{}: queries {} -> {}'.format(key, base['queries'], result['queries']))
+    return regressions
+
+
+def save_benchmarks(benchmarks, output_path):
+    with open(output_path, 'w') as outf:
+        json.dump(benchmarks, outf, indent=2, sort_keys=True)
+
+
+def load_benchmarks(input_path):
+    with open(input_path) as inf:
+        return json.load(inf)
@@ -0,0 +1,155 @@
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Cookie set after a client's write so its next reads see its own writes
+LAST_WRITE_COOKIE_NAME = 'roc_last_write'
+
+# Database alias used for reads during the current request (None means primary)
+_read_db_alias = contextvars.ContextVar('read_db_alias', default=None)
+
+
+
+
+# REPLICA HEALTH
+################################################################################
+
+class ReplicaHealth:
+    """
+    Tracks read replicas that failed to connect, so they are skipped for
+    ``settings.ROCDATA_DB_REPLICA_RETRY_SECONDS`` before being tried again.
+    """
+
+    def __init__(self):
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def is_down(self, alias):
+        return time.monotonic() < self._down_until.get(alias, 0)
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + settings.ROCDATA_DB_REPLICA_RETRY_SECONDS
+
+    def check(self, alias):
+        """
+        Return True if the replica `alias` can be used. Persistent connections
+        that are already open are reused without running any query.
+        """
+        if self.is_down(alias):
+            return False
+        connection = connections[alias]
+        if connection.connection is not None:
+            return True
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            self.mark_down(alias)
+            return False
+        return True
+
+    def choose_replica(self):
+        """
+        Return the alias of a random healthy replica, or None if none is healthy.
+        """
+        aliases = list(settings.ROCDATA_DB_REPLICAS)
+        random.shuffle(aliases)
+        for alias in aliases:
+            if self.check(alias):
+                return alias
+        return None
+
+
+replica_health = ReplicaHealth()
+
+
+
+
+# ROUTING
+################################################################################
+
+class ReplicaRoutingMiddleware:
+    """
+    Chooses the database used for the reads of each request: a healthy replica
+    for requests with safe methods, and the primary database for writes, admin
+    pages, and clients that made a write within the last
+    ``settings.ROCDATA_DB_READ_YOUR_WRITES_SECONDS`` (tracked using a cookie).
+    All the reads of a request go to the same database, and requests that fail
+    because of a replica error are retried on the primary database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = self.get_read_db_alias(request)
+        response = self.get_response_using(request, alias)
+        if alias is not None and self.replica_failed(alias, response):
+            # the replica failed during the request (e.g. its persistent
+            # connection was dropped), so skip it and retry on the primary
+            replica_health.mark_down(alias)
+            try:
+                connections[alias].close()
+            except DatabaseError:
+                pass
+            response = self.get_response_using(request, None)
+        if request.method not in SAFE_METHODS:
+            window = settings.ROCDATA_DB_READ_YOUR_WRITES_SECONDS
+            response.set_cookie(LAST_WRITE_COOKIE_NAME, str(int(time.time())),
+                                max_age=window, httponly=True, samesite='Lax')
+        return response
+
+    def get_response_using(self, request, alias):
+        token = _read_db_alias.set(alias)
+        if alias is not None:
+            connections[alias].errors_occurred = False
+        try:
+            return self.get_response(request)
+        finally:
+            _read_db_alias.reset(token)
+
+    def replica_failed(self, alias, response):
+        """
+        Return True if the request failed because of an error of the replica
+        `alias` (Django flags the connections that raised database errors).
+        """
+        return response.status_code >= 500 and connections[alias].errors_occurred
+
+    def get_read_db_alias(self, request):
+        if not settings.ROCDATA_DB_REPLICAS or request.method not in SAFE_METHODS:
+            return None
+        if request.path.startswith(settings.ROCDATA_DB_PRIMARY_PATH_PREFIXES):
+            return None
+        last_write = request.COOKIES.get(LAST_WRITE_COOKIE_NAME, '')
+        if last_write.isdigit():
+            if time.time() - int(last_write) < settings.ROCDATA_DB_READ_YOUR_WRITES_SECONDS:
+                return None
+        return replica_health.choose_replica()
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica chosen by ``ReplicaRoutingMiddleware`` for the
+    current request, and everything else (writes, reads outside of requests
+    like in importers and management commands) to the primary database.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_db_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the primary and the replicas contain the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
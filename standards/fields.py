@@ -1,4 +1,7 @@
 from functools import partial
+import hashlib
+import os
+import threading
 
 from django import forms
 from django.core import exceptions
@@ -22,9 +25,16 @@ class CharIdField(UniqueFieldMixin, models.CharField):
         prefix: A prefix that will be used for all IDs (default: "")
         unique: If True, duplicate entries are not allowed (default: True)
     This field is an adaptation of django_extensions.db.fields.RandomCharField.
+    Unique ids are allocated from a per-process pool of ids checked in bulk, see
+    ``allocate_ids`` and ``assign_char_ids`` (to use before ``bulk_create``).
+    Importers can instead use ``derive_id`` to obtain deterministic ids.
     """
     # Custom alphabet that excludes possibly confusing symbols like I, l, and 1
     ALPHABET = list("23456789ABEFGHKLMNPQUWXYZ" "abcdefghijkmnopqrstuvwxyz")
+    # Minimum number of candidate ids checked when refilling the id pool
+    ID_POOL_BATCH_SIZE = 100
+    # Maximum number of ids per IN query (SQLite limits query parameters)
+    ID_POOL_QUERY_SIZE = 900
 
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('blank', True)
@@ -45,6 +55,13 @@ class CharIdField(UniqueFieldMixin, models.CharField):
 
         super().__init__(*args, **kwargs)
 
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        # per-process pool of ids that were checked to be unused (see ``allocate_ids``)
+        self._id_pool = []
+        self._id_pool_pid = None
+        self._id_pool_lock = threading.Lock()
+
     def random_char_generator(self, chars):
         for i in range(self.max_unique_query_attempts):
             len_random_chars = self.length - len(self.prefix)
@@ -52,6 +69,75 @@ class CharIdField(UniqueFieldMixin, models.CharField):
             yield self.prefix + random_chars
         raise RuntimeError('max random character attempts exceeded (%s)' % self.max_unique_query_attempts)
 
+    def generate_candidate_ids(self, n):
+        """
+        Return a set of (at most) `n` random ids with this field's prefix, length
+        and ALPHABET. Fewer ids are returned when some of the ids generated collide.
+        """
+        len_random_chars = self.length - len(self.prefix)
+        return set(
+            self.prefix + get_random_string(len_random_chars, self.ALPHABET)
+            for i in range(n)
+        )
+
+    def allocate_ids(self, n):
+        """
+        Return a list of `n` ids that are not used in this field's table. Ids are
+        drawn from a per-process pool that is refilled by generating at least
+        ``ID_POOL_BATCH_SIZE`` candidate ids and checking them using ``IN`` queries
+        of at most ``ID_POOL_QUERY_SIZE`` ids, instead of one query per id.
+        """
+        with self._id_pool_lock:
+            if self._id_pool_pid != os.getpid():
+                # don't share pools with parent process after fork
+                self._id_pool = []
+                self._id_pool_pid = os.getpid()
+            attempts = 0
+            while len(self._id_pool) < n:
+                if attempts >= self.max_unique_query_attempts:
+                    raise RuntimeError('max random character attempts exceeded (%s)' % self.max_unique_query_attempts)
+                attempts += 1
+                candidates = self.generate_candidate_ids(max(n - len(self._id_pool), self.ID_POOL_BATCH_SIZE))
+                candidates.difference_update(self._id_pool)
+                candidates = list(candidates)
+                queryset = self.model._base_manager.all()
+                for i in range(0, len(candidates), self.ID_POOL_QUERY_SIZE):
+                    chunk = candidates[i:i+self.ID_POOL_QUERY_SIZE]
+                    lookup = {self.attname + '__in': chunk}
+                    taken = set(queryset.filter(**lookup).values_list(self.attname, flat=True))
+                    self._id_pool.extend(cid for cid in chunk if cid not in taken)
+            ids = self._id_pool[:n]
+            del self._id_pool[:n]
+            return ids
+
+    def derive_id(self, *parts):
+        """
+        Return a deterministic id computed from a SHA-256 hash of the strings in
+        `parts`, e.g. ``(collection_id, source_domain, source_id)`` for imported
+        content, encoded using this field's prefix, length, and ALPHABET.
+        Servers that import the same data will produce the same ids (and URIs).
+        """
+        key = '\x1f'.join('' if part is None else str(part) for part in parts)
+        num = int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest(), 'big')
+        chars = []
+        for i in range(self.length - len(self.prefix)):
+            num, idx = divmod(num, len(self.ALPHABET))
+            chars.append(self.ALPHABET[idx])
+        return self.prefix + ''.join(chars)
+
+    def assign_ids(self, objs):
+        """
+        Set unused ids on the model instances `objs` that don't have an id yet.
+        Call this before ``bulk_create`` to allocate all the ids in bulk.
+        """
+        objs = [obj for obj in objs if getattr(obj, self.attname) in ('', None)]
+        if self.null:
+            objs = [obj for obj in objs if getattr(obj, self.attname) == '']
+        if not objs:
+            return
+        for obj, new in zip(objs, self.allocate_ids(len(objs))):
+            setattr(obj, self.attname, new)
+
     def in_unique_together(self, model_instance):
         for params in model_instance._meta.unique_together:
             if self.attname in params:
@@ -75,11 +161,16 @@ class CharIdField(UniqueFieldMixin, models.CharField):
             setattr(model_instance, self.attname, new)
             return new
 
-        return self.find_unique(
-            model_instance,
-            model_instance._meta.get_field(self.attname),
-            random_chars,
-        )
+        if not self.unique:
+            return self.find_unique(
+                model_instance,
+                model_instance._meta.get_field(self.attname),
+                random_chars,
+            )
+
+        new = self.allocate_ids(1)[0]
+        setattr(model_instance, self.attname, new)
+        return new
 
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
@@ -90,3 +181,17 @@ class CharIdField(UniqueFieldMixin, models.CharField):
         if self.unique is False:
             kwargs['unique'] = self.unique
         return name, path, args, kwargs
+
+
+def assign_char_ids(objs):
+    """
+    Set ids on all the unique ``CharIdField`` s of the model instances `objs`
+    that don't have a value yet, using one bulk allocation per field.
+    Use this before ``bulk_create`` or when ids are needed before saving.
+    """
+    objs = list(objs)
+    if objs:
+        for field in objs[0]._meta.concrete_fields:
+            if isinstance(field, CharIdField) and field.unique:
+                field.assign_ids(objs)
+    return objs
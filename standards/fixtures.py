@@ -0,0 +1,300 @@
+import datetime
+import json
+import os
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from standards.models import Jurisdiction, ControlledVocabulary, Term, TermRelation
+from standards.models import StandardsDocument, StandardNode
+from standards.models import StandardsCrosswalk, StandardNodeRelation
+from standards.models import ContentCollection, ContentNode, ContentNodeRelation
+from standards.models import ContentCorrelation, ContentStandardRelation
+from standards.registry import term_registry
+
+
+FIXTURES_FORMAT = 'rocdata-ndjson'
+FIXTURES_VERSION = 1
+FIXTURES_MANIFEST = 'manifest.json'
+
+# Number of rows per bulk_create and per M2M lookup
+FIXTURES_BATCH_SIZE = 1000
+
+# Models in the dev fixtures (see fabfile.py), in dependency order
+FIXTURES_MODELS = [
+    TermRelation,
+    StandardsDocument,
+    StandardNode,
+    StandardsCrosswalk,
+    StandardNodeRelation,
+    ContentCollection,
+    ContentNode,
+    ContentNodeRelation,
+    ContentCorrelation,
+    ContentStandardRelation,
+]
+
+# Models referenced by natural key (the lookups of their ``natural_key`` values),
+# which are loaded separately (createjurisdiction, loadterms)
+NATURAL_KEY_LOOKUPS = {
+    Jurisdiction: ['name'],
+    ControlledVocabulary: ['jurisdiction__name', 'name'],
+    Term: ['vocabulary__jurisdiction__name', 'vocabulary__name', 'path'],
+}
+
+
+
+
+# HELPERS
+################################################################################
+
+class FixturesJSONEncoder(DjangoJSONEncoder):
+    # keep the microseconds of datetimes (DjangoJSONEncoder rounds to milliseconds)
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def get_model_label(model):
+    return model._meta.label_lower
+
+
+def get_model_by_label(label):
+    for model in FIXTURES_MODELS:
+        if get_model_label(model) == label:
+            return model
+    raise ValueError('Unsupported fixtures model {}'.format(label))
+
+
+def sort_models(models):
+    """
+    Return `models` sorted so that the models referenced by foreign keys come
+    before the models that reference them (self references are ignored).
+    """
+    models = list(models)
+    ordered = []
+    while models:
+        for model in models:
+            deps = {field.related_model for field in model._meta.concrete_fields if field.is_relation}
+            if not any(dep in models and dep is not model for dep in deps):
+                models.remove(model)
+                ordered.append(model)
+                break
+        else:
+            raise ValueError('Circular dependencies between models {}'.format(models))
+    return ordered
+
+
+def get_m2m_fields(model):
+    return [field for field in model._meta.many_to_many if field.remote_field.through._meta.auto_created]
+
+
+class NaturalKeyMaps:
+    """
+    In-memory maps between the ids and the natural keys of the models in
+    ``NATURAL_KEY_LOOKUPS``, each built with a single query on first use.
+    """
+
+    def __init__(self):
+        self.keys_by_id = {}
+        self.ids_by_key = {}
+
+    def _build(self, model):
+        rows = model._base_manager.values_list('id', *NATURAL_KEY_LOOKUPS[model]).order_by()
+        self.keys_by_id[model] = {row[0]: list(row[1:]) for row in rows}
+        self.ids_by_key[model] = {tuple(key): id for id, key in self.keys_by_id[model].items()}
+
+    def get_key(self, model, id):
+        if model not in self.keys_by_id:
+            self._build(model)
+        return self.keys_by_id[model][id]
+
+    def get_id(self, model, key):
+        if model not in self.ids_by_key:
+            self._build(model)
+        try:
+            return self.ids_by_key[model][tuple(key)]
+        except KeyError:
+            raise ValueError('{} with natural key {} does not exist'.format(model.__name__, key))
+
+
+
+
+# DUMP
+################################################################################
+
+def iter_dump_rows(model, keymaps):
+    """
+    Yield the rows of `model` as dicts ``{"pk": ..., "fields": {...}}`` with the
+    foreign keys to ``NATURAL_KEY_LOOKUPS`` models as natural keys. The rows are
+    read in batches, and the M2M values of each batch with one query per field.
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    m2m_fields = get_m2m_fields(model)
+    ordering = ['tree_id', 'lft'] if hasattr(model, '_mptt_meta') else ['pk']
+    queryset = model._base_manager.order_by(*ordering)
+    attnames = ['pk'] + [field.attname for field in fields]
+    batch = []
+    for row in queryset.values_list(*attnames).iterator(chunk_size=FIXTURES_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= FIXTURES_BATCH_SIZE:
+            yield from _format_dump_batch(batch, fields, m2m_fields, keymaps)
+            batch = []
+    if batch:
+        yield from _format_dump_batch(batch, fields, m2m_fields, keymaps)
+
+
+def _format_dump_batch(batch, fields, m2m_fields, keymaps):
+    pks = [row[0] for row in batch]
+    m2m_values = {}
+    for field in m2m_fields:
+        through = field.remote_field.through
+        source, target = field.m2m_field_name() + '_id', field.m2m_reverse_field_name() + '_id'
+        values = m2m_values[field.name] = {}
+        for source_id, target_id in through.objects.filter(**{source + '__in': pks}).values_list(source, target):
+            values.setdefault(source_id, []).append(target_id)
+    for row in batch:
+        data = {}
+        for field, value in zip(fields, row[1:]):
+            if field.is_relation and value is not None and field.related_model in NATURAL_KEY_LOOKUPS:
+                value = keymaps.get_key(field.related_model, value)
+            data[field.name] = value
+        for field in m2m_fields:
+            target_ids = sorted(m2m_values[field.name].get(row[0], []))
+            if field.related_model in NATURAL_KEY_LOOKUPS:
+                data[field.name] = [keymaps.get_key(field.related_model, id) for id in target_ids]
+            else:
+                data[field.name] = target_ids
+        yield {'pk': row[0], 'fields': data}
+
+
+def dump_fixtures(directory, models=FIXTURES_MODELS):
+    """
+    Write the rows of `models` to one NDJSON file per model in `directory`,
+    plus the manifest that lists the files in dependency order.
+    Returns the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    keymaps = NaturalKeyMaps()
+    manifest = dict(format=FIXTURES_FORMAT, version=FIXTURES_VERSION, models=[])
+    for model in sort_models(models):
+        filename = get_model_label(model) + '.ndjson'
+        count = 0
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8') as outf:
+            for row in iter_dump_rows(model, keymaps):
+                outf.write(json.dumps(row, cls=FixturesJSONEncoder, ensure_ascii=False) + '\n')
+                count += 1
+        manifest['models'].append(dict(model=get_model_label(model), file=filename, count=count))
+    with open(os.path.join(directory, FIXTURES_MANIFEST), 'w') as outf:
+        json.dump(manifest, outf, indent=2)
+    return manifest
+
+
+
+
+# LOAD
+################################################################################
+
+def read_manifest(directory):
+    with open(os.path.join(directory, FIXTURES_MANIFEST)) as inf:
+        manifest = json.load(inf)
+    if manifest.get('format') != FIXTURES_FORMAT or manifest.get('version') != FIXTURES_VERSION:
+        raise ValueError('Unsupported fixtures format {} version {}'.format(
+            manifest.get('format'), manifest.get('version')))
+    return manifest
+
+
+def iter_batches(path):
+    batch = []
+    with open(path, encoding='utf-8') as inf:
+        for line in inf:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= FIXTURES_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def build_instances(model, rows, keymaps):
+    """
+    Return the unsaved instances of `model` for `rows`, and the dict of the
+    through model instances of their M2M values by through model. Tree fields
+    of MPTT models are set as dumped (no tree rebuild needed).
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    m2m_fields = get_m2m_fields(model)
+    instances, through_instances = [], {}
+    for row in rows:
+        values = row['fields']
+        kwargs = {model._meta.pk.attname: row['pk']}
+        for field in fields:
+            if field.name not in values:
+                continue
+            value = values[field.name]
+            if field.is_relation:
+                if value is not None and field.related_model in NATURAL_KEY_LOOKUPS:
+                    value = keymaps.get_id(field.related_model, value)
+                kwargs[field.attname] = value
+            else:
+                kwargs[field.attname] = field.to_python(value)
+        instances.append(model(**kwargs))
+        for field in m2m_fields:
+            through = field.remote_field.through
+            source, target = field.m2m_field_name() + '_id', field.m2m_reverse_field_name() + '_id'
+            for value in values.get(field.name, []):
+                if field.related_model in NATURAL_KEY_LOOKUPS:
+                    value = keymaps.get_id(field.related_model, value)
+                through_instances.setdefault(through, []).append(through(**{source: row['pk'], target: value}))
+    return instances, through_instances
+
+
+def bulk_create_as_dumped(model, instances):
+    """
+    Insert `instances` keeping their dumped ``auto_now`` and ``auto_now_add``
+    dates (``bulk_create`` sets them to the current time).
+    """
+    auto_fields = [field for field in model._meta.concrete_fields
+                   if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    dumped = [[getattr(obj, field.attname) for field in auto_fields] for obj in instances]
+    model._base_manager.bulk_create(instances)
+    if auto_fields:
+        for obj, values in zip(instances, dumped):
+            for field, value in zip(auto_fields, values):
+                setattr(obj, field.attname, value)
+        model._base_manager.bulk_update(instances, [field.name for field in auto_fields])
+
+
+def load_fixtures(directory, overwrite=False):
+    """
+    Load the fixtures in `directory` (written by ``dump_fixtures``) using bulk
+    inserts in dependency order in a single transaction. Natural keys are
+    resolved using in-memory maps built once per referenced model. Rows that
+    already exist raise ``ValueError``, unless `overwrite` is set (they are
+    deleted before the insert). Returns the dict of row counts by model label.
+    """
+    manifest = read_manifest(directory)
+    entries = {entry['model']: entry for entry in manifest['models']}
+    models = sort_models(get_model_by_label(label) for label in entries)
+    keymaps = NaturalKeyMaps()
+    counts = {}
+    with transaction.atomic():
+        for model in models:
+            entry = entries[get_model_label(model)]
+            counts[entry['model']] = 0
+            for rows in iter_batches(os.path.join(directory, entry['file'])):
+                pks = [row['pk'] for row in rows]
+                existing = model._base_manager.filter(pk__in=pks)
+                if overwrite:
+                    existing.delete()
+                elif existing.exists():
+                    raise ValueError('{} {} already exists'.format(model.__name__, existing.first().pk))
+                instances, through_instances = build_instances(model, rows, keymaps)
+                bulk_create_as_dumped(model, instances)
+                for through, objs in through_instances.items():
+                    through.objects.bulk_create(objs)
+                counts[entry['model']] += len(instances)
+    term_registry.invalidate()
+    return counts
@@ -0,0 +1,71 @@
+import logging
+import sys
+
+from django.core.management.base import BaseCommand
+
+from standards.benchmarks import BENCHMARK_ENDPOINTS, BENCHMARK_FORMATS
+from standards.benchmarks import ClientTransport, HttpTransport
+from standards.benchmarks import compare_benchmarks, load_benchmarks, run_benchmarks, save_benchmarks
+from standards.models import Jurisdiction
+from standards.synthetic import generate_synthetic_data
+
+
+class Command(BaseCommand):
+    """
+    Measure the latency percentiles, queries per request, and response sizes of
+    the hot API endpoints for a (synthetic) jurisdiction, save the results as
+    JSON, and optionally compare them to the results of a previous run.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("--jurisdiction", default="Bench0", help="Jurisdiction to benchmark")
+        parser.add_argument("--generate", action='store_true', help="Create the jurisdiction using generate_synthetic if missing")
+        parser.add_argument("--nodes", type=int, default=2000, help="Nodes per tree when using --generate")
+        parser.add_argument("--relations", type=int, default=2000, help="Relations of each kind when using --generate")
+        parser.add_argument("--url", help="Benchmark a running server at this URL instead of using the test client")
+        parser.add_argument("--endpoints", default=",".join(BENCHMARK_ENDPOINTS), help="Comma-separated endpoint names")
+        parser.add_argument("--formats", default=",".join(BENCHMARK_FORMATS), help="Comma-separated formats")
+        parser.add_argument("--iterations", type=int, default=50, help="Measured requests per endpoint and format")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before measuring")
+        parser.add_argument("--output", help="Save the results to this JSON file")
+        parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+        parser.add_argument("--max_regression", type=float, default=0.2, help="Allowed p95 latency increase (fraction)")
+
+
+    def handle(self, *args, **options):
+        logging.getLogger('standards.timing').setLevel(logging.WARNING)   # no log line per request
+        juri_name = options['jurisdiction']
+        if not Jurisdiction.objects.filter(name=juri_name).exists():
+            if not options['generate'] or not juri_name.endswith('0'):
+                # synthetic jurisdictions are named {prefix}0, {prefix}1, ...
+                print('Jurisdiction', juri_name, 'does not exist. Use --generate with a name like Bench0 to create it.')
+                sys.exit(-5)
+            print('Generating synthetic data for', juri_name)
+            generate_synthetic_data(num_jurisdictions=1, num_nodes=options['nodes'], num_relations=options['relations'],
+                                    depth=4, prefix=juri_name[:-1], verbose=True)
+        juri = Jurisdiction.objects.get(name=juri_name)
+
+        endpoints = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(endpoints) - set(BENCHMARK_ENDPOINTS)
+        if unknown:
+            print('Unknown endpoints', ', '.join(sorted(unknown)), '(choose from', ', '.join(BENCHMARK_ENDPOINTS) + ')')
+            sys.exit(-3)
+        formats = [fmt.strip() for fmt in options['formats'].split(',') if fmt.strip()]
+
+        transport = HttpTransport(options['url']) if options['url'] else ClientTransport()
+        benchmarks = run_benchmarks(transport, juri, endpoints=endpoints, formats=formats,
+                                    iterations=options['iterations'], warmup=options['warmup'], log=print)
+        if benchmarks['meta']['peak_rss_kb']:
+            print('Peak RSS: {:.1f} MB'.format(benchmarks['meta']['peak_rss_kb'] / 1024))
+        if options['output']:
+            save_benchmarks(benchmarks, options['output'])
+            print('Saved results to', options['output'])
+
+        if options['compare']:
+            baseline = load_benchmarks(options['compare'])
+            regressions = compare_benchmarks(baseline, benchmarks, max_regression=options['max_regression'])
+            if regressions:
+                print('Regressions compared to', options['compare'], '(commit {})'.format(baseline['meta']['commit']))
+                for regression in regressions:
+                    print('  ' + regression)
+                sys.exit(-9)
+            print('No regressions compared to', options['compare'])
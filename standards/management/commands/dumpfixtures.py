@@ -0,0 +1,29 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from standards.fixtures import FIXTURES_MODELS, dump_fixtures, get_model_by_label
+
+
+class Command(BaseCommand):
+    """
+    Export the documents, crosswalks, content collections, and content correlations
+    as NDJSON fixtures (one file per model plus a manifest) to load using
+    ``loadfixtures``. Terms are referenced by natural key.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Output directory")
+        parser.add_argument("--models", help="Comma-separated model labels, e.g. standards.standardnode (default: all)")
+
+
+    def handle(self, *args, **options):
+        models = FIXTURES_MODELS
+        if options['models']:
+            try:
+                models = [get_model_by_label(label.strip()) for label in options['models'].split(',')]
+            except ValueError as e:
+                print('ERROR:', e)
+                sys.exit(-3)
+        manifest = dump_fixtures(options['directory'], models=models)
+        for entry in manifest['models']:
+            print('Exported', entry['count'], entry['model'], 'to', entry['file'])
@@ -0,0 +1,48 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from standards.models import Jurisdiction
+from standards.publishing import get_base_url, get_publishing_context
+from standards.skos import iter_chunks, iter_rdf_lines, iter_skos_triples
+
+
+class Command(BaseCommand):
+    """
+    Export controlled vocabularies, terms, and term relations as SKOS data in
+    N-Triples or Turtle format, streamed using constant memory.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("--jurisdiction", help="Export only this jurisdiction (default: all)")
+        parser.add_argument("--format", dest="rdf_format", choices=["nt", "ttl"], default="nt", help="N-Triples or Turtle")
+        parser.add_argument("--base_url", help="URL prefix for URIs, e.g. https://rocdata.global (default: from the publishing context)")
+        parser.add_argument("--output", help="Output file (gzip-compressed if it ends in .gz); default: stdout")
+
+
+    def handle(self, *args, **options):
+        juri_name = options['jurisdiction']
+        if juri_name and not Jurisdiction.objects.filter(name=juri_name).exists():
+            print('Jurisdiction', juri_name, 'does not exist')
+            sys.exit(-5)
+
+        base_url = options['base_url']
+        if base_url is None:
+            if settings.ROCDATA_PUBLISHING_CONTEXT == 'default':
+                print('ERROR: --base_url is required when using the default publishing context')
+                sys.exit(-3)
+            base_url = get_base_url(get_publishing_context())
+        base_url = base_url.rstrip('/')
+
+        output = options['output']
+        use_gzip = bool(output) and output.endswith('.gz')
+        triples = iter_skos_triples(base_url, jurisdiction_name=juri_name)
+        chunks = iter_chunks(iter_rdf_lines(triples, options['rdf_format']), gzip=use_gzip)
+        if output:
+            with open(output, 'wb') as outf:
+                for chunk in chunks:
+                    outf.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.flush()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from standards.snapshots import export_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Export all published data as pre-rendered JSON into a read-only snapshot
+    database to serve using ``ROCDATA_SNAPSHOT_PATH`` (see ``standards.snapshots``).
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the snapshot database file (replaced atomically)")
+        parser.add_argument("--host", default="rocdata.global", help="Hostname used for URIs (must be in ALLOWED_HOSTS)")
+        parser.add_argument("--scheme", default="https", choices=["http", "https"], help="Scheme used for URIs")
+
+
+    def handle(self, *args, **options):
+        count = export_snapshot(options['output'], options['host'], scheme=options['scheme'])
+        print('Exported', count, 'endpoints to snapshot', options['output'])
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from standards.models import Jurisdiction
+from standards.synthetic import generate_synthetic_data
+
+
+class Command(BaseCommand):
+    """
+    Generate synthetic jurisdictions with vocabularies, standards documents,
+    content collections, crosswalks, and content correlations of configurable
+    size for scale testing and benchmarks. Example (about a million rows):
+        ./manage.py generate_synthetic --nodes 50000 --contentnodes 200000 --correlations 500000
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("--jurisdictions", type=int, default=1, help="Number of jurisdictions to create")
+        parser.add_argument("--terms", type=int, default=200, help="Number of subject terms per jurisdiction")
+        parser.add_argument("--nodes", type=int, default=1000, help="Number of standard nodes per document")
+        parser.add_argument("--contentnodes", type=int, help="Number of content nodes per collection (default: --nodes)")
+        parser.add_argument("--relations", type=int, default=1000, help="Number of term, content node, and crosswalk relations")
+        parser.add_argument("--correlations", type=int, help="Number of content standard relations (default: --relations)")
+        parser.add_argument("--depth", type=int, default=4, help="Maximum depth of the standards and content trees")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed used to generate the data")
+        parser.add_argument("--prefix", default="Synth", help="Prefix of the jurisdiction names (followed by 0, 1, ...)")
+
+
+    def handle(self, *args, **options):
+        if options['depth'] < 1:
+            print('ERROR: --depth must be at least 1')
+            sys.exit(-3)
+        names = [options['prefix'] + str(j) for j in range(options['jurisdictions'])]
+        existing = Jurisdiction.objects.filter(name__in=names).values_list('name', flat=True)
+        if existing:
+            print('Jurisdictions', ', '.join(existing), 'already exist. Use a different --prefix.')
+            sys.exit(-8)
+
+        start = time.time()
+        generate_synthetic_data(
+            num_jurisdictions=options['jurisdictions'],
+            num_terms=options['terms'],
+            num_nodes=options['nodes'],
+            num_relations=options['relations'],
+            num_contentnodes=options['contentnodes'],
+            num_correlations=options['correlations'],
+            depth=options['depth'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            verbose=True,
+        )
+        print('Generated synthetic data for', ', '.join(names), 'in {:.1f} seconds'.format(time.time() - start))
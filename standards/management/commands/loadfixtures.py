@@ -0,0 +1,26 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from standards.fixtures import load_fixtures
+
+
+class Command(BaseCommand):
+    """
+    Load the NDJSON fixtures exported by ``dumpfixtures`` using bulk inserts in a
+    single transaction. The jurisdictions and vocabularies they reference must
+    exist already (see ``createjurisdiction`` and ``loadterms``).
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Fixtures directory (with manifest.json)")
+        parser.add_argument("--overwrite", action="store_true", help="Replace existing objects with the same ids")
+
+
+    def handle(self, *args, **options):
+        try:
+            counts = load_fixtures(options['directory'], overwrite=options['overwrite'])
+        except ValueError as e:
+            print('ERROR: could not load fixtures:', e)
+            sys.exit(-7)
+        for label, count in counts.items():
+            print('Loaded', count, label)
@@ -1,30 +1,240 @@
-
+from concurrent.futures import ProcessPoolExecutor
+import glob
 import os
 import sys
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 import pycountry
 import requests
 import yaml
 
+from standards.fields import assign_char_ids
 from standards.models import Jurisdiction, ControlledVocabulary, Term, TermRelation
-from standards.utils import ensure_language_code
+from standards.registry import term_registry
+from standards.utils import ensure_country_code, ensure_language_code
+
+
+# Term attributes that can be specified in the YAML data (besides term and label)
+OPTIONAL_ATTRS = ['definition', 'notes', 'alt_label', 'hidden_label', 'source_uri']
+
+# Term fields compared and updated when loading a vocabulary that already exists
+TERM_UPDATE_FIELDS = ['label', 'sort_order', 'language'] + OPTIONAL_ATTRS
+
+# Number of processes used to parse YAML files when loading many vocabularies
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 8)
+
+# Files in vocabulary directories that are not vocabularies
+SKIP_FILENAMES = ['template.yml', 'manifest.yml']
+
+
+
+# READING TERMS FILES
+################################################################################
+
+def expand_terms_path(path):
+    """
+    Return the list of vocabulary files for `path`, which can be a URL, a local
+    file, a directory (all ``.yml`` and ``.yaml`` files in it), or a glob pattern.
+    """
+    if path.startswith('http'):
+        return [path]
+    if os.path.isdir(path):
+        paths = glob.glob(os.path.join(path, '*.yml')) + glob.glob(os.path.join(path, '*.yaml'))
+    elif glob.has_magic(path):
+        paths = glob.glob(path)
+    else:
+        return [path]
+    return sorted(p for p in paths if os.path.basename(p) not in SKIP_FILENAMES)
+
+
+def read_terms_manifest(manifest_path):
+    """
+    Read the terms manifest YAML file at `manifest_path` and return the tuple
+    ``(jurisdictions, sources)`` where `jurisdictions` is a list of dicts of
+    jurisdiction attributes and `sources` is a list of ``(path, jurisdiction)``
+    tuples. Local paths are relative to the manifest's directory.
+    """
+    with open(manifest_path) as manifestf:
+        manifest = yaml.safe_load(manifestf.read())
+    if manifest is None or manifest.get('type') != 'TermsManifest':
+        print('ERROR: not a TermsManifest', manifest_path)
+        sys.exit(-3)
+    manifest_dir = os.path.dirname(manifest_path)
+    sources = []
+    for entry in manifest.get('terms') or []:
+        if isinstance(entry, str):
+            entry = {'path': entry}
+        path = entry['path']
+        if "raw.githubusercontent" in path:
+            path += '?flush_cache=True'  # bypass 5 minute cache
+        elif not path.startswith('http'):
+            path = os.path.join(manifest_dir, path)
+        for expanded_path in expand_terms_path(path):
+            sources.append((expanded_path, entry.get('jurisdiction')))
+    return manifest.get('jurisdictions') or [], sources
+
+
+def parse_terms_source(source):
+    """
+    Load and parse the vocabulary YAML data from `source` (local path or URL).
+    Returns a tuple ``(source, parsed, error)`` so this can run in a worker process.
+    """
+    try:
+        if source.startswith('http'):
+            response = requests.get(source)
+            response.raise_for_status()
+            yaml_text = response.text
+        else:
+            with open(source) as yamlf:
+                yaml_text = yamlf.read()
+        termsdata = yaml.safe_load(yaml_text)
+        if termsdata is None:
+            return source, None, 'no data available'
+        return source, parse_terms_data(termsdata), None
+    except (OSError, ValueError, yaml.YAMLError, requests.RequestException) as e:
+        return source, None, str(e)
+
+
+def parse_terms_sources(sources, workers=DEFAULT_WORKERS):
+    """
+    Parse the vocabulary `sources` using a pool of `workers` processes.
+    Returns a list of ``(source, parsed, error)`` tuples in the order of `sources`.
+    """
+    if workers <= 1 or len(sources) <= 1:
+        return [parse_terms_source(source) for source in sources]
+    with ProcessPoolExecutor(max_workers=min(workers, len(sources))) as executor:
+        return list(executor.map(parse_terms_source, sources))
+
+
+
+# PARSING AND LOADING TERMS
+################################################################################
+
+
+def parse_terms_data(termsdata):
+    """
+    Validate the `termsdata` (dict) loaded from a YAML file and flatten its tree
+    of terms (any depth) into a list of term dicts with full ``/``-separated paths.
+    Does not access the DB. Raises ``ValueError`` if the data is invalid.
+    """
+    if termsdata.get('type') != 'ControlledVocabulary':
+        raise ValueError('expected type ControlledVocabulary but got ' + str(termsdata.get('type')))
+    if not termsdata.get('name') or not isinstance(termsdata['name'], str):
+        raise ValueError('vocabulary name is missing or invalid')
+
+    # language codes are validated only once per distinct value
+    language_codes = {}
+    def get_language(language_raw, default):
+        if not language_raw:
+            return default
+        if language_raw not in language_codes:
+            language_codes[language_raw] = ensure_language_code(language_raw)
+        return language_codes[language_raw]
+
+    vocab_language = get_language(termsdata.get('language') or 'en', None)
+    country_raw = termsdata.get('country', None)
+    if country_raw:
+        vocab_country = pycountry.countries.lookup(country_raw).alpha_2
+    else:
+        vocab_country = None
+
+    # iterative depth-first walk of the terms tree to preserve the file order
+    terms = []
+    seen_paths = set()
+    stack = [('', list(reversed(list(enumerate(termsdata.get('terms') or [])))))]
+    while stack:
+        parent_path, pending = stack[-1]
+        if not pending:
+            stack.pop()
+            continue
+        idx, term_dict = pending.pop()
+        if not isinstance(term_dict, dict) or not term_dict.get('term'):
+            raise ValueError('term without a `term` key under ' + (parent_path or 'vocabulary root'))
+        term_name = str(term_dict['term']).strip()
+        term_path = parent_path + '/' + term_name if parent_path else term_name
+        if term_path in seen_paths:
+            raise ValueError('duplicate term path ' + term_path)
+        seen_paths.add(term_path)
+        term_data = dict(
+            path=term_path,                            # TODO: check if URL-safe
+            label=term_dict.get('label') or term_name,
+            sort_order=float(idx+1),
+            language=get_language(term_dict.get('language'), vocab_language),
+        )
+        for attr in OPTIONAL_ATTRS:
+            term_data[attr] = term_dict.get(attr) or None
+        terms.append(term_data)
+        if term_dict.get('children'):
+            stack.append((term_path, list(reversed(list(enumerate(term_dict['children']))))))
+
+    return dict(
+        jurisdiction=termsdata.get('jurisdiction'),
+        name=termsdata['name'].strip(),
+        label=termsdata.get('label') or termsdata['name'].strip(),
+        description=termsdata.get('description'),
+        source=termsdata.get('source'),
+        kind=termsdata.get('kind'),
+        language=vocab_language,
+        country=vocab_country,
+        terms=terms,
+    )
+
+
+def apply_terms_data(vocab, terms):
+    """
+    Upsert the parsed `terms` (list of dicts) into `vocab` by ``path`` using bulk
+    queries. Existing terms keep their ``id`` (and the relations that refer to
+    them), terms that no longer appear in `terms` are deleted.
+    Returns a tuple of counts ``(created, updated, deleted)``.
+    """
+    existing_by_path = dict((t.path, t) for t in Term.objects.filter(vocabulary=vocab))
+    now = timezone.now()
+    new_terms, changed_terms = [], []
+    for term_data in terms:
+        term = existing_by_path.pop(term_data['path'], None)
+        if term is None:
+            new_terms.append(Term(vocabulary=vocab, **term_data))
+            continue
+        changed = False
+        for attr in TERM_UPDATE_FIELDS:
+            if getattr(term, attr) != term_data[attr]:
+                setattr(term, attr, term_data[attr])
+                changed = True
+        if changed:
+            term.date_modified = now    # not set by bulk_update since no save()
+            changed_terms.append(term)
+
+    stale_ids = [t.id for t in existing_by_path.values()]
+    if stale_ids:
+        Term.objects.filter(id__in=stale_ids).delete()
+    Term.objects.bulk_update(changed_terms, TERM_UPDATE_FIELDS + ['date_modified'], batch_size=500)
+    Term.objects.bulk_create(assign_char_ids(new_terms), batch_size=500)
+    term_registry.invalidate()   # bulk queries don't send model save signals
+    return len(new_terms), len(changed_terms), len(stale_ids)
+
 
 
 class Command(BaseCommand):
     """
-    Import a controlled vocabulary from YAML data (local or from a repo link).
+    Import controlled vocabularies from YAML data (local files, directories, glob
+    patterns, repo links, or a terms manifest listing all of them).
     """
 
     def load_terms_data(self, termsdata, options):
         """
         Process the `termsdata` (dict) to create ControlledVocabulary and Terms.
+        All changes are applied in a single transaction.
         """
-        assert termsdata['type'] == 'ControlledVocabulary'
-        # vocab check
-        vocab_language = ensure_language_code(termsdata.get('language', 'en'))
+        try:
+            parsed = parse_terms_data(termsdata)
+        except ValueError as e:
+            print('ERROR: invalid vocabulary data:', e)
+            sys.exit(-7)
+
         # load jurisdiction
-        jurisdiction_name = termsdata['jurisdiction']
+        jurisdiction_name = parsed['jurisdiction']
         if 'jurisdiction' in options and options['jurisdiction']:
             jurisdiction_name = options['jurisdiction']
         try:
@@ -33,16 +243,26 @@ class Command(BaseCommand):
             print('Jurisdiction', jurisdiction_name, 'does not exist yet')
             print('Use the ./manage.py createjurisdiction command')
             sys.exit(-5)
-        # country check
-        country_raw = termsdata.get('country', None)
-        if country_raw:
-            vocab_country = pycountry.countries.lookup(country_raw).alpha_2
-        else:
-            vocab_country = None
 
-        assert juri.country.code == vocab_country, 'vocab country code differs from Jurisdiction country code'
-        # get or create vocab
-        vocab_name = termsdata['name'].strip()
+        with transaction.atomic():
+            self.load_vocabulary(juri, parsed, options)
+
+        print('DONE')
+
+        # TODO: check termsdata.get('uri') maches vocab.uri
+
+
+    def load_vocabulary(self, juri, parsed, options):
+        """
+        Get or create the vocabulary described by `parsed` in `juri` and upsert its
+        terms. The attributes of an existing vocabulary are updated with its terms.
+        """
+        # vocabularies don't have a country of their own, so it must match the jurisdiction's
+        if juri.country.code != parsed['country']:
+            print('ERROR: vocabulary', parsed['name'], 'country', parsed['country'],
+                  'differs from the country of jurisdiction', juri.name, juri.country.code)
+            sys.exit(-8)
+        vocab_name = parsed['name']
         try:
             vocab = ControlledVocabulary.objects.get(name=vocab_name, jurisdiction=juri)
         except ControlledVocabulary.DoesNotExist:
@@ -52,79 +272,30 @@ class Command(BaseCommand):
             print('Vocabulary', vocab, 'already exist. Use --overwrite to overwrite.')
             sys.exit(-6)
         if vocab and options['overwrite']:
-            vocab.label = termsdata.get('label') if termsdata.get('label') else vocab_name
-            vocab.description = termsdata.get('description')
-            vocab.source = termsdata.get('source')
-            vocab.kind = termsdata.get('kind')
+            vocab.label = parsed['label']
+            vocab.description = parsed['description']
+            vocab.source = parsed['source']
+            vocab.kind = parsed['kind']
+            vocab.language = parsed['language']
             vocab.save()
             print('Vocab', vocab, 'already exists; overwriting terms.')
-            Term.objects.filter(vocabulary=vocab).delete()
         else:
             vocab = ControlledVocabulary(
                 name=vocab_name,                       # TODO: check if URL-safe
-                label=termsdata.get('label') if termsdata.get('label') else vocab_name,
-                description=termsdata.get('description'),
-                language=vocab_language,
-                source=termsdata.get('source'),
-                kind = termsdata.get('kind'),
+                label=parsed['label'],
+                description=parsed['description'],
+                language=parsed['language'],
+                source=parsed['source'],
+                kind=parsed['kind'],
                 jurisdiction=juri,
             )
             vocab.save()
             print('Created vocab:', vocab)
 
-        print('Adding', len(termsdata['terms']), 'terms to vocab', vocab.name, '...')
-        for idxi, term_dict in enumerate(termsdata['terms']):
-            term_path = term_dict['term'].strip()
-            label = term_dict.get('label') or term_path
-            term_language_raw = term_dict.get('language', None)
-            if term_language_raw:
-                term_language = ensure_language_code(term_language_raw)
-            else:
-                term_language = vocab_language
-            term = Term(
-                path=term_path,                        # TODO: check if URL-safe
-                label=label,
-                vocabulary=vocab,
-                sort_order=float(idxi+1),
-                language=term_language,
-            )
-            OPTIONAL_ATTRS = ['definition', 'notes', 'alt_label', 'hidden_label', 'source_uri']
-            for attr in OPTIONAL_ATTRS:
-                val = term_dict.get(attr)
-                if val:
-                    setattr(term, attr, val)
-            term.save()
-
-            if 'children' in term_dict:
-                for idxj, subterm_dict in enumerate(term_dict['children']):
-                    subterm_path = term_path + '/' + subterm_dict['term'].strip()
-                    subterm_label = subterm_dict.get('label') or subterm_dict['term'].strip()
-                    subterm_language_raw = subterm_dict.get('language', None)
-                    if subterm_language_raw:
-                        subterm_language = ensure_language_code(subterm_language_raw)
-                    else:
-                        subterm_language = vocab_language
-                    subterm = Term(
-                        path=subterm_path,             # TODO: check if URL-safe
-                        label=subterm_label,
-                        vocabulary=vocab,
-                        sort_order=float(idxj+1),
-                        language=subterm_language,
-                    )
-                    OPTIONAL_ATTRS = ['definition', 'notes', 'alt_label', 'hidden_label', 'source_uri']
-                    for attr in OPTIONAL_ATTRS:
-                        val = subterm_dict.get(attr)
-                        if val:
-                            setattr(subterm, attr, val)
-                    subterm.save()
-
-                    if 'children' in subterm_dict:
-                        raise NotImplementedError('Loading deeply nexted vocabularies not supported yet.')
-
-
-        print('DONE')
-
-        # TODO: check termsdata.get('uri') maches vocab.uri
+        print('Loading', len(parsed['terms']), 'terms into vocab', vocab.name, '...')
+        created, updated, deleted = apply_terms_data(vocab, parsed['terms'])
+        print('Created', created, 'updated', updated, 'and deleted', deleted, 'terms.')
+        return vocab
 
 
 
@@ -136,28 +307,87 @@ class Command(BaseCommand):
             "--overwrite", action='store_true', help="Overwrite existing vocabulary with same name."
         )
         parser.add_argument(
-            "path", help="A local path or URL path for the vocabulary to import."
+            "--manifest", help="A YAML manifest listing the jurisdictions and vocabularies to load."
+        )
+        parser.add_argument(
+            "--workers", type=int, default=DEFAULT_WORKERS, help="Number of processes used to parse the YAML files."
+        )
+        parser.add_argument(
+            "paths", nargs='*', help="Local paths, directories, glob patterns or URLs of the vocabularies to import."
         )
 
 
     def handle(self, *args, **options):
         """
-        Import the controleld vocabulary and the terms defined in the file `path`.
+        Import the controlled vocabularies and the terms defined in the files at
+        `paths` and in the `manifest`. All vocabularies are loaded in one transaction.
         """
-        path = options['path']
-        print('Loading controlled vocabulary and terms data from', path)
-        
-        if path.startswith('http'):
-            response = requests.get(path)
-            yaml_text = response.text
-        else:
-            full_path = os.path.join('.', path)
-            print(full_path)
-            yaml_text = open(path).read()
-
-        termsdata = yaml.safe_load(yaml_text)
-        if termsdata is None:
-            print('ERROR: no data can available at', path)
+        sources = []
+        for path in options['paths']:
+            for expanded_path in expand_terms_path(path):
+                sources.append((expanded_path, options['jurisdiction']))
+        manifest_jurisdictions = []
+        if options['manifest']:
+            print('Loading terms manifest from', options['manifest'])
+            manifest_jurisdictions, manifest_sources = read_terms_manifest(options['manifest'])
+            for source, jurisdiction_name in manifest_sources:
+                sources.append((source, options['jurisdiction'] or jurisdiction_name))
+        # drop duplicate sources while keeping the order
+        sources = list(dict((source, juri_name) for source, juri_name in sources).items())
+        if not sources:
+            print('ERROR: no vocabulary paths specified')
             sys.exit(-3)
 
-        self.load_terms_data(termsdata, options)
+        # Parse all files (in parallel) before touching the DB
+        print('Parsing', len(sources), 'vocabularies using', options['workers'], 'worker(s)...')
+        results = parse_terms_sources([source for source, _ in sources], options['workers'])
+        errors = [(source, error) for source, _parsed, error in results if error]
+        for source, error in errors:
+            print('ERROR:', source + ':', error)
+        if errors:
+            sys.exit(-7)
+
+        with transaction.atomic():
+            # Resolve all jurisdictions once
+            for juri_dict in manifest_jurisdictions:
+                self.get_or_create_jurisdiction(juri_dict)
+            vocab_jurisdictions = []
+            for (source, juri_override), (_, parsed, _) in zip(sources, results):
+                vocab_jurisdictions.append(juri_override or parsed['jurisdiction'])
+            juris_by_name = Jurisdiction.objects.in_bulk(set(vocab_jurisdictions), field_name='name')
+            for jurisdiction_name in vocab_jurisdictions:
+                if jurisdiction_name not in juris_by_name:
+                    print('Jurisdiction', jurisdiction_name, 'does not exist yet')
+                    print('Use the ./manage.py createjurisdiction command')
+                    sys.exit(-5)
+
+            # Load all vocabularies
+            for jurisdiction_name, (source, parsed, _) in zip(vocab_jurisdictions, results):
+                print('Loading controlled vocabulary and terms data from', source)
+                juri = juris_by_name[jurisdiction_name]
+                self.load_vocabulary(juri, parsed, options)
+
+        print('DONE')
+
+
+    def get_or_create_jurisdiction(self, juri_dict):
+        """
+        Create the jurisdiction described in `juri_dict` if it doesn't exist yet.
+        Existing jurisdictions are not updated (see ``fab create_jurisdictions``).
+        """
+        try:
+            return Jurisdiction.objects.get(name=juri_dict['name'])
+        except Jurisdiction.DoesNotExist:
+            pass
+        juri = Jurisdiction(name=juri_dict['name'])
+        optional_attrs = ["display_name", "alt_name", "notes", "website_url"]
+        for attr in optional_attrs:
+            if juri_dict.get(attr):
+                setattr(juri, attr, juri_dict[attr])
+        if juri_dict.get('country'):
+            juri.country = ensure_country_code(juri_dict['country'])
+        if juri_dict.get('language'):
+            juri.language = ensure_language_code(juri_dict['language'])
+        juri.save()
+        print('Created jurisdiction', juri.name, '   id=', juri.id)
+        return juri
@@ -0,0 +1,360 @@
+import glob
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+
+# Histograms of the requests by route, format, and status: name -> (help, buckets)
+REQUEST_HISTOGRAMS = {
+    'roc_request_duration_seconds': (
+        'Request latency in seconds.',
+        [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]),
+    'roc_request_db_duration_seconds': (
+        'Time spent in database queries per request in seconds.',
+        [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]),
+    'roc_request_queries': (
+        'Database queries per request.',
+        [0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]),
+    'roc_response_bytes': (
+        'Response body size in bytes.',
+        [100, 1000, 10000, 100000, 1000000, 10000000]),
+}
+REQUEST_LABELS = ['route', 'format', 'status']
+
+# Counter of the cache lookups recorded using `standards.timing.record_cache_access`
+CACHE_COUNTER = 'roc_cache_requests_total'
+CACHE_COUNTER_HELP = 'Cache lookups made by requests by result (hit or miss).'
+CACHE_LABELS = ['route', 'format', 'result']
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+
+
+# STORAGE
+################################################################################
+
+MMAP_INITIAL_SIZE = 64 * 1024
+MMAP_HEADER = struct.Struct('<Q')      # number of bytes used in the file
+MMAP_KEY_LENGTH = struct.Struct('<I')
+MMAP_VALUE = struct.Struct('<d')
+
+
+def _padded_entry_size(key_bytes):
+    # the value is 8-byte aligned so it can be updated with a single write
+    size = MMAP_KEY_LENGTH.size + len(key_bytes)
+    return size + (-size % 8) + MMAP_VALUE.size
+
+
+def read_mmap_values(data):
+    """
+    Return the dict of values by key stored in `data` (the bytes of a file
+    written by ``MmapValues``).
+    """
+    values = {}
+    if len(data) < MMAP_HEADER.size:
+        return values
+    used = MMAP_HEADER.unpack_from(data, 0)[0]
+    pos = MMAP_HEADER.size
+    while pos < min(used, len(data)):
+        key_length = MMAP_KEY_LENGTH.unpack_from(data, pos)[0]
+        key_bytes = data[pos + MMAP_KEY_LENGTH.size:pos + MMAP_KEY_LENGTH.size + key_length]
+        entry_size = _padded_entry_size(key_bytes)
+        values[key_bytes.decode('utf-8')] = MMAP_VALUE.unpack_from(data, pos + entry_size - MMAP_VALUE.size)[0]
+        pos += entry_size
+    return values
+
+
+class MmapValues:
+    """
+    Float values by key in a memory-mapped file written only by this process,
+    so other processes can read them without locks. Entries (key length, key,
+    padding, value) are appended once per key and their values updated in place;
+    the header is updated after each new entry is complete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a+b')
+        size = os.fstat(self.file.fileno()).st_size
+        if size < MMAP_INITIAL_SIZE:
+            self.file.truncate(MMAP_INITIAL_SIZE)
+            size = MMAP_INITIAL_SIZE
+        self.mmap = mmap.mmap(self.file.fileno(), size)
+        self.positions = {}
+        self.used = MMAP_HEADER.unpack_from(self.mmap, 0)[0] or MMAP_HEADER.size
+        pos = MMAP_HEADER.size
+        while pos < self.used:    # values of a previous process with the same pid
+            key_length = MMAP_KEY_LENGTH.unpack_from(self.mmap, pos)[0]
+            key_bytes = self.mmap[pos + MMAP_KEY_LENGTH.size:pos + MMAP_KEY_LENGTH.size + key_length]
+            entry_size = _padded_entry_size(key_bytes)
+            self.positions[key_bytes.decode('utf-8')] = pos + entry_size - MMAP_VALUE.size
+            pos += entry_size
+
+    def inc(self, key, amount):
+        pos = self.positions.get(key)
+        if pos is None:
+            pos = self._append(key)
+        value = MMAP_VALUE.unpack_from(self.mmap, pos)[0]
+        MMAP_VALUE.pack_into(self.mmap, pos, value + amount)
+
+    def _append(self, key):
+        key_bytes = key.encode('utf-8')
+        entry_size = _padded_entry_size(key_bytes)
+        if self.used + entry_size > len(self.mmap):
+            new_size = max(2 * len(self.mmap), self.used + entry_size)
+            self.mmap.close()
+            self.file.truncate(new_size)
+            self.mmap = mmap.mmap(self.file.fileno(), new_size)
+        pos = self.used
+        MMAP_KEY_LENGTH.pack_into(self.mmap, pos, len(key_bytes))
+        self.mmap[pos + MMAP_KEY_LENGTH.size:pos + MMAP_KEY_LENGTH.size + len(key_bytes)] = key_bytes
+        value_pos = pos + entry_size - MMAP_VALUE.size
+        MMAP_VALUE.pack_into(self.mmap, value_pos, 0.0)
+        self.used += entry_size
+        MMAP_HEADER.pack_into(self.mmap, 0, self.used)
+        self.positions[key] = value_pos
+        return value_pos
+
+    def close(self):
+        self.mmap.close()
+        self.file.close()
+
+
+class MetricsStore:
+    """
+    Metric values by key for all the server's worker processes. When
+    `directory` is set, each process writes its values to its own memory-mapped
+    file ``{pid}.db`` in it, and ``collect`` sums the values of all the files.
+    The values of processes that exited are moved to the file of the collecting
+    process, so the number of files stays bounded as workers are restarted.
+    Otherwise values are kept in memory for the current process only.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pid = None
+        self.values = None
+
+    def _get_values(self):
+        # reopen after forks (e.g. gunicorn --preload) so each process has its own file
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                self.values = MmapValues(os.path.join(self.directory, '{}.db'.format(self.pid)))
+            else:
+                self.values = {}
+        return self.values
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            values = self._get_values()
+            if isinstance(values, dict):
+                values[key] = values.get(key, 0.0) + amount
+            else:
+                values.inc(key, amount)
+
+    def collect(self):
+        """
+        Return the dict of values by key summed over all the processes.
+        """
+        with self.lock:
+            values = self._get_values()
+            if isinstance(values, dict):
+                return dict(values)
+        self.merge_dead_processes()
+        totals = {}
+        for path in glob.glob(os.path.join(self.directory, '*.db')):
+            with open(path, 'rb') as dbf:
+                for key, value in read_mmap_values(dbf.read()).items():
+                    totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def close(self):
+        with self.lock:
+            if isinstance(self.values, MmapValues):
+                self.values.close()
+            self.pid = None
+            self.values = None
+
+    def merge_dead_processes(self):
+        """
+        Add the values of the files of the processes that exited to the values
+        of this process and delete the files.
+        """
+        for path in glob.glob(os.path.join(self.directory, '*.db')):
+            pid = os.path.basename(path)[:-len('.db')]
+            if not pid.isdigit() or int(pid) == self.pid or pid_exists(int(pid)):
+                continue
+            merging_path = path + '.merging'
+            try:
+                os.rename(path, merging_path)   # only one process merges each file
+            except OSError:
+                continue
+            with open(merging_path, 'rb') as dbf:
+                dead_values = read_mmap_values(dbf.read())
+            with self.lock:
+                values = self._get_values()
+                for key, value in dead_values.items():
+                    values.inc(key, value)
+            os.remove(merging_path)
+
+
+def pid_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:     # exists but owned by another user
+        return True
+    return True
+
+
+_store = None
+
+def get_metrics_store():
+    global _store
+    if _store is None or _store.directory != settings.ROCDATA_METRICS_DIR:
+        if _store is not None:
+            _store.close()
+        _store = MetricsStore(settings.ROCDATA_METRICS_DIR)
+    return _store
+
+
+
+
+# RECORDING
+################################################################################
+
+def get_metric_key(name, labels, suffix):
+    return json.dumps([name, labels, suffix])
+
+
+def observe_histogram(store, name, labels, value):
+    """
+    Add `value` to the histogram `name` with `labels`. Bucket counts are stored
+    per bucket (not cumulative) and accumulated in ``render_metrics``.
+    """
+    buckets = REQUEST_HISTOGRAMS[name][1]
+    bucket = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+    store.inc(get_metric_key(name, labels, bucket))
+    store.inc(get_metric_key(name, labels, 'sum'), value)
+
+
+def get_route_and_format(request, response):
+    match = getattr(request, 'resolver_match', None)
+    route = (match.url_name or match.view_name) if match else 'unmatched'
+    renderer = getattr(response, 'accepted_renderer', None)
+    if renderer is not None:
+        fmt = renderer.format
+    elif match and match.kwargs.get('format'):
+        fmt = match.kwargs['format']
+    else:
+        fmt = 'none'
+    return route, fmt
+
+
+def observe_request(request, response, timings):
+    """
+    Record the metrics of a request given its `response` and `timings` (a
+    ``standards.timing.RequestTimings``).
+    """
+    store = get_metrics_store()
+    route, fmt = get_route_and_format(request, response)
+    labels = [route, fmt, str(response.status_code)]
+    num_bytes = 0 if response.streaming else len(response.content)
+    observe_histogram(store, 'roc_request_duration_seconds', labels, timings.total)
+    observe_histogram(store, 'roc_request_db_duration_seconds', labels, timings.db_time)
+    observe_histogram(store, 'roc_request_queries', labels, timings.queries)
+    observe_histogram(store, 'roc_response_bytes', labels, num_bytes)
+    if timings.cache_hits:
+        store.inc(get_metric_key(CACHE_COUNTER, [route, fmt, 'hit'], 'value'), timings.cache_hits)
+    if timings.cache_misses:
+        store.inc(get_metric_key(CACHE_COUNTER, [route, fmt, 'miss'], 'value'), timings.cache_misses)
+
+
+
+
+# EXPOSITION
+################################################################################
+
+def format_labels(names, values, extra=''):
+    escaped = [v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values]
+    pairs = ['{}="{}"'.format(name, value) for name, value in zip(names, escaped)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def format_bound(bound):
+    return repr(float(bound))
+
+
+def render_metrics(values):
+    """
+    Return the metric `values` (as returned by ``MetricsStore.collect``) in the
+    Prometheus text exposition format.
+    """
+    by_metric = {}
+    for key, value in values.items():
+        name, labels, suffix = json.loads(key)
+        by_metric.setdefault(name, {}).setdefault(tuple(labels), {})[suffix] = value
+
+    lines = []
+    for name, (help_text, buckets) in REQUEST_HISTOGRAMS.items():
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} histogram'.format(name))
+        for labels, series in sorted(by_metric.get(name, {}).items()):
+            cumulative = 0
+            for i, bound in enumerate(buckets + ['+Inf']):
+                cumulative += series.get(i, 0)
+                le = 'le="{}"'.format(bound if bound == '+Inf' else format_bound(bound))
+                lines.append('{}_bucket{} {}'.format(name, format_labels(REQUEST_LABELS, labels, le),
+                                                     format_value(cumulative)))
+            lines.append('{}_sum{} {}'.format(name, format_labels(REQUEST_LABELS, labels), format_value(series.get('sum', 0))))
+            lines.append('{}_count{} {}'.format(name, format_labels(REQUEST_LABELS, labels), format_value(cumulative)))
+    lines.append('# HELP {} {}'.format(CACHE_COUNTER, CACHE_COUNTER_HELP))
+    lines.append('# TYPE {} counter'.format(CACHE_COUNTER))
+    for labels, series in sorted(by_metric.get(CACHE_COUNTER, {}).items()):
+        lines.append('{}{} {}'.format(CACHE_COUNTER, format_labels(CACHE_LABELS, labels), format_value(series['value'])))
+    return '\n'.join(lines) + '\n'
+
+
+def has_metrics_access(request):
+    """
+    Return True if the request is made by a staff user or has the header
+    ``Authorization: Bearer <settings.ROCDATA_METRICS_TOKEN>``.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    token = settings.ROCDATA_METRICS_TOKEN
+    auth = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and auth.startswith('Bearer '):
+        return hmac.compare_digest(auth[len('Bearer '):].encode('utf-8'), token.encode('utf-8'))
+    return False
+
+
+def metrics_view(request):
+    """
+    The request metrics of all worker processes in Prometheus text format.
+    """
+    if not settings.ROCDATA_METRICS:
+        raise Http404('Metrics are disabled')
+    if not has_metrics_access(request):
+        return HttpResponseForbidden('Metrics are only available to staff users and using the metrics token',
+                                     content_type='text/plain')
+    body = render_metrics(get_metrics_store().collect())
+    return HttpResponse(body, content_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,459 @@
+# Generated by Django 3.1.14 on 2026-10-19 11:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django_countries.fields
+import mptt.fields
+import standards.fields
+import standards.utils
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentCollection',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=10, prefix='CC', primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(help_text='Short unique name that appears in URIs', max_length=200)),
+                ('title', models.CharField(help_text='Collection name', max_length=200)),
+                ('description', models.TextField(blank=True, help_text='Detailed info about this collection', null=True)),
+                ('thumbnail_url', models.URLField(blank=True, help_text='External thumbnail URL this collection', max_length=512)),
+                ('language', models.CharField(blank=True, help_text='BCP47/RFC5646 codes like en, es, fr-CA', max_length=20, null=True)),
+                ('country', django_countries.fields.CountryField(blank=True, help_text='Country where content collection was produced', max_length=2, null=True)),
+                ('publication_status', models.CharField(choices=[('draft', 'Draft'), ('publicdraft', 'Public Draft'), ('published', 'Published (active)'), ('retired', 'Retired, deprecated, or superseded')], default='publicdraft', max_length=30)),
+                ('import_method', models.CharField(choices=[('manual_entry', 'Manual data entry'), ('spreadsheet_import', 'Imported from a spreadsheet of links'), ('api_created', 'Created through the API'), ('bulk_import', 'Created by a content metadata integration script'), ('kolibri_channel', 'Imported from Kolibri database'), ('studio_channel', 'Imported from Studio data'), ('khan_export', 'Imported from Khan Academy TSV data exports')], help_text='Content import method', max_length=200)),
+                ('source_domain', models.CharField(blank=True, help_text='The domain name of the content collection (e.g. khanacademy.org)', max_length=200, null=True)),
+                ('source_url', models.URLField(blank=True, help_text='The web location for this content collection', max_length=512)),
+                ('collection_id', models.CharField(blank=True, help_text='The identifier for this collection in the external content repository', max_length=100)),
+                ('version', models.CharField(blank=True, help_text='Collection version or edition', max_length=200, null=True)),
+                ('license_description', models.TextField(blank=True, help_text='Full text of the collection licensing information', null=True)),
+                ('copyright_holder', models.CharField(blank=True, help_text='Name of organization that holds the copyright to this content', max_length=200, null=True)),
+                ('notes', models.TextField(blank=True, help_text='Additional notes about the collection', null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, help_text='When the collection was added to the repository')),
+                ('date_modified', models.DateTimeField(auto_now=True, help_text='Date of last modification to collection metadata')),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentCorrelation',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='CS', primary_key=True, serialize=False, unique=True)),
+                ('title', models.CharField(help_text='The publicly visible title for this content correlation', max_length=200)),
+                ('description', models.TextField(blank=True, help_text='Detailed info about this content correlation', null=True)),
+                ('creator', models.CharField(blank=True, help_text='Person or organization that created this content correlation', max_length=200, null=True)),
+                ('publisher', models.CharField(blank=True, help_text='The name of the organization publishing the content correlation', max_length=200, null=True)),
+                ('version', models.CharField(blank=True, help_text='Content correlation versioning info', max_length=200, null=True)),
+                ('license_description', models.TextField(blank=True, help_text='Description of the licensing of this content correlation', null=True)),
+                ('copyright_holder', models.CharField(blank=True, help_text='Name of organization that holds the copyright to this content correlation', max_length=200, null=True)),
+                ('digitization_method', models.CharField(choices=[('manual_entry', 'Manual data entry'), ('spreadsheet_import', 'Imported from a content correlation spreadsheet'), ('api_created', 'Created through the API'), ('bulk_import', 'Created using a content correlations integration script'), ('human_judgments', 'Curriculum alignment judgment provided by human curriculum experts'), ('data_import', 'Curriculum alignment alignment data imported from data'), ('ka_import', 'Curriculum alignment alignment data imported from Achievement Standards Network (ASN)'), ('kolibri_import', 'Curriculum alignment data imported from Kolibri channel DB'), ('studio_import', 'Curriculum alignment data imported from Kolibri Studio DB')], help_text='Digitization method', max_length=200)),
+                ('publication_status', models.CharField(choices=[('draft', 'Draft'), ('publicdraft', 'Public Draft'), ('published', 'Published (active)'), ('retired', 'Retired, deprecated, or superseded')], default='publicdraft', max_length=30)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentNode',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=10, prefix='C', primary_key=True, serialize=False, unique=True)),
+                ('path', models.CharField(blank=True, help_text='Node path as it appears in URIs', max_length=200, null=True)),
+                ('sort_order', models.FloatField(default=1.0)),
+                ('title', models.CharField(help_text='Content node title', max_length=200)),
+                ('description', models.TextField(blank=True, help_text='Detailed description of content node')),
+                ('language', models.CharField(blank=True, help_text='BCP47/RFC5646 codes like en, es, fr-CA.', max_length=20, null=True)),
+                ('author', models.CharField(blank=True, help_text='Who created this content node?', max_length=200)),
+                ('aggregator', models.CharField(blank=True, help_text='Website or org. hosting the content collection', max_length=200)),
+                ('provider', models.CharField(blank=True, help_text='Organization that made the creation or distribution this content possible', max_length=200)),
+                ('size', models.IntegerField(blank=True, help_text='File storage size required (in bytes)', null=True)),
+                ('publication_status', models.CharField(choices=[('draft', 'Draft'), ('publicdraft', 'Public Draft'), ('published', 'Published (active)'), ('retired', 'Retired, deprecated, or superseded')], default='publicdraft', max_length=30)),
+                ('concept_keywords', models.CharField(blank=True, help_text='Free-form, comma-separated keywords for this content node', max_length=500, null=True)),
+                ('source_url', models.URLField(blank=True, help_text='The primary web location for this content node', max_length=512)),
+                ('source_domain', models.CharField(help_text='The domain name of the content source (e.g. khanacademy.org)', max_length=200)),
+                ('source_id', models.CharField(help_text='An identifier for this content item within the source domain (e.g. a database id)', max_length=100)),
+                ('content_id', models.UUIDField(blank=True, db_index=True, help_text='Content ID computed from source_domain and source_id', null=True)),
+                ('node_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='An identifier for the content node within the collection', null=True)),
+                ('license_description', models.TextField(blank=True, help_text="Full text of the node's licensing information", null=True)),
+                ('copyright_holder', models.CharField(blank=True, help_text='Name of organization that holds the copyright to this content', max_length=200, null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, help_text='When the node was added to the repository')),
+                ('date_modified', models.DateTimeField(auto_now=True, help_text='Date of last modification to node metadata')),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('lft', models.PositiveIntegerField(editable=False)),
+                ('rght', models.PositiveIntegerField(editable=False)),
+                ('tree_id', models.PositiveIntegerField(db_index=True, editable=False)),
+                ('level', models.PositiveIntegerField(editable=False)),
+                ('collection', models.ForeignKey(help_text='Content collection this node is part of', on_delete=django.db.models.deletion.CASCADE, related_name='contentnodes', to='standards.contentcollection')),
+            ],
+            options={
+                'ordering': ('sort_order',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ControlledVocabulary',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='V', primary_key=True, serialize=False, unique=True)),
+                ('kind', models.CharField(blank=True, choices=[('education_levels', 'Local education levels (local grade levels)'), ('subjects', 'Local academic subjects'), ('topic_terms', 'Global topic taxonomy terms'), ('curriculum_elements', 'Curriculum standard elements'), ('license_kinds', 'License kinds')], help_text='Vocabulary kind (e.g. education_levels)', max_length=50, null=True)),
+                ('name', models.CharField(help_text='The name used in URIs', max_length=200)),
+                ('label', models.CharField(help_text='Human-readable label', max_length=200)),
+                ('alt_label', models.CharField(blank=True, help_text='Alternative label', max_length=200, null=True)),
+                ('hidden_label', models.CharField(blank=True, help_text='Hidden label', max_length=200, null=True)),
+                ('description', models.TextField(blank=True, help_text='Explain where this vocab. is used', null=True)),
+                ('language', models.CharField(blank=True, help_text='BCP47/RFC5646 codes like en, es, fr-CA.', max_length=20, null=True)),
+                ('source', models.TextField(blank=True, help_text='Where is this vocabulary defined?', null=True)),
+                ('notes', models.TextField(blank=True, help_text='Comments and notes about this vocabulary', null=True)),
+                ('creator', models.CharField(blank=True, help_text='Person or organization that published this vocabulary', max_length=200, null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'verbose_name_plural': 'Controlled vocabularies',
+            },
+        ),
+        migrations.CreateModel(
+            name='Jurisdiction',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='J', primary_key=True, serialize=False, unique=True)),
+                ('display_name', models.CharField(help_text='Official name of the organization or government body', max_length=200)),
+                ('name', models.CharField(help_text='the name used in URIs', max_length=200, unique=True)),
+                ('country', django_countries.fields.CountryField(blank=True, help_text='Country of jurisdiction', max_length=2, null=True)),
+                ('alt_name', models.CharField(blank=True, help_text='Alternative name', max_length=200, null=True)),
+                ('language', models.CharField(blank=True, help_text='BCP47 lang codes like en, es, fr-CA', max_length=20, null=True)),
+                ('notes', models.TextField(blank=True, help_text='Public comments and notes about this jurisdiction.', null=True)),
+                ('website_url', models.URLField(blank=True, max_length=512, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StandardNode',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='S', primary_key=True, serialize=False, unique=True)),
+                ('sort_order', models.FloatField(default=1.0)),
+                ('notation', models.CharField(blank=True, help_text='A human-referenceable code for this node', max_length=200)),
+                ('list_id', models.CharField(blank=True, help_text='A character or symbol denoting the node position with a list', max_length=50)),
+                ('title', models.CharField(blank=True, help_text='An optional heading or abbreviated description', max_length=200)),
+                ('description', models.TextField(help_text='Primary text that describes this node')),
+                ('language', models.CharField(blank=True, help_text='BCP47/RFC5646 codes like en, es, fr-CA.', max_length=20, null=True)),
+                ('concept_keywords', models.CharField(blank=True, help_text='Free form, comma-separated keywords', max_length=500, null=True)),
+                ('path', models.CharField(blank=True, help_text='Full path of node. Usually ends in notation.', max_length=200, null=True)),
+                ('canonical_uri', models.URLField(blank=True, help_text='URI for the standard node used when publishing', max_length=512, null=True)),
+                ('source_uri', models.URLField(blank=True, help_text='External URI for imported standard nodes', max_length=512, null=True)),
+                ('source_id', models.CharField(blank=True, help_text='An external identifier (usually part of source_uri)', max_length=100)),
+                ('notes', models.TextField(blank=True, help_text='Additional notes and supporting text', null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, help_text='When the node was added to repository')),
+                ('date_modified', models.DateTimeField(auto_now=True, help_text='Date of last modification to node')),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('lft', models.PositiveIntegerField(editable=False)),
+                ('rght', models.PositiveIntegerField(editable=False)),
+                ('tree_id', models.PositiveIntegerField(db_index=True, editable=False)),
+                ('level', models.PositiveIntegerField(editable=False)),
+            ],
+            options={
+                'ordering': ('sort_order',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Term',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='T', primary_key=True, serialize=False, unique=True)),
+                ('path', models.CharField(help_text='Term path as it appears in URI', max_length=200)),
+                ('label', models.CharField(help_text='Human-readable label', max_length=200)),
+                ('alt_label', models.CharField(blank=True, help_text='Alternative label', max_length=200, null=True)),
+                ('hidden_label', models.CharField(blank=True, help_text='Hidden label', max_length=200, null=True)),
+                ('notation', models.CharField(blank=True, help_text='Other unique identifier for this term', max_length=200, null=True)),
+                ('definition', models.TextField(blank=True, help_text='Explain the meaning of this term', null=True)),
+                ('notes', models.TextField(blank=True, help_text='Comments and notes about the term', null=True)),
+                ('language', models.CharField(blank=True, help_text='BCP47/RFC5646 codes like en, es, fr-CA.', max_length=20, null=True)),
+                ('source_uri', models.URLField(blank=True, max_length=512, null=True)),
+                ('canonical_uri', models.URLField(blank=True, max_length=512, null=True)),
+                ('sort_order', models.FloatField(default=1.0)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('vocabulary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='standards.controlledvocabulary')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('background', models.CharField(help_text='What is your background?', max_length=200)),
+                ('jurisdiction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='userprofiles', to='standards.jurisdiction')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TermRelation',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=10, prefix='TR', primary_key=True, serialize=False, unique=True)),
+                ('target_uri', models.CharField(blank=True, max_length=500, null=True)),
+                ('kind', models.CharField(choices=[('broader', 'has parent (a broader term)'), ('narrower', 'has child (a more specific term)'), ('related', 'has related term (same vocabulary)'), ('exactMatch', 'matches exactly'), ('closeMatch', 'matches closely'), ('broadMatch', 'source is related to a subset of the target'), ('narrowMatch', 'target is related to a subset of the source'), ('relatedMatch', 'source and target are related and of similar size')], max_length=32)),
+                ('notes', models.TextField(blank=True, help_text='Additional notes about the relation')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('jurisdiction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termrelations', to='standards.jurisdiction')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='source_rels', to='standards.term')),
+                ('target', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='target_rels', to='standards.term')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StandardsDocument',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='D', primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(help_text='A short, unique name for the document, e.g. CCSS.Math', max_length=200, unique=True)),
+                ('title', models.CharField(help_text='The full title of the document', max_length=200)),
+                ('description', models.TextField(blank=True, help_text='Detailed info about this document', null=True)),
+                ('language', models.CharField(blank=True, help_text='BCP47/RFC5646 codes like en, es, fr-CA.', max_length=20, null=True)),
+                ('publisher', models.CharField(blank=True, help_text='The name of the organization publishing the document', max_length=200, null=True)),
+                ('version', models.CharField(blank=True, help_text='Document version or edition', max_length=200, null=True)),
+                ('date_valid', models.DateField(blank=True, help_text='Date when document started being valid', null=True)),
+                ('date_retired', models.DateField(blank=True, help_text='Date when document stops being valid', null=True)),
+                ('license_description', models.TextField(blank=True, help_text="Full text of the document's licensing information", null=True)),
+                ('copyright_holder', models.CharField(blank=True, help_text='Name of organization that holds the copyright to the document', max_length=200, null=True)),
+                ('digitization_method', models.CharField(choices=[('manual_entry', 'Manual data entry'), ('manual_scan', 'Manual data entry based on OCR'), ('automated_scan', 'Semi-automated structure extraction through OCR'), ('website_scrape', 'Curriculum data scraped from website'), ('hackathon_import', 'Curriculum data imported from Hackathon DB'), ('asn_import', 'Curriculum data imported from Achievement Standards Network (ASN)'), ('case_import', 'Curriculum data imported from CASE registry')], help_text='Digitization method', max_length=200)),
+                ('source_doc', models.URLField(blank=True, help_text='Where the data of this document was imported from', max_length=512)),
+                ('publication_status', models.CharField(choices=[('draft', 'Draft'), ('publicdraft', 'Public Draft'), ('published', 'Published (active)'), ('retired', 'Retired, deprecated, or superseded')], default='publicdraft', max_length=30)),
+                ('canonical_uri', models.URLField(blank=True, help_text='URI for the document used when publishing', max_length=512, null=True)),
+                ('source_uri', models.URLField(blank=True, help_text='External URI for imported document', max_length=512, null=True)),
+                ('source_id', models.CharField(blank=True, help_text='An external identifier (usually part of source_uri)', max_length=100)),
+                ('notes', models.TextField(blank=True, help_text='Additional notes about the document', null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, help_text='When the standards document was added to repository.')),
+                ('date_modified', models.DateTimeField(auto_now=True, help_text='Date of last modification to document metadata.')),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('education_levels', models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'education_levels'}, related_name='_standardsdocument_education_levels_+', to='standards.Term')),
+                ('jurisdiction', models.ForeignKey(help_text='Jurisdiction of standards document', on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='standards.jurisdiction')),
+                ('license', models.ForeignKey(default=standards.utils.get_default_license, limit_choices_to={'vocabulary__kind': 'license_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term')),
+                ('subjects', models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'subjects'}, related_name='_standardsdocument_subjects_+', to='standards.Term')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StandardsCrosswalk',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='SC', primary_key=True, serialize=False, unique=True)),
+                ('title', models.CharField(help_text='The publicly visible title for this crosswalk', max_length=200)),
+                ('description', models.TextField(blank=True, help_text='Detailed info about this crosswalk', null=True)),
+                ('creator', models.CharField(blank=True, help_text='Person or organization that created this crosswalk', max_length=200, null=True)),
+                ('publisher', models.CharField(blank=True, help_text='The name of the organization publishing the crosswalk', max_length=200, null=True)),
+                ('version', models.CharField(blank=True, help_text='Crosswalks versioning info', max_length=200, null=True)),
+                ('license_description', models.TextField(blank=True, help_text='Description of the licensing of this crosswalks', null=True)),
+                ('copyright_holder', models.CharField(blank=True, help_text='Name of organization that holds the copyright to this crosswalk', max_length=200, null=True)),
+                ('date_valid', models.DateField(blank=True, help_text='Date when crosswalk becomes approved in publishing jurisdiction', null=True)),
+                ('date_retired', models.DateField(blank=True, help_text='Date when crosswalk stops being valid in publishing jurisdiction', null=True)),
+                ('digitization_method', models.CharField(choices=[('manual_entry', 'Manual data entry'), ('spreadsheet_import', 'Imported from a standards crosswalks spreadsheet'), ('api_created', 'Created through the API'), ('bulk_import', 'Created using a crosswalks integration script'), ('human_judgments', 'Alignment judgment provided by human curriculum experts'), ('hackathon_import', 'Alignment judgment collected during October 2019 hackathon'), ('asn_import', 'Standards alignment data imported from Achievement Standards Network (ASN)'), ('case_import', 'Standards alignment data imported from CASE registry'), ('data_import', 'Standards alignment data imported from data')], help_text='Digitization method', max_length=200)),
+                ('publication_status', models.CharField(choices=[('draft', 'Draft'), ('publicdraft', 'Public Draft'), ('published', 'Published (active)'), ('retired', 'Retired, deprecated, or superseded')], default='publicdraft', max_length=30)),
+                ('education_levels', models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'education_levels'}, related_name='_standardscrosswalk_education_levels_+', to='standards.Term')),
+                ('jurisdiction', models.ForeignKey(help_text='Jurisdiction of the crosswalk', on_delete=django.db.models.deletion.CASCADE, related_name='crosswalks', to='standards.jurisdiction')),
+                ('license', models.ForeignKey(default=standards.utils.get_default_license, limit_choices_to={'vocabulary__kind': 'license_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term')),
+                ('subjects', models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'subjects'}, related_name='_standardscrosswalk_subjects_+', to='standards.Term')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StandardNodeRelation',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=9, prefix='SR', primary_key=True, serialize=False, unique=True)),
+                ('canonical_uri', models.URLField(blank=True, help_text='URI for this relation used when publishing', max_length=512, null=True)),
+                ('source_uri', models.URLField(blank=True, help_text='External URI for imported relation', max_length=512, null=True)),
+                ('notes', models.TextField(blank=True, help_text='Additional notes and supporting text', null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, help_text='When the relation was added to repository')),
+                ('date_modified', models.DateTimeField(auto_now=True, help_text='Date of last modification to relation data')),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('crosswalk', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relations', to='standards.standardscrosswalk')),
+                ('kind', models.ForeignKey(default=standards.utils.get_default_standard_node_relation_kind, limit_choices_to={'vocabulary__kind': 'standard_node_relation_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='source_rels', to='standards.standardnode')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='target_rels', to='standards.standardnode')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='standardnode',
+            name='concept_terms',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'concept_terms'}, related_name='_standardnode_concept_terms_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='standardnode',
+            name='document',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standardnodes', to='standards.standardsdocument'),
+        ),
+        migrations.AddField(
+            model_name='standardnode',
+            name='education_levels',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'education_levels'}, related_name='_standardnode_education_levels_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='standardnode',
+            name='kind',
+            field=models.ForeignKey(blank=True, limit_choices_to={'vocabulary__kind': 'curriculum_elements'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term'),
+        ),
+        migrations.AddField(
+            model_name='standardnode',
+            name='parent',
+            field=mptt.fields.TreeForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='standards.standardnode'),
+        ),
+        migrations.AddField(
+            model_name='standardnode',
+            name='subjects',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'subjects'}, related_name='_standardnode_subjects_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='controlledvocabulary',
+            name='jurisdiction',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vocabularies', to='standards.jurisdiction'),
+        ),
+        migrations.CreateModel(
+            name='ContentStandardRelation',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=10, prefix='CSR', primary_key=True, serialize=False, unique=True)),
+                ('canonical_uri', models.URLField(blank=True, help_text='URI for this relation used when publishing', max_length=512, null=True)),
+                ('source_uri', models.URLField(blank=True, help_text='External URI for imported relations', max_length=512, null=True)),
+                ('notes', models.TextField(blank=True, help_text='Additional notes and supporting text', null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, help_text='When the relation was added to the repository')),
+                ('date_modified', models.DateTimeField(auto_now=True, help_text='Date of last modification to relation data')),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('contentnode', models.ForeignKey(help_text='The content node (source)', on_delete=django.db.models.deletion.CASCADE, related_name='standards_rels', to='standards.contentnode')),
+                ('correlation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relations', to='standards.contentcorrelation')),
+                ('kind', models.ForeignKey(default=standards.utils.get_default_content_standard_relation_kind, limit_choices_to={'vocabulary__kind': 'content_standard_relation_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term')),
+                ('standardnode', models.ForeignKey(help_text='The standard node (target)', on_delete=django.db.models.deletion.CASCADE, related_name='content_rels', to='standards.standardnode')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentNodeRelation',
+            fields=[
+                ('id', standards.fields.CharIdField(blank=True, editable=False, length=10, prefix='CR', primary_key=True, serialize=False, unique=True)),
+                ('canonical_uri', models.URLField(blank=True, help_text='URI for this relation used when publishing', max_length=512, null=True)),
+                ('source_uri', models.URLField(blank=True, help_text='External URI of an imported relation', max_length=512, null=True)),
+                ('notes', models.TextField(blank=True, help_text='Additional notes and supporting text', null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, help_text='When the relation was added to repository')),
+                ('date_modified', models.DateTimeField(auto_now=True, help_text='Date of last modification to relation data')),
+                ('extra_fields', models.JSONField(blank=True, default=dict)),
+                ('jurisdiction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contentnoderels', to='standards.jurisdiction')),
+                ('kind', models.ForeignKey(blank=True, limit_choices_to={'vocabulary__kind': 'content_node_relation_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='source_rels', to='standards.contentnode')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='target_rels', to='standards.contentnode')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contentnode',
+            name='concept_terms',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'concept_terms'}, related_name='_contentnode_concept_terms_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='contentnode',
+            name='education_levels',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'education_levels'}, related_name='_contentnode_education_levels_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='contentnode',
+            name='kind',
+            field=models.ForeignKey(blank=True, limit_choices_to={'vocabulary__kind': 'contentnode_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term'),
+        ),
+        migrations.AddField(
+            model_name='contentnode',
+            name='license',
+            field=models.ForeignKey(default=standards.utils.get_default_license, limit_choices_to={'vocabulary__kind': 'license_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term'),
+        ),
+        migrations.AddField(
+            model_name='contentnode',
+            name='parent',
+            field=mptt.fields.TreeForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='standards.contentnode'),
+        ),
+        migrations.AddField(
+            model_name='contentnode',
+            name='subjects',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'subjects'}, related_name='_contentnode_subjects_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='contentcorrelation',
+            name='education_levels',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'education_levels'}, related_name='_contentcorrelation_education_levels_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='contentcorrelation',
+            name='jurisdiction',
+            field=models.ForeignKey(help_text='Jurisdiction of content correlations', on_delete=django.db.models.deletion.CASCADE, related_name='contentcorrelations', to='standards.jurisdiction'),
+        ),
+        migrations.AddField(
+            model_name='contentcorrelation',
+            name='license',
+            field=models.ForeignKey(default=standards.utils.get_default_license, limit_choices_to={'vocabulary__kind': 'license_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term'),
+        ),
+        migrations.AddField(
+            model_name='contentcorrelation',
+            name='subjects',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'subjects'}, related_name='_contentcorrelation_subjects_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='contentcollection',
+            name='education_levels',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'education_levels'}, related_name='_contentcollection_education_levels_+', to='standards.Term'),
+        ),
+        migrations.AddField(
+            model_name='contentcollection',
+            name='jurisdiction',
+            field=models.ForeignKey(help_text='Jurisdiction of this collection', on_delete=django.db.models.deletion.CASCADE, related_name='contentcollections', to='standards.jurisdiction'),
+        ),
+        migrations.AddField(
+            model_name='contentcollection',
+            name='license',
+            field=models.ForeignKey(default=standards.utils.get_default_license, limit_choices_to={'vocabulary__kind': 'license_kinds'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='standards.term'),
+        ),
+        migrations.AddField(
+            model_name='contentcollection',
+            name='subjects',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'vocabulary__kind': 'subjects'}, related_name='_contentcollection_subjects_+', to='standards.Term'),
+        ),
+        migrations.AddIndex(
+            model_name='term',
+            index=models.Index(fields=['vocabulary', 'sort_order', 'path'], name='term_vocab_sort_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='term',
+            unique_together={('vocabulary', 'path')},
+        ),
+        migrations.AddIndex(
+            model_name='standardsdocument',
+            index=models.Index(condition=models.Q(publication_status='published'), fields=['jurisdiction'], name='stddoc_published_juri_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='standardscrosswalk',
+            index=models.Index(condition=models.Q(publication_status='published'), fields=['jurisdiction'], name='crosswalk_published_juri_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='standardnode',
+            index=models.Index(fields=['document', 'sort_order'], name='standardnode_doc_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='standardnode',
+            index=models.Index(fields=['document', 'source_id'], name='standardnode_doc_source_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='standardnode',
+            constraint=models.UniqueConstraint(condition=models.Q(level=0), fields=('document', 'tree_id'), name='single_root_per_document'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='controlledvocabulary',
+            unique_together={('jurisdiction', 'name')},
+        ),
+        migrations.AddIndex(
+            model_name='contentnode',
+            index=models.Index(fields=['collection', 'sort_order'], name='contentnode_col_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentnode',
+            index=models.Index(fields=['collection', 'source_id'], name='contentnode_col_source_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='contentnode',
+            constraint=models.UniqueConstraint(condition=models.Q(level=0), fields=('collection', 'tree_id'), name='single_root_per_collection'),
+        ),
+        migrations.AddIndex(
+            model_name='contentcorrelation',
+            index=models.Index(condition=models.Q(publication_status='published'), fields=['jurisdiction'], name='correlation_published_juri_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentcollection',
+            index=models.Index(condition=models.Q(publication_status='published'), fields=['jurisdiction'], name='collection_published_juri_idx'),
+        ),
+    ]
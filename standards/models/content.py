@@ -3,12 +3,14 @@ from django.db.models import BooleanField
 from django.db.models import CharField
 from django.db.models import DateTimeField
 from django.db.models import FloatField
+from django.db.models import Index
 from django.db.models import ForeignKey
 from django.db.models import IntegerField
 from django.db.models import JSONField
 from django.db.models import Manager
 from django.db.models import ManyToManyField
 from django.db.models import Model
+from django.db.models import Prefetch
 from django.db.models import SET_NULL
 from django.db.models import TextField
 from django.db.models import URLField
@@ -97,6 +99,16 @@ class ContentCollection(Model):
 
     objects = ContentCollectionManager()
 
+    class Meta:
+        # Partial index for the published-only lookups of exports and snapshots
+        indexes = [
+            Index(
+                name="collection_published_juri_idx",
+                fields=["jurisdiction"],
+                condition=Q(publication_status=PUBLICATION_STATUSES.published),
+            )
+        ]
+
     def __str__(self):
         return "{} ({})".format(self.name, self.id)
 
@@ -124,7 +136,9 @@ class ContentNodeManager(Manager):
             "collection",
             "parent",
             "kind",
-            "children",
+            # only one level of children: a plain "children" lookup would use this
+            # manager again and prefetch the whole subtree, one batch per level
+            Prefetch("children", queryset=ContentNode._tree_manager.select_related("collection__jurisdiction").order_by("sort_order")),
             "subjects",
             "education_levels",
             "concept_terms",
@@ -195,6 +209,10 @@ class ContentNode(MPTTModel):
                 condition=Q(level=0),
             )
         ]
+        indexes = [
+            Index(fields=["collection", "sort_order"], name="contentnode_col_sort_idx"),
+            Index(fields=["collection", "source_id"], name="contentnode_col_source_idx"),
+        ]
         ordering = ('sort_order', )
 
     class MPTTMeta:
@@ -223,6 +241,14 @@ class ContentNode(MPTTModel):
 
 
 
+class ContentNodeRelationManager(Manager):
+    def get_queryset(self):
+        return super(ContentNodeRelationManager, self).get_queryset().select_related(
+            "jurisdiction",
+            "source__collection__jurisdiction",
+            "target__collection__jurisdiction",
+        )
+
 class ContentNodeRelation(Model):
     """
     A relation between two ``ContentNode`` s.
@@ -247,6 +273,8 @@ class ContentNodeRelation(Model):
     date_modified = DateTimeField(auto_now=True, help_text="Date of last modification to relation data")
     extra_fields = JSONField(default=dict, blank=True)  # for data extensibility
 
+    objects = ContentNodeRelationManager()
+
     def __str__(self):
         return str(self.source) + '--' + str(self.kind) + '-->' + str(self.target)
 
@@ -312,6 +340,16 @@ class ContentCorrelation(Model):
     digitization_method = CharField(max_length=200, choices=CONTENT_CORRELATION_DIGITIZATION_METHODS, help_text="Digitization method")
     publication_status = CharField(max_length=30, choices=PUBLICATION_STATUSES, default=PUBLICATION_STATUSES.publicdraft)
 
+    class Meta:
+        # Partial index for the published-only lookups of exports and snapshots
+        indexes = [
+            Index(
+                name="correlation_published_juri_idx",
+                fields=["jurisdiction"],
+                condition=Q(publication_status=PUBLICATION_STATUSES.published),
+            )
+        ]
+
     def __str__(self):
         return "{} ({})".format(self.title, self.id)
 
@@ -325,6 +363,14 @@ class ContentCorrelation(Model):
 
 
 
+class ContentStandardRelationManager(Manager):
+    def get_queryset(self):
+        return super(ContentStandardRelationManager, self).get_queryset().select_related(
+            "correlation__jurisdiction",
+            "contentnode__collection__jurisdiction",
+            "standardnode__document__jurisdiction",
+        )
+
 class ContentStandardRelation(Model):
     """
     Describes an association between a content node and a standard node that
@@ -352,6 +398,8 @@ class ContentStandardRelation(Model):
     date_modified = DateTimeField(auto_now=True, help_text="Date of last modification to relation data")
     extra_fields = JSONField(default=dict, blank=True)  # for data extensibility
 
+    objects = ContentStandardRelationManager()
+
     def __str__(self):
         return str(self.contentnode) + '--' + str(self.kind) + '-->' + str(self.standardnode)
 
@@ -3,11 +3,13 @@ from django.db.models import CharField
 from django.db.models import DateField
 from django.db.models import DateTimeField
 from django.db.models import FloatField
+from django.db.models import Index
 from django.db.models import ForeignKey
 from django.db.models import JSONField
 from django.db.models import Manager
 from django.db.models import ManyToManyField
 from django.db.models import Model
+from django.db.models import Prefetch
 from django.db.models import SET_NULL
 from django.db.models import TextField
 from django.db.models import URLField
@@ -91,6 +93,16 @@ class StandardsDocument(Model):
     date_modified = DateTimeField(auto_now=True, help_text="Date of last modification to document metadata.")
     extra_fields = JSONField(default=dict, blank=True)  # for data extensibility
 
+    class Meta:
+        # Partial index for the published-only lookups of exports and snapshots
+        indexes = [
+            Index(
+                name="stddoc_published_juri_idx",
+                fields=["jurisdiction"],
+                condition=Q(publication_status=PUBLICATION_STATUSES.published),
+            )
+        ]
+
     def __str__(self):
         return "{} ({})".format(self.title, self.id)
 
@@ -118,7 +130,9 @@ class StandardNodeManager(Manager):
             "document",
             "parent",
             "kind",
-            "children",
+            # only one level of children: a plain "children" lookup would use this
+            # manager again and prefetch the whole subtree, one batch per level
+            Prefetch("children", queryset=StandardNode._tree_manager.select_related("document__jurisdiction").order_by("sort_order")),
             "subjects",
             "education_levels",
             "concept_terms",
@@ -177,6 +191,10 @@ class StandardNode(MPTTModel):
                 condition=Q(level=0),
             )
         ]
+        indexes = [
+            Index(fields=["document", "sort_order"], name="standardnode_doc_sort_idx"),
+            Index(fields=["document", "source_id"], name="standardnode_doc_source_idx"),
+        ]
         ordering = ('sort_order', )
 
     class MPTTMeta:
@@ -260,6 +278,15 @@ class StandardsCrosswalk(Model):
     digitization_method = CharField(max_length=200, choices=CROSSWALK_DIGITIZATION_METHODS, help_text="Digitization method")
     publication_status = CharField(max_length=30, choices=PUBLICATION_STATUSES, default=PUBLICATION_STATUSES.publicdraft)
 
+    class Meta:
+        # Partial index for the published-only lookups of exports and snapshots
+        indexes = [
+            Index(
+                name="crosswalk_published_juri_idx",
+                fields=["jurisdiction"],
+                condition=Q(publication_status=PUBLICATION_STATUSES.published),
+            )
+        ]
 
     def __str__(self):
         return "{} ({})".format(self.title, self.id)
@@ -273,6 +300,14 @@ class StandardsCrosswalk(Model):
 
 
 
+class StandardNodeRelationManager(Manager):
+    def get_queryset(self):
+        return super(StandardNodeRelationManager, self).get_queryset().select_related(
+            "crosswalk__jurisdiction",
+            "source__document__jurisdiction",
+            "target__document__jurisdiction",
+        )
+
 class StandardNodeRelation(Model):
     """
     A relation between two ``StandardNode`` s, which is part of the standards
@@ -300,6 +335,8 @@ class StandardNodeRelation(Model):
     date_modified = DateTimeField(auto_now=True, help_text="Date of last modification to relation data")
     extra_fields = JSONField(default=dict, blank=True)  # for data extensibility
 
+    objects = StandardNodeRelationManager()
+
     def __str__(self):
         return str(self.source) + '--' + str(self.kind) + '-->' + str(self.target)
 
@@ -2,6 +2,7 @@ from django.db.models import CASCADE
 from django.db.models import CharField
 from django.db.models import DateTimeField
 from django.db.models import FloatField
+from django.db.models import Index
 from django.db.models import ForeignKey
 from django.db.models import JSONField
 from django.db.models import Manager
@@ -92,6 +93,10 @@ class TermModelManager(Manager):
         return super(TermModelManager, self).get_queryset().select_related("vocabulary", "vocabulary__jurisdiction")
 
     def get_by_natural_key(self, jurisdiction_name, vocabulary_name, path):
+        from standards.registry import term_registry   # the registry imports the models
+        record = term_registry.get_term(jurisdiction_name, vocabulary_name, path)
+        if record is not None:
+            return record.to_model()
         return self.get(
             vocabulary__jurisdiction__name=jurisdiction_name,
             vocabulary__name=vocabulary_name,
@@ -133,6 +138,9 @@ class Term(Model):
 
     class Meta:
         unique_together = [['vocabulary', 'path']]
+        indexes = [
+            Index(fields=['vocabulary', 'sort_order', 'path'], name='term_vocab_sort_idx'),
+        ]
 
     def natural_key(self):
         return (self.vocabulary.jurisdiction.name, self.vocabulary.name, self.path)
@@ -150,16 +158,22 @@ class Term(Model):
         return self.get_absolute_url()
 
     def get_parent(self):
+        from standards.registry import term_registry   # the registry imports the models
         if '/' not in self.path:
             return None
         else:
             path_list = self.path.split('/')
             parent_path = '/'.join(path_list[:-1])
+            record = term_registry.get_term_by_id(self.id) if self.id else None
+            if record is not None and record.path == self.path:
+                if record.parent is None or record.parent.path != parent_path:
+                    raise Term.DoesNotExist('Term matching query does not exist.')
+                return record.parent.to_model()
             parent = Term.objects.get(path=parent_path, vocabulary=self.vocabulary)
             return parent
 
     def get_descendants(self):
-        return Term.objects.filter(path__startswith=self.path)
+        return Term.objects.filter(vocabulary=self.vocabulary, path__startswith=self.path + '/')
 
 
 
@@ -180,6 +194,10 @@ TERM_REL_KINDS = Choices(
     ('relatedMatch', 'source and target are related and of similar size'),
 )
 
+class TermRelationManager(Manager):
+    def get_queryset(self):
+        return super(TermRelationManager, self).get_queryset().select_related("jurisdiction")
+
 class TermRelation(Model):
     """
     A relation between two Terms (``source`` and ``target``) or a source Term
@@ -203,6 +221,7 @@ class TermRelation(Model):
     date_modified = DateTimeField(auto_now=True)
     extra_fields = JSONField(default=dict, blank=True)  # for data extensibility
 
+    objects = TermRelationManager()
 
     def __str__(self):
         target_str = self.target_uri if self.target_uri else str(self.target)
@@ -0,0 +1,144 @@
+import contextlib
+import logging
+import re
+import sys
+
+from django.conf import settings
+from django.db import connections
+
+from standards.slowqueries import get_query_context
+
+
+logger = logging.getLogger(__name__)
+
+# Values of settings.ROCDATA_NPLUSONE
+NPLUSONE_OFF = 'off'
+NPLUSONE_WARN = 'warn'
+NPLUSONE_RAISE = 'raise'
+
+
+class NPlusOneError(Exception):
+    """
+    Raised when the same query is repeated more than the threshold (in raise mode).
+    """
+
+
+
+
+# QUERY TEMPLATES
+################################################################################
+
+_string_literal_re = re.compile(r"'(?:[^']|'')*'")
+_number_literal_re = re.compile(r'(?<![\w".])-?\d+(?:\.\d+)?\b')
+_placeholder_re = re.compile(r'%s|\?')
+_in_list_re = re.compile(r'\bIN \((?:\?, )*\?\)', re.IGNORECASE)
+_whitespace_re = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """
+    Return the template of the query `sql` with the literals and the parameter
+    placeholders replaced by ``?`` and ``IN`` lists collapsed to ``IN (...)``.
+    """
+    sql = _string_literal_re.sub('?', sql)
+    sql = _number_literal_re.sub('?', sql)
+    sql = _placeholder_re.sub('?', sql)
+    sql = _in_list_re.sub('IN (...)', sql)
+    return _whitespace_re.sub(' ', sql).strip()
+
+
+
+
+# DETECTOR
+################################################################################
+
+class NPlusOneDetector:
+    """
+    Database execute wrapper that counts the SELECT queries by template and call
+    site (the serializer field being evaluated and the innermost project frame).
+    A query template repeated more than `threshold` times from the same call site
+    is reported by ``get_offenders``.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = {}    # (template, field, site) -> number of queries
+        self.examples = {}  # (template, field, site) -> first sql
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            template = normalize_sql(sql)
+            _view, field, stack = get_query_context(sys._getframe(1))
+            key = (template, field, stack[0] if stack else None)
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.examples.setdefault(key, sql)
+        return execute(sql, params, many, context)
+
+    def get_offenders(self):
+        """
+        Return the list of ``(count, template, field, site)`` of the repeated
+        queries, most repeated first.
+        """
+        offenders = [(count,) + key for key, count in self.counts.items() if count > self.threshold]
+        return sorted(offenders, key=lambda offender: offender[0], reverse=True)
+
+    def get_report(self, label):
+        lines = ['N+1 queries in {}:'.format(label)]
+        for count, template, field, site in self.get_offenders():
+            lines.append('  {} x {}'.format(count, template))
+            lines.append('      field {} at {}'.format(field or '(none)', site or '(unknown)'))
+        return '\n'.join(lines)
+
+    def check(self, label, action=NPLUSONE_RAISE):
+        """
+        Raise ``NPlusOneError`` (or log a warning) if there were repeated queries.
+        """
+        if not self.get_offenders():
+            return
+        report = self.get_report(label)
+        if action == NPLUSONE_RAISE:
+            raise NPlusOneError(report)
+        logger.warning(report)
+
+
+@contextlib.contextmanager
+def detect_n_plus_one(label='block', threshold=None, action=NPLUSONE_RAISE):
+    """
+    Check the queries made in the ``with`` block for N+1 patterns, e.g.
+
+        with detect_n_plus_one('vocabulary full', threshold=5):
+            serializer.data
+    """
+    if threshold is None:
+        threshold = settings.ROCDATA_NPLUSONE_THRESHOLD
+    detector = NPlusOneDetector(threshold)
+    with contextlib.ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(detector))
+        yield detector
+    detector.check(label, action=action)
+
+
+
+
+# MIDDLEWARE
+################################################################################
+
+class NPlusOneMiddleware:
+    """
+    Check each request for N+1 query patterns when ``settings.ROCDATA_NPLUSONE``
+    is ``warn`` (log a warning) or ``raise`` (raise ``NPlusOneError``, used in
+    the tests). Enabled by default in DEBUG mode.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        action = settings.ROCDATA_NPLUSONE
+        if action == NPLUSONE_OFF:
+            return self.get_response(request)
+        label = '{} {}'.format(request.method, request.get_full_path())
+        with detect_n_plus_one(label, action=action):
+            response = self.get_response(request)
+        return response
@@ -0,0 +1,255 @@
+import cProfile
+import datetime
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+# Request header and query parameter that ask for a profile of the request,
+# with the value ``pstats`` (or ``1``) for cProfile or ``speedscope`` for samples
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+PROFILE_FORMATS = {
+    '1': 'pstats',
+    'pstats': 'pstats',
+    'speedscope': 'speedscope',
+}
+PROFILE_EXTENSIONS = {
+    'pstats': '.prof',
+    'speedscope': '.speedscope.json',
+}
+
+# Profiles written by this module start with this (other files in the directory,
+# e.g. silk profiles in DEBUG mode, are not counted in the retention cap)
+PROFILE_FILE_PREFIX = 'request-'
+RATE_LIMIT_MARKER = '.last-request-profile'
+
+_rate_limit_lock = threading.Lock()
+
+
+
+
+# PROFILERS
+################################################################################
+
+class SamplingProfiler:
+    """
+    Sample the stack of the current thread every `interval` seconds from a
+    background thread and write the samples in the speedscope file format
+    (https://www.speedscope.app/), weighted by the time between samples.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.frames = []            # speedscope frames
+        self.frame_indices = {}     # (name, file, line) -> index in frames
+        self.samples = []
+        self.weights = []
+        self.stopped = threading.Event()
+        self.thread = None
+        self.start = None
+        self.end = None
+
+    def enable(self):
+        self.start = self.last = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def disable(self):
+        self.stopped.set()
+        self.thread.join()
+        self.end = time.perf_counter()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self.samples.append(self._get_stack(frame))
+                self.weights.append(now - self.last)
+            self.last = now
+
+    def _get_stack(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self.frame_indices.get(key)
+            if index is None:
+                index = self.frame_indices[key] = len(self.frames)
+                self.frames.append(dict(name=key[0], file=key[1], line=key[2]))
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()     # speedscope stacks go from the root to the leaf
+        return stack
+
+    def dump(self, path, name):
+        data = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.end - self.start,
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+            'name': name,
+            'exporter': 'rocdata',
+        }
+        with open(path, 'w') as outf:
+            json.dump(data, outf)
+
+
+class CProfileProfiler:
+    """
+    Deterministic profile of the current thread saved as a ``pstats`` file
+    (view it with ``python -m pstats`` or snakeviz).
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def enable(self):
+        self.profile.enable()
+
+    def disable(self):
+        self.profile.disable()
+
+    def dump(self, path, name):
+        self.profile.dump_stats(path)
+
+
+
+
+# ACCESS CONTROL
+################################################################################
+
+def get_requested_profile_format(request):
+    """
+    Return the profile format asked for by `request`, or None.
+    """
+    value = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    if not value:
+        return None
+    return PROFILE_FORMATS.get(value.lower())
+
+
+def is_profiling_allowed(request):
+    """
+    Only staff users can profile requests, authenticated using an API token
+    (``Authorization: Token <key>``) or the admin session.
+    """
+    try:
+        auth = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    user = auth[0] if auth is not None else getattr(request, 'user', None)
+    return user is not None and user.is_active and user.is_staff
+
+
+def acquire_profiling_slot(directory):
+    """
+    Return True if no request was profiled in the last
+    ``settings.ROCDATA_PROFILING_INTERVAL_SECONDS`` (by any process using the
+    same `directory`), and start a new interval.
+    """
+    marker = os.path.join(directory, RATE_LIMIT_MARKER)
+    with _rate_limit_lock:
+        try:
+            if time.time() - os.path.getmtime(marker) < settings.ROCDATA_PROFILING_INTERVAL_SECONDS:
+                return False
+        except FileNotFoundError:
+            pass
+        with open(marker, 'w'):
+            pass
+        return True
+
+
+
+
+# PROFILE FILES
+################################################################################
+
+def get_profile_filename(request, fmt):
+    path = re.sub(r'[^\w.\-]+', '_', request.path.strip('/'))[:80] or 'root'
+    timestamp = datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    return '{}{}-{}-{}-{}{}'.format(
+        PROFILE_FILE_PREFIX, timestamp, request.method, path, os.getpid(), PROFILE_EXTENSIONS[fmt])
+
+
+def list_profiles(directory):
+    """
+    Return the paths of the request profiles in `directory`, oldest first.
+    """
+    paths = glob.glob(os.path.join(directory, PROFILE_FILE_PREFIX + '*'))
+    return sorted(paths, key=os.path.basename)
+
+
+def prune_profiles(directory, max_files):
+    """
+    Delete the oldest request profiles in `directory` to keep at most `max_files`.
+    """
+    paths = list_profiles(directory)
+    for path in paths[:max(len(paths) - max_files, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass    # removed by another process
+
+
+
+
+# MIDDLEWARE
+################################################################################
+
+class ProfilingMiddleware:
+    """
+    Profile a single request on demand: staff users add the header
+    ``X-Profile: pstats`` (or ``speedscope``), or the query parameter
+    ``?profile=pstats``, and the profile of the request is saved in
+    ``settings.ROCDATA_PROFILES_DIR``. The name of the file is returned in the
+    ``X-Profile`` response header. At most one request is profiled every
+    ``settings.ROCDATA_PROFILING_INTERVAL_SECONDS`` and only the newest
+    ``settings.ROCDATA_PROFILES_MAX_FILES`` profiles are kept.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        fmt = get_requested_profile_format(request)
+        if fmt is None or not is_profiling_allowed(request):
+            return self.get_response(request)
+        directory = settings.ROCDATA_PROFILES_DIR
+        os.makedirs(directory, exist_ok=True)
+        if not acquire_profiling_slot(directory):
+            response = self.get_response(request)
+            response['X-Profile'] = 'rate-limited'
+            return response
+
+        if fmt == 'speedscope':
+            profiler = SamplingProfiler(settings.ROCDATA_PROFILING_SAMPLE_INTERVAL)
+        else:
+            profiler = CProfileProfiler()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        filename = get_profile_filename(request, fmt)
+        profiler.dump(os.path.join(directory, filename), '{} {}'.format(request.method, request.get_full_path()))
+        prune_profiles(directory, settings.ROCDATA_PROFILES_MAX_FILES)
+        response['X-Profile'] = filename
+        return response
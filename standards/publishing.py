@@ -1,14 +1,49 @@
-from urllib.parse import urlparse
+from collections import namedtuple
+
 from django.conf import settings
 
 
+# Immutable publishing context with the precomputed `base_url` (the URL prefix
+# for the absolute paths of ROC data), see ``settings.ROCDATA_PUBLISHING_CONTEXTS``
+PublishingContext = namedtuple('PublishingContext', ['name', 'scheme', 'netloc', 'path_prefix', 'base_url'])
+
+# Attribute of the (Django) request where its publishing context is kept
+REQUEST_ATTRIBUTE = 'rocdata_publishing_context'
+
+
+def make_publishing_context(name, scheme, netloc, path_prefix):
+    base_url = scheme + '://' + netloc + path_prefix
+    return PublishingContext(name, scheme, netloc, path_prefix, base_url)
+
 
 def get_publishing_context(request=None):
+    """
+    Return the ``PublishingContext`` selected by ``settings.ROCDATA_PUBLISHING_CONTEXT``.
+    The ``default`` context uses the scheme and host of `request`, and is
+    resolved once per request (it is saved on the request).
+    """
     context_name = settings.ROCDATA_PUBLISHING_CONTEXT
-    publishing_context = settings.ROCDATA_PUBLISHING_CONTEXTS[context_name]
     if context_name == 'default' and request is None:
         raise ValueError('Default publishing requires request info')
-    elif context_name == 'default':
-        publishing_context['scheme'] = request.scheme
-        publishing_context['netloc'] = request.get_host()
+    if request is None:
+        pc = settings.ROCDATA_PUBLISHING_CONTEXTS[context_name]
+        return make_publishing_context(context_name, pc['scheme'], pc['netloc'], pc['path_prefix'])
+    django_request = getattr(request, '_request', request)    # DRF requests wrap Django requests
+    publishing_context = getattr(django_request, REQUEST_ATTRIBUTE, None)
+    if publishing_context is None or publishing_context.name != context_name:
+        pc = settings.ROCDATA_PUBLISHING_CONTEXTS[context_name]
+        if context_name == 'default':
+            publishing_context = make_publishing_context(
+                context_name, request.scheme, request.get_host(), pc['path_prefix'])
+        else:
+            publishing_context = make_publishing_context(
+                context_name, pc['scheme'], pc['netloc'], pc['path_prefix'])
+        setattr(django_request, REQUEST_ATTRIBUTE, publishing_context)
     return publishing_context
+
+
+def get_base_url(publishing_context):
+    """
+    Return the URL prefix for the absolute paths of ROC data (e.g. ``/Ghana``).
+    """
+    return publishing_context.base_url
@@ -0,0 +1,285 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+
+from standards.models import Jurisdiction, ControlledVocabulary, Term
+
+
+# Term fields kept in ``TermRecord`` (in the order of its constructor arguments)
+TERM_RECORD_FIELDS = ['id', 'vocabulary_id', 'path', 'label', 'language', 'sort_order']
+
+
+
+
+# TERM REGISTRY RECORDS
+################################################################################
+
+class VocabularyRecord:
+    """
+    Compact in-memory copy of a ``ControlledVocabulary`` and its path trie.
+    """
+    __slots__ = ('id', 'jurisdiction_name', 'name', 'label', 'kind', 'language',
+                 'uri', 'trie', 'terms_by_path')
+
+    def __init__(self, id, jurisdiction_name, name, label, kind, language):
+        self.id = id
+        self.jurisdiction_name = jurisdiction_name
+        self.name = name
+        self.label = label
+        self.kind = kind
+        self.language = language
+        self.uri = '/' + jurisdiction_name + '/terms/' + name
+        self.trie = PathTrieNode()
+        self.terms_by_path = {}
+
+    def __repr__(self):
+        return '<VocabularyRecord {}:{}>'.format(self.jurisdiction_name, self.name)
+
+
+class TermRecord:
+    """
+    Compact in-memory copy of a ``Term``; `parent` and `children` are records.
+    """
+    __slots__ = ('id', 'vocabulary', 'path', 'label', 'language', 'sort_order',
+                 'uri', 'parent', 'children')
+
+    def __init__(self, id, vocabulary, path, label, language, sort_order):
+        self.id = id
+        self.vocabulary = vocabulary
+        self.path = path
+        self.label = label
+        self.language = language
+        self.sort_order = sort_order
+        self.uri = vocabulary.uri + '/' + path
+        self.parent = None
+        self.children = []
+
+    def __repr__(self):
+        return '<TermRecord {}>'.format(self.uri)
+
+    def to_model(self):
+        """
+        Return a ``Term`` instance with the fields of this record loaded (the
+        other fields are deferred, and loaded from the DB on first access).
+        """
+        values = [self.id, self.vocabulary.id, self.path, self.label, self.language, self.sort_order]
+        return Term.from_db(None, TERM_RECORD_FIELDS, values)
+
+
+class PathTrieNode:
+    """
+    Node of the trie of the ``/``-separated term paths within a vocabulary.
+    The `term` is None for path prefixes that don't correspond to a term.
+    """
+    __slots__ = ('term', 'children')
+
+    def __init__(self):
+        self.term = None
+        self.children = {}
+
+    def insert(self, path, term):
+        node = self
+        for step in path.split('/'):
+            node = node.children.setdefault(step, PathTrieNode())
+        node.term = term
+        return node
+
+    def iter_terms(self):
+        """
+        Yield the terms under this trie node in depth-first order.
+        """
+        stack = list(reversed(list(self.children.values())))
+        while stack:
+            node = stack.pop()
+            if node.term is not None:
+                yield node.term
+            stack.extend(reversed(list(node.children.values())))
+
+
+
+
+# TERM REGISTRY
+################################################################################
+
+def get_terms_fingerprint():
+    """
+    Return a summary of the vocabularies and terms tables (row counts and last
+    modification dates) that changes whenever rows are added, deleted, or saved,
+    obtained using a single query (on the DB the terms are read from). The query
+    scans the tables (PostgreSQL doesn't keep row counts), so it is run at most
+    every ``settings.ROCDATA_TERM_REGISTRY_CHECK_SECONDS`` by ``TermRegistry``.
+    """
+    connection = connections[router.db_for_read(Term)]
+    tables = [connection.ops.quote_name(model._meta.db_table) for model in [Term, ControlledVocabulary]]
+    juri_table = connection.ops.quote_name(Jurisdiction._meta.db_table)
+    columns = []
+    for table in tables:
+        columns.append('(SELECT COUNT(*) FROM {})'.format(table))
+        columns.append('(SELECT MAX(date_modified) FROM {})'.format(table))
+    columns.append('(SELECT COUNT(*) FROM {})'.format(juri_table))
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(columns))
+        return tuple(cursor.fetchone())
+
+
+class TermRegistry:
+    """
+    Process-level read-only registry of all controlled vocabularies and terms
+    used to answer hierarchy, URI, and label lookups without DB queries.
+    The registry is (re)loaded lazily, using three queries, whenever its
+    ``generation`` is behind the counter bumped by the model save signals.
+    Bulk operations (``bulk_create``, ``QuerySet.update``) don't send signals,
+    so code that uses them must call ``invalidate()`` afterwards.
+    Changes made by other processes (other server workers, management commands)
+    are detected at the first lookup of a request, which compares the
+    ``get_terms_fingerprint`` of the DB to the one of the loaded data, at most
+    every ``settings.ROCDATA_TERM_REGISTRY_CHECK_SECONDS``.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self._loaded_generation = None
+        self._fingerprint = None
+        self._checked_at = None             # time.monotonic() of the last check
+        self._lock = threading.Lock()
+        self._local = threading.local()     # check_pending: compare the fingerprint
+        self._vocabs_by_key = {}
+        self._vocabs_by_id = {}
+        self._terms_by_id = {}
+
+    def invalidate(self, using=None, **kwargs):
+        """
+        Reload the registry on the next lookup. In a transaction, the registry is
+        invalidated right away (for the code making the changes) and again when
+        the transaction commits, so that data loaded in the meantime (e.g. by
+        another thread, which doesn't see the changes yet) is not kept. Data
+        loaded before a rollback is replaced at the next request, since its
+        fingerprint no longer matches the DB.
+        """
+        self._bump_generation()
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(self._bump_generation, using=using)
+
+    def _bump_generation(self):
+        self.generation += 1
+
+    def check_database(self, **kwargs):
+        """
+        Compare the registry to the DB on the next lookup (in this thread) if
+        it wasn't compared in the last ``settings.ROCDATA_TERM_REGISTRY_CHECK_SECONDS``.
+        Called at the start of each request.
+        """
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= settings.ROCDATA_TERM_REGISTRY_CHECK_SECONDS:
+            self._checked_at = now
+            self._local.check_pending = True
+
+    def ensure_loaded(self):
+        if getattr(self._local, 'check_pending', False):
+            self._local.check_pending = False
+            if get_terms_fingerprint() != self._fingerprint:
+                self._bump_generation()
+        if self._loaded_generation == self.generation:
+            return
+        with self._lock:
+            generation = self.generation
+            if self._loaded_generation != generation:
+                self._load()
+                self._loaded_generation = generation
+
+    def _load(self):
+        # taken before the data, so changes made while loading cause a reload
+        fingerprint = get_terms_fingerprint()
+        vocabs_by_key, vocabs_by_id, terms_by_id = {}, {}, {}
+        vocab_values = ControlledVocabulary.objects.values_list(
+            'id', 'jurisdiction__name', 'name', 'label', 'kind', 'language')
+        for vocab_tuple in vocab_values:
+            vocab = VocabularyRecord(*vocab_tuple)
+            vocabs_by_key[(vocab.jurisdiction_name, vocab.name)] = vocab
+            vocabs_by_id[vocab.id] = vocab
+        term_values = Term.objects.values_list(*TERM_RECORD_FIELDS).order_by('vocabulary_id', 'sort_order', 'path')
+        for term_id, vocab_id, path, label, language, sort_order in term_values:
+            vocab = vocabs_by_id[vocab_id]
+            term = TermRecord(term_id, vocab, path, label, language, sort_order)
+            vocab.terms_by_path[path] = term
+            vocab.trie.insert(path, term)
+            terms_by_id[term_id] = term
+        # link each term to its closest ancestor term in the trie
+        for vocab in vocabs_by_id.values():
+            stack = [(None, vocab.trie)]
+            while stack:
+                parent, node = stack.pop()
+                if node.term is not None:
+                    node.term.parent = parent
+                    if parent is not None:
+                        parent.children.append(node.term)
+                    parent = node.term
+                stack.extend((parent, child) for child in reversed(list(node.children.values())))
+            for term in vocab.terms_by_path.values():
+                term.children.sort(key=lambda child: child.sort_order)
+        self._vocabs_by_key, self._vocabs_by_id = vocabs_by_key, vocabs_by_id
+        self._terms_by_id = terms_by_id
+        self._fingerprint = fingerprint
+
+    # Lookups
+    def get_vocabulary(self, jurisdiction_name, name):
+        self.ensure_loaded()
+        return self._vocabs_by_key.get((jurisdiction_name, name))
+
+    def get_vocabulary_by_id(self, vocab_id):
+        self.ensure_loaded()
+        return self._vocabs_by_id.get(vocab_id)
+
+    def get_term(self, jurisdiction_name, vocabulary_name, path):
+        vocab = self.get_vocabulary(jurisdiction_name, vocabulary_name)
+        if vocab is None:
+            return None
+        return vocab.terms_by_path.get(path)
+
+    def get_term_by_id(self, term_id):
+        self.ensure_loaded()
+        return self._terms_by_id.get(term_id)
+
+    def get_uri(self, term_id):
+        term = self.get_term_by_id(term_id)
+        return term.uri if term else None
+
+    def get_label(self, term_id):
+        term = self.get_term_by_id(term_id)
+        return term.label if term else None
+
+    # Hierarchy
+    def get_parent(self, term_id):
+        term = self.get_term_by_id(term_id)
+        return term.parent if term else None
+
+    def get_children(self, term_id):
+        term = self.get_term_by_id(term_id)
+        return list(term.children) if term else []
+
+    def get_descendants(self, term_id):
+        term = self.get_term_by_id(term_id)
+        if term is None:
+            return []
+        node = term.vocabulary.trie
+        for step in term.path.split('/'):
+            node = node.children[step]
+        return list(node.iter_terms())
+
+
+term_registry = TermRegistry()
+
+
+def connect_term_registry_signals():
+    """
+    Invalidate the term registry when vocabularies and terms are saved, and
+    compare it to the DB at the start of requests. Called by ``StandardsConfig``.
+    """
+    for model in [Jurisdiction, ControlledVocabulary, Term]:
+        post_save.connect(term_registry.invalidate, sender=model, dispatch_uid='term_registry_save_' + model.__name__)
+        post_delete.connect(term_registry.invalidate, sender=model, dispatch_uid='term_registry_delete_' + model.__name__)
+    request_started.connect(term_registry.check_database, dispatch_uid='term_registry_check_database')
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+import datetime
 import functools
 
 from django_countries.serializers import CountryFieldMixin
@@ -12,6 +14,7 @@ from standards.models import StandardsDocument, StandardNode
 from standards.models import StandardsCrosswalk, StandardNodeRelation
 from standards.models import ContentCollection, ContentNode, ContentNodeRelation
 from standards.models import ContentCorrelation, ContentStandardRelation
+from standards.registry import term_registry
 
 
 
@@ -39,6 +42,9 @@ class MultiKeyHyperlinkField(serializers.HyperlinkedRelatedField):
             (urlparam, self.rgetattr(obj, attrpath))
             for urlparam, attrpath in self.url_kwargs_mapping.items()
         )
+        return self.reverse_url(view_name, url_kwargs, request)
+
+    def reverse_url(self, view_name, url_kwargs, request):
         if "format" in request.GET:
             # This is a hack to avoid ?format=api appended to URIs by preserve_builtin_query_params
             # github.com/encode/django-rest-framework/blob/master/rest_framework/reverse.py#L12-L29
@@ -71,6 +77,10 @@ class JurisdictionScopedHyperlinkField(MultiKeyHyperlinkField):
         "id": "pk",
     }
 
+    def get_queryset(self):
+        # the choices in HTML forms need the jurisdiction name for their URLs
+        return super().get_queryset().select_related("jurisdiction")
+
 
 # JURISDICTION
 
@@ -113,6 +123,23 @@ class TermHyperlinkField(MultiKeyHyperlinkField):
         "path": "path",
     }
 
+    def use_pk_only_optimization(self):
+        # terms URLs are rendered from the term registry so the id is enough
+        return True
+
+    def get_url(self, obj, view_name, request, format):
+        term = term_registry.get_term_by_id(obj.pk)
+        if term is None:
+            # not in registry (e.g. created by a bulk operation), so load from DB
+            obj = obj if isinstance(obj, Term) else Term.objects.get(pk=obj.pk)
+            return super().get_url(obj, view_name, request, format)
+        url_kwargs = {
+            "jurisdiction_name": term.vocabulary.jurisdiction_name,
+            "vocabulary_name": term.vocabulary.name,
+            "path": term.path,
+        }
+        return self.reverse_url(view_name, url_kwargs, request)
+
 class TermRelationHyperlinkField(JurisdictionScopedHyperlinkField):
     # /<jurisdiction_name>/termrels/<pk>
     view_name = 'jurisdiction-termrelation-detail'
@@ -213,10 +240,42 @@ class ContentStandardRelationHyperlinkField(MultiKeyHyperlinkField):
 
 
 
+# TREE SUBTREES
+################################################################################
+
+class SubtreeSerializerMixin:
+    """
+    Serialization of a subtree loaded with ``mptt.utils.get_cached_trees`` for
+    the ``/subtree`` actions. The ``children`` of the nodes above the level
+    ``context['subtree_max_level']`` are nested, and those of the nodes at that
+    level are hyperlinks (of type ``children_link_field_class``). In flat mode
+    (``context['subtree_flat']``) the children are replaced by the ``parent_id``.
+    """
+    children_link_field_class = None
+
+    def get_children(self, obj):
+        if self.context.get('subtree_flat'):
+            return None
+        if obj.level < self.context['subtree_max_level'] or obj.is_leaf_node():
+            return [type(self)(node, context=self.context).data for node in obj.get_children()]
+        links = self.children_link_field_class(many=True)
+        links.bind('children', self)
+        return links.to_representation(obj.children.all())
+
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        if self.context.get('subtree_flat'):
+            del data['children']
+            data['parent_id'] = obj.parent_id
+        return data
+
+
+
+
 # JURISDICTION
 ################################################################################
 
-class JurisdictionSerializer(serializers.ModelSerializer):
+class JurisdictionSerializer(CountryFieldMixin, serializers.ModelSerializer):
     vocabularies = ControlledVocabularyHyperlinkField(many=True, required=False)
     documents = serializers.SerializerMethodField()
     crosswalks = serializers.SerializerMethodField()
@@ -312,6 +371,55 @@ class ControlledVocabularySerializer(serializers.ModelSerializer):
         ]
 
 
+FULL_VOCABULARY_TERM_FIELDS = [
+    "uri",
+    "path",
+    "label",
+    "alt_label",
+    "hidden_label",
+    "notation",
+    "definition",
+    "notes",
+    "language",
+    "sort_order",
+    "date_created",
+    "date_modified",
+    "extra_fields",
+]
+
+class FullControlledVocabularySerializer(ControlledVocabularySerializer):
+    """
+    Vocabulary serialization that includes the data of all its terms, nested by
+    path hierarchy and ordered by ``sort_order``, obtained using a single query.
+    """
+    terms = serializers.SerializerMethodField()
+
+    def get_terms(self, obj):
+        values_fields = [f for f in FULL_VOCABULARY_TERM_FIELDS if f != "uri"]
+        term_values = obj.terms.order_by('sort_order', 'path').values(*values_fields)
+        datetime_field = serializers.DateTimeField()
+        term_datas = OrderedDict()
+        for term_value in term_values:
+            term_data = OrderedDict(uri=obj.uri + '/' + term_value['path'])
+            for field in values_fields:
+                value = term_value[field]
+                if isinstance(value, datetime.datetime):
+                    value = datetime_field.to_representation(value)
+                term_data[field] = value
+            term_data['children'] = []
+            term_datas[term_data['path']] = term_data
+        # attach each term to its closest ancestor term (or the top level)
+        top_terms = []
+        for path, term_data in term_datas.items():
+            parent_data = None
+            while '/' in path and parent_data is None:
+                path = path.rsplit('/', 1)[0]
+                parent_data = term_datas.get(path)
+            siblings = parent_data['children'] if parent_data else top_terms
+            siblings.append(term_data)
+        return top_terms
+
+
 class TermSerializer(serializers.ModelSerializer):
     jurisdiction = JurisdictionHyperlinkField(source='vocabulary.jurisdiction', required=True)
     vocabulary = ControlledVocabularyHyperlinkField(required=True)
@@ -388,9 +496,11 @@ class FullStandardsDocumentSerializer(StandardsDocumentSerializer):
     children = serializers.SerializerMethodField()
 
     def get_children(self, obj):
+        # the /full action passes the whole tree loaded using get_cached_trees
+        root = self.context.get('tree_root') or obj.root
         return [
             FullStandardNodeSerializer(node, context=self.context).data
-            for node in obj.root.children.all()
+            for node in root.get_children()
         ]
 
 
@@ -422,10 +532,18 @@ class FullStandardNodeSerializer(StandardNodeSerializer):
     def get_children(self, obj):
         return [
             FullStandardNodeSerializer(node, context=self.context).data
-            for node in obj.children.all()
+            for node in obj.get_children()
         ]
 
 
+class SubtreeStandardNodeSerializer(SubtreeSerializerMixin, StandardNodeSerializer):
+    """
+    Depth-limited variant of ``StandardNodeSerializer`` for the ``/subtree`` action.
+    """
+    children = serializers.SerializerMethodField()
+    children_link_field_class = StandardNodeHyperlinkField
+
+
 # STANDARDS CROSSWALKS
 ################################################################################
 
@@ -481,9 +599,11 @@ class FullContentCollectionSerializer(ContentCollectionSerializer):
     children = serializers.SerializerMethodField()
 
     def get_children(self, obj):
+        # the /full action passes the whole tree loaded using get_cached_trees
+        root = self.context.get('tree_root') or obj.root
         return [
             FullContentNodeSerializer(node, context=self.context).data
-            for node in obj.root.children.all()
+            for node in root.get_children()
         ]
 
 
@@ -516,10 +636,18 @@ class FullContentNodeSerializer(ContentNodeSerializer):
     def get_children(self, obj):
         return [
             FullContentNodeSerializer(node, context=self.context).data
-            for node in obj.children.all()
+            for node in obj.get_children()
         ]
 
 
+class SubtreeContentNodeSerializer(SubtreeSerializerMixin, ContentNodeSerializer):
+    """
+    Depth-limited variant of ``ContentNodeSerializer`` for the ``/subtree`` action.
+    """
+    children = serializers.SerializerMethodField()
+    children_link_field_class = ContentNodeHyperlinkField
+
+
 class ContentNodeRelationSerializer(serializers.ModelSerializer):
     jurisdiction = JurisdictionHyperlinkField(required=True)
     source = ContentNodeHyperlinkField(style={'base_template': 'input.html'})
@@ -0,0 +1,184 @@
+import zlib
+
+from standards.models import ControlledVocabulary, Term, TermRelation
+
+
+
+
+# SKOS TRIPLES
+################################################################################
+
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+SKOS = 'http://www.w3.org/2004/02/skos/core#'
+DCTERMS = 'http://purl.org/dc/terms/'
+
+RDF_PREFIXES = [
+    ('rdf', 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'),
+    ('skos', SKOS),
+    ('dcterms', DCTERMS),
+]
+
+SKOS_TERM_LITERALS = [
+    # (Term field, predicate)
+    ('label', SKOS + 'prefLabel'),
+    ('alt_label', SKOS + 'altLabel'),
+    ('hidden_label', SKOS + 'hiddenLabel'),
+    ('notation', SKOS + 'notation'),
+    ('definition', SKOS + 'definition'),
+    ('notes', SKOS + 'note'),
+]
+
+# Number of rows fetched per query by the ``iterator()`` of each queryset
+DUMP_CHUNK_SIZE = 2000
+
+
+class Literal(str):
+    """
+    A literal node with an optional language tag (other ``str`` nodes are IRIs).
+    """
+    def __new__(cls, value, language=None):
+        literal = super().__new__(cls, value)
+        literal.language = language
+        return literal
+
+
+def iter_skos_triples(base_url, jurisdiction_name=None):
+    """
+    Generate ``(subject, predicate, object)`` triples that describe vocabularies
+    as ``skos:ConceptScheme`` s, terms as ``skos:Concept`` s, and term relations
+    as SKOS semantic relations (within-vocabulary) and mapping relations.
+    All the data is read using chunked ``iterator()`` queries of plain values, so
+    memory use does not depend on the number of terms (apart from one vocabulary's paths).
+    """
+    vocabs = ControlledVocabulary.objects.all()
+    terms = Term.objects.all()
+    termrels = TermRelation.objects.all()
+    if jurisdiction_name:
+        vocabs = vocabs.filter(jurisdiction__name=jurisdiction_name)
+        terms = terms.filter(vocabulary__jurisdiction__name=jurisdiction_name)
+        termrels = termrels.filter(jurisdiction__name=jurisdiction_name)
+
+    # Vocabularies
+    vocab_values = vocabs.order_by('jurisdiction__name', 'name').values_list(
+        'jurisdiction__name', 'name', 'label', 'description', 'language')
+    for juri_name, name, label, description, language in vocab_values.iterator(DUMP_CHUNK_SIZE):
+        vocab_iri = base_url + '/' + juri_name + '/terms/' + name
+        yield (vocab_iri, RDF_TYPE, SKOS + 'ConceptScheme')
+        yield (vocab_iri, SKOS + 'prefLabel', Literal(label, language))
+        if description:
+            yield (vocab_iri, DCTERMS + 'description', Literal(description, language))
+
+    # Terms
+    literal_fields = [field for field, predicate in SKOS_TERM_LITERALS]
+    term_values = terms.order_by('vocabulary_id', 'path').values_list(
+        'vocabulary_id', 'vocabulary__jurisdiction__name', 'vocabulary__name', 'path', 'language',
+        *literal_fields)
+    current_vocab_id, vocab_paths = None, set()
+    for vocab_id, juri_name, vocab_name, path, language, *literals in term_values.iterator(DUMP_CHUNK_SIZE):
+        if vocab_id != current_vocab_id:
+            current_vocab_id, vocab_paths = vocab_id, set()
+        vocab_iri = base_url + '/' + juri_name + '/terms/' + vocab_name
+        term_iri = vocab_iri + '/' + path
+        yield (term_iri, RDF_TYPE, SKOS + 'Concept')
+        yield (term_iri, SKOS + 'inScheme', vocab_iri)
+        for (field, predicate), value in zip(SKOS_TERM_LITERALS, literals):
+            if value:
+                lang = None if field == 'notation' else language
+                yield (term_iri, predicate, Literal(value, lang))
+        # ancestors sort before descendants, so the closest ancestor term was seen
+        parent_path = path
+        while '/' in parent_path:
+            parent_path = parent_path.rsplit('/', 1)[0]
+            if parent_path in vocab_paths:
+                parent_iri = vocab_iri + '/' + parent_path
+                yield (term_iri, SKOS + 'broader', parent_iri)
+                yield (parent_iri, SKOS + 'narrower', term_iri)
+                break
+        else:
+            yield (term_iri, SKOS + 'topConceptOf', vocab_iri)
+            yield (vocab_iri, SKOS + 'hasTopConcept', term_iri)
+        vocab_paths.add(path)
+
+    # Term relations
+    termrel_values = termrels.order_by('id').values_list(
+        'source__vocabulary__jurisdiction__name', 'source__vocabulary__name', 'source__path',
+        'kind',
+        'target__vocabulary__jurisdiction__name', 'target__vocabulary__name', 'target__path',
+        'target_uri')
+    for termrel_tuple in termrel_values.iterator(DUMP_CHUNK_SIZE):
+        src_juri, src_vocab, src_path, kind, tgt_juri, tgt_vocab, tgt_path, target_uri = termrel_tuple
+        source_iri = base_url + '/' + src_juri + '/terms/' + src_vocab + '/' + src_path
+        if tgt_path is not None:
+            target_iri = base_url + '/' + tgt_juri + '/terms/' + tgt_vocab + '/' + tgt_path
+        elif target_uri:
+            target_iri = target_uri
+        else:
+            continue
+        yield (source_iri, SKOS + kind, target_iri)
+
+
+
+
+# SERIALIZATION
+################################################################################
+
+IRI_ESCAPES = dict((ord(ch), '%{:02X}'.format(ord(ch))) for ch in ' <>"{}|^`\\')
+LITERAL_ESCAPES = {ord('\\'): '\\\\', ord('"'): '\\"', ord('\n'): '\\n', ord('\r'): '\\r'}
+
+
+def format_node(node, prefixes=None):
+    """
+    Return the N-Triples (or Turtle if `prefixes` are given) form of `node`.
+    """
+    if isinstance(node, Literal):
+        formatted = '"' + node.translate(LITERAL_ESCAPES) + '"'
+        if node.language:
+            formatted += '@' + node.language
+        return formatted
+    if prefixes:
+        for prefix, namespace in prefixes:
+            if node.startswith(namespace) and node[len(namespace):].isalnum():
+                return prefix + ':' + node[len(namespace):]
+    return '<' + node.translate(IRI_ESCAPES) + '>'
+
+
+def iter_rdf_lines(triples, rdf_format='nt'):
+    """
+    Serialize `triples` as lines of N-Triples (``nt``) or Turtle (``ttl``).
+    Turtle output uses one statement per line with prefixed names.
+    """
+    prefixes = None
+    if rdf_format == 'ttl':
+        prefixes = RDF_PREFIXES
+        for prefix, namespace in prefixes:
+            yield '@prefix {}: <{}> .\n'.format(prefix, namespace)
+    elif rdf_format != 'nt':
+        raise ValueError('unsupported RDF format ' + rdf_format)
+    for subject, predicate, obj in triples:
+        yield ' '.join([
+            format_node(subject, prefixes),
+            format_node(predicate, prefixes),
+            format_node(obj, prefixes),
+            '.\n',
+        ])
+
+
+def iter_chunks(lines, chunk_size=64*1024, gzip=False):
+    """
+    Join `lines` into UTF-8 encoded chunks of about `chunk_size` bytes and gzip
+    compress them on the fly when `gzip` is True.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None   # wbits=31 means gzip
+    buffer, buffer_len = [], 0
+    for line in lines:
+        buffer.append(line)
+        buffer_len += len(line)
+        if buffer_len >= chunk_size:
+            chunk = ''.join(buffer).encode('utf-8')
+            buffer, buffer_len = [], 0
+            yield compressor.compress(chunk) if compressor else chunk
+    chunk = ''.join(buffer).encode('utf-8')
+    if compressor:
+        yield compressor.compress(chunk) + compressor.flush()
+    elif chunk:
+        yield chunk
@@ -0,0 +1,182 @@
+import contextlib
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import random
+import sys
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework.fields import Field
+from rest_framework.views import APIView
+
+
+logger = logging.getLogger(__name__)
+
+# Number of project code frames kept in the stack of each slow query
+SLOW_QUERY_STACK_DEPTH = 10
+
+# Modules whose frames are left out of the stacks (the execute wrappers)
+SLOW_QUERY_SKIP_FILES = ('standards/slowqueries.py', 'standards/timing.py',
+                         'standards/nplusone.py', 'standards/dbrouters.py')
+
+_logger_lock = threading.Lock()
+_handler = None
+
+
+
+
+# RECORDING
+################################################################################
+
+def get_slow_query_logger():
+    """
+    Return the logger that writes to the rotating JSON lines log at
+    ``settings.ROCDATA_SLOW_QUERY_LOG`` (the handler is created on first use).
+    """
+    global _handler
+    path = os.path.abspath(settings.ROCDATA_SLOW_QUERY_LOG)
+    with _logger_lock:
+        if _handler is None or _handler.baseFilename != path:
+            if _handler is not None:
+                logger.removeHandler(_handler)
+                _handler.close()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=settings.ROCDATA_SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=settings.ROCDATA_SLOW_QUERY_LOG_BACKUPS, delay=True)
+            _handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(_handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
+
+
+def get_query_context(frame):
+    """
+    Walk the stack from `frame` and return the tuple ``(view, field, stack)``:
+    the viewset and action, the innermost serializer field being evaluated
+    (as ``SerializerName.field_name``), and the project code frames.
+    """
+    view, field, stack = None, None, []
+    while frame is not None:
+        # type() rather than isinstance() so lazy objects (request.user) aren't evaluated
+        obj = frame.f_locals.get('self')
+        obj_type = type(obj)
+        if field is None and issubclass(obj_type, Field) and obj.field_name:
+            field = '{}.{}'.format(type(obj.parent).__name__, obj.field_name)
+        elif view is None and issubclass(obj_type, APIView):
+            view = '{}.{}'.format(type(obj).__name__, getattr(obj, 'action', None) or frame.f_code.co_name)
+        filename = frame.f_code.co_filename
+        if filename.startswith(settings.BASE_DIR) and 'site-packages' not in filename \
+                and not filename.endswith(SLOW_QUERY_SKIP_FILES) and len(stack) < SLOW_QUERY_STACK_DEPTH:
+            stack.append('{}:{} in {}'.format(
+                os.path.relpath(filename, settings.BASE_DIR), frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+    return view, field, stack
+
+
+@contextlib.contextmanager
+def without_execute_wrappers(connection):
+    """
+    Run the queries of the block on `connection` without its execute wrappers
+    (so they are not timed, counted, or recorded as slow queries).
+    """
+    execute_wrappers = connection.execute_wrappers
+    connection.execute_wrappers = []
+    try:
+        yield
+    finally:
+        connection.execute_wrappers = execute_wrappers
+
+
+def explain_query(connection, sql, params):
+    """
+    Return the query plan of the SELECT query `sql` as a list of strings. The
+    EXPLAIN runs in a savepoint, so if it fails the transaction can continue.
+    """
+    with without_execute_wrappers(connection), transaction.atomic(using=connection.alias, savepoint=True):
+        with connection.cursor() as cursor:
+            cursor.execute(connection.ops.explain_query_prefix() + ' ' + sql, params)
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+
+
+def record_slow_query(sql, params, many, context, duration, path=None):
+    """
+    Write the successful slow query `sql` that took `duration` seconds to the
+    slow query log, with its `params`, the calling view, serializer field, and
+    stack, and its EXPLAIN output. Only ``settings.ROCDATA_SLOW_QUERY_SAMPLE_RATE`` of the
+    slow queries are recorded.
+    """
+    if random.random() >= settings.ROCDATA_SLOW_QUERY_SAMPLE_RATE:
+        return
+    connection = context['connection']
+    view, field, stack = get_query_context(sys._getframe(1))
+    entry = dict(
+        time=datetime.datetime.utcnow().isoformat() + 'Z',
+        duration_ms=round(duration * 1000, 1),
+        database=connection.alias,
+        path=path,
+        view=view,
+        field=field,
+        sql=sql,
+        params=[repr(param) for param in params] if params and not many else None,
+        stack=stack,
+        explain=None,
+    )
+    if not many and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        try:
+            entry['explain'] = explain_query(connection, sql, params)
+        except (DatabaseError, connection.Database.Error) as e:
+            entry['explain'] = ['EXPLAIN failed: ' + str(e)]
+    get_slow_query_logger().info(json.dumps(entry))
+
+
+
+
+# REPORT
+################################################################################
+
+def read_slow_queries(limit=1000):
+    """
+    Return the last `limit` slow queries in the log (including the rotated
+    files), newest first.
+    """
+    path = settings.ROCDATA_SLOW_QUERY_LOG
+    paths = [path] + ['{}.{}'.format(path, i) for i in range(1, settings.ROCDATA_SLOW_QUERY_LOG_BACKUPS + 1)]
+    entries = []
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path) as logf:
+            lines = logf.readlines()
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue    # partially written line
+            if len(entries) >= limit:
+                return entries
+    return entries
+
+
+def summarize_slow_queries(entries):
+    """
+    Group the slow query `entries` by SQL and return the list of summaries
+    (count, max and mean duration, and the latest entry) slowest first.
+    """
+    by_sql = {}
+    for entry in entries:
+        summary = by_sql.get(entry['sql'])
+        if summary is None:
+            by_sql[entry['sql']] = summary = dict(sql=entry['sql'], count=0, total_ms=0.0, max_ms=0.0, latest=entry)
+        summary['count'] += 1
+        summary['total_ms'] += entry['duration_ms']
+        summary['max_ms'] = max(summary['max_ms'], entry['duration_ms'])
+    summaries = list(by_sql.values())
+    for summary in summaries:
+        summary['mean_ms'] = summary['total_ms'] / summary['count']
+    return sorted(summaries, key=lambda summary: summary['max_ms'], reverse=True)
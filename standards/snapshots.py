@@ -0,0 +1,223 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+from standards.models import Jurisdiction, ControlledVocabulary, Term, TermRelation
+from standards.models import StandardsDocument, StandardNode
+from standards.models import StandardsCrosswalk, StandardNodeRelation
+from standards.models import ContentCollection, ContentNode
+from standards.models import ContentCorrelation, ContentStandardRelation
+from standards.models.standards import PUBLICATION_STATUSES
+
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE blobs (
+    path TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    etag TEXT NOT NULL,
+    body BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Number of rendered endpoints inserted per executemany call
+SNAPSHOT_INSERT_BATCH_SIZE = 500
+
+
+
+
+# EXPORT
+################################################################################
+
+def iter_published_paths():
+    """
+    Yield the paths of the JSON endpoints for all the published data: the
+    jurisdictions, vocabularies, terms, and term relations, and the published
+    documents, crosswalks, content collections, and content correlations, along
+    with their standard nodes, content nodes, and relations.
+    """
+    published = PUBLICATION_STATUSES.published
+
+    def uris(queryset, uri_fmt, *fields):
+        for values in queryset.values_list(*fields).order_by().iterator():
+            yield uri_fmt.format(*values)
+
+    yield from uris(Jurisdiction.objects.all(), "/{}.json", "name")
+    vocabs = ControlledVocabulary.objects.all()
+    yield from uris(vocabs, "/{}/terms/{}.json", "jurisdiction__name", "name")
+    yield from uris(vocabs, "/{}/terms/{}/full.json", "jurisdiction__name", "name")
+    yield from uris(Term.objects.all(), "/{}/terms/{}/{}.json",
+        "vocabulary__jurisdiction__name", "vocabulary__name", "path")
+    yield from uris(TermRelation.objects.all(), "/{}/termrels/{}.json", "jurisdiction__name", "id")
+    #
+    documents = StandardsDocument.objects.filter(publication_status=published)
+    yield from uris(documents, "/{}/documents/{}.json", "jurisdiction__name", "id")
+    yield from uris(documents, "/{}/documents/{}/full.json", "jurisdiction__name", "id")
+    yield from uris(StandardNode.objects.filter(document__in=documents),
+        "/{}/standardnodes/{}.json", "document__jurisdiction__name", "id")
+    crosswalks = StandardsCrosswalk.objects.filter(publication_status=published)
+    yield from uris(crosswalks, "/{}/standardscrosswalks/{}.json", "jurisdiction__name", "id")
+    yield from uris(StandardNodeRelation.objects.filter(crosswalk__in=crosswalks),
+        "/{}/standardnoderels/{}.json", "crosswalk__jurisdiction__name", "id")
+    #
+    collections = ContentCollection.objects.filter(publication_status=published)
+    yield from uris(collections, "/{}/contentcollections/{}.json", "jurisdiction__name", "id")
+    yield from uris(collections, "/{}/contentcollections/{}/full.json", "jurisdiction__name", "id")
+    yield from uris(ContentNode.objects.filter(collection__in=collections),
+        "/{}/contentnodes/{}.json", "collection__jurisdiction__name", "id")
+    correlations = ContentCorrelation.objects.filter(publication_status=published)
+    yield from uris(correlations, "/{}/contentcorrelations/{}.json", "jurisdiction__name", "id")
+    yield from uris(ContentStandardRelation.objects.filter(correlation__in=correlations),
+        "/{}/contentstandardrels/{}.json", "correlation__jurisdiction__name", "id")
+
+
+def render_path(request_factory, path):
+    """
+    Render the API endpoint at `path` without going through the middleware.
+    """
+    request = request_factory.get(path)
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def export_snapshot(output_path, host, scheme='https'):
+    """
+    Render all the published JSON endpoints using the host `host` and store
+    them gzip-compressed in a new SQLite database, then atomically replace the
+    file at `output_path`. Returns the number of endpoints exported.
+    """
+    tmp_path = output_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    request_factory = RequestFactory(HTTP_HOST=host, secure=(scheme == 'https'))
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.executescript(SNAPSHOT_SCHEMA)
+        rows, count = [], 0
+        for path in iter_published_paths():
+            response = render_path(request_factory, path)
+            if response.status_code != 200:
+                raise ValueError('Failed to render {} (status {})'.format(path, response.status_code))
+            etag = quote_etag(hashlib.md5(response.content).hexdigest())
+            body = gzip.compress(response.content, mtime=0)
+            rows.append((path, response['Content-Type'], etag, body))
+            if len(rows) >= SNAPSHOT_INSERT_BATCH_SIZE:
+                conn.executemany('INSERT INTO blobs VALUES (?, ?, ?, ?)', rows)
+                count, rows = count + len(rows), []
+        conn.executemany('INSERT INTO blobs VALUES (?, ?, ?, ?)', rows)
+        count += len(rows)
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('created', str(int(time.time()))),
+            ('host', host),
+            ('scheme', scheme),
+        ])
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    os.replace(tmp_path, output_path)
+    return count
+
+
+
+
+# SERVING
+################################################################################
+
+class SnapshotReader:
+    """
+    Read-only access to a snapshot database opened with ``immutable=1`` (no
+    locking) and memory-mapped, so all workers share its pages in the OS page
+    cache. The file is reopened when it's replaced by a new release.
+    """
+    # How often to check if the snapshot file was replaced (in seconds)
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, path, mmap_size=256*1024*1024):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+
+    def _connect(self):
+        uri = 'file:{}?mode=ro&immutable=1'.format(os.path.abspath(self.path))
+        conn = sqlite3.connect(uri, uri=True)
+        conn.execute('PRAGMA mmap_size={}'.format(int(self.mmap_size)))
+        return conn
+
+    def get_connection(self):
+        local = self._local
+        now = time.monotonic()
+        if getattr(local, 'conn', None) is None or now - local.checked > self.CHECK_INTERVAL:
+            inode = os.stat(self.path).st_ino
+            if getattr(local, 'conn', None) is None or inode != local.inode:
+                if getattr(local, 'conn', None) is not None:
+                    local.conn.close()
+                local.conn, local.inode = self._connect(), inode
+            local.checked = now
+        return local.conn
+
+    def get(self, path):
+        """
+        Return the tuple ``(content_type, etag, gzipped_body)`` for `path` or None.
+        """
+        return self.get_connection().execute(
+            'SELECT content_type, etag, body FROM blobs WHERE path = ?', (path,)
+        ).fetchone()
+
+
+class SnapshotMiddleware:
+    """
+    Serve GET requests for JSON endpoints from the snapshot database at
+    ``settings.ROCDATA_SNAPSHOT_PATH`` without touching the primary database.
+    Paths not in the snapshot (drafts, HTML pages, etc.) are handled normally.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.reader = SnapshotReader(settings.ROCDATA_SNAPSHOT_PATH)
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and not request.GET:
+            response = self.get_snapshot_response(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def get_snapshot_response(self, request):
+        path = request.path
+        if not path.endswith('.json'):
+            if 'application/json' not in request.META.get('HTTP_ACCEPT', ''):
+                return None
+            path += '.json'
+        row = self.reader.get(path)
+        if row is None:
+            return None
+        content_type, etag, body = row
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = HttpResponse(body, content_type=content_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(body), content_type=content_type)
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        return response
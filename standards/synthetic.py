@@ -0,0 +1,265 @@
+import random
+import time
+import uuid
+
+from django.db import transaction
+
+from standards.fields import assign_char_ids
+from standards.models import Jurisdiction, ControlledVocabulary, Term, TermRelation
+from standards.models import StandardsDocument, StandardNode
+from standards.models import StandardsCrosswalk, StandardNodeRelation
+from standards.models import ContentCollection, ContentNode, ContentNodeRelation
+from standards.models import ContentCorrelation, ContentStandardRelation
+from standards.models.standards import PUBLICATION_STATUSES
+from standards.models.terms import SPECIAL_VOCABULARY_KINDS, TERM_REL_KINDS
+
+
+# Number of rows per bulk_create query
+SYNTHETIC_BATCH_SIZE = 1000
+
+SYNTHETIC_COUNTRIES = ['GH', 'KE', 'ZA', 'IN', 'BR', 'MX', 'US', 'CA', 'GB', 'FR']
+
+SYNTHETIC_WORDS = [
+    'analyse', 'apply', 'area', 'compare', 'concept', 'construct', 'data',
+    'describe', 'energy', 'equation', 'evaluate', 'evidence', 'explain',
+    'expression', 'force', 'fraction', 'function', 'graph', 'identify',
+    'interpret', 'language', 'learners', 'map', 'matter', 'measure', 'model',
+    'number', 'pattern', 'plant', 'problem', 'reading', 'reason', 'shape',
+    'solve', 'sound', 'story', 'system', 'text', 'time', 'understand',
+    'use', 'volume', 'water', 'writing',
+]
+
+
+
+
+# TEXT AND TREES
+################################################################################
+
+def make_text(rng, num_words):
+    return ' '.join(rng.choice(SYNTHETIC_WORDS) for i in range(num_words)).capitalize()
+
+
+class TreeShape:
+    """
+    The structure of a random tree with `num_nodes` nodes (including the root)
+    of depth at most `depth`, with the MPTT fields, sort order, and notation
+    (like ``2.1.3``) of each node. Nodes are numbered in breadth-first order and
+    ``order`` lists them in depth-first order, which is the insertion order that
+    guarantees parents are created before their children.
+    """
+
+    def __init__(self, rng, num_nodes, depth):
+        # branching factor such that `depth` levels can hold all the nodes
+        branching = max(1, round((num_nodes - 1) ** (1.0 / max(depth, 1))))
+        children, levels = [[]], [0]
+        parent = 0
+        while len(levels) < num_nodes:
+            if parent == len(levels):
+                parent = 0   # all the levels are full, so add more children
+            if levels[parent] < depth:
+                num_children = rng.randint(max(1, branching // 2), branching + branching // 2)
+                for i in range(min(num_children, num_nodes - len(levels))):
+                    children[parent].append(len(levels))
+                    children.append([])
+                    levels.append(levels[parent] + 1)
+            parent += 1
+        self.levels = levels
+        self.parents = [None] * num_nodes
+        self.sort_orders = [1.0] * num_nodes
+        self.notations = [''] * num_nodes
+        self.lfts = [0] * num_nodes
+        self.rghts = [0] * num_nodes
+        self.order = []
+        counter = 1
+        stack = [(0, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                self.rghts[node] = counter
+                counter += 1
+                continue
+            self.lfts[node] = counter
+            counter += 1
+            self.order.append(node)
+            stack.append((node, True))
+            for position in reversed(range(len(children[node]))):
+                child = children[node][position]
+                self.parents[child] = node
+                self.sort_orders[child] = float(position + 1)
+                prefix = self.notations[node] + '.' if self.notations[node] else ''
+                self.notations[child] = prefix + str(position + 1)
+                stack.append((child, False))
+
+    def __len__(self):
+        return len(self.levels)
+
+
+def bulk_create_tree(model, shape, tree_id, make_node):
+    """
+    Create the nodes of the MPTT `model` for the tree `shape` using bulk inserts
+    and return the list of the node ids (indexed by node number in `shape`).
+    ``make_node(index)`` must return an unsaved node without the tree fields.
+    """
+    ids = [None] * len(shape)
+    for start in range(0, len(shape), SYNTHETIC_BATCH_SIZE):
+        indices = shape.order[start:start+SYNTHETIC_BATCH_SIZE]
+        nodes = [make_node(index) for index in indices]
+        assign_char_ids(nodes)
+        for index, node in zip(indices, nodes):
+            ids[index] = node.id
+            parent = shape.parents[index]
+            node.parent_id = ids[parent] if parent is not None else None
+            node.tree_id = tree_id
+            node.level = shape.levels[index]
+            node.lft = shape.lfts[index]
+            node.rght = shape.rghts[index]
+            node.sort_order = shape.sort_orders[index]
+        model.objects.bulk_create(nodes)
+    return ids
+
+
+def bulk_create_relations(model, num_relations, make_relation):
+    """
+    Create `num_relations` instances of `model` returned by ``make_relation()``
+    using bulk inserts, without keeping them all in memory.
+    """
+    for start in range(0, num_relations, SYNTHETIC_BATCH_SIZE):
+        batch_size = min(SYNTHETIC_BATCH_SIZE, num_relations - start)
+        model.objects.bulk_create(assign_char_ids(make_relation() for i in range(batch_size)))
+
+
+
+
+# SYNTHETIC DATA
+################################################################################
+
+@transaction.atomic
+def generate_synthetic_data(num_jurisdictions=2, num_terms=200, num_nodes=200, num_relations=100,
+                            num_contentnodes=None, num_correlations=None, depth=1, seed=0,
+                            prefix='Synth', verbose=False):
+    """
+    Create `num_jurisdictions` jurisdictions named `prefix`0, `prefix`1, etc. each
+    with a subjects vocabulary of `num_terms` terms, an education levels vocabulary,
+    a published standards document with `num_nodes` nodes and a published content
+    collection with `num_contentnodes` nodes (default `num_nodes`) in trees of at
+    most `depth` levels under their root nodes, `num_relations` term relations,
+    content node relations, and crosswalk relations (to the previous jurisdiction's
+    document), and a content correlation with `num_correlations` relations (default
+    `num_relations`). The data is generated from `seed`, but ids are allocated as
+    usual, and all rows are created using bulk inserts.
+    """
+    rng = random.Random(seed)
+    term_rel_kinds = [kind for kind, label in TERM_REL_KINDS]
+    num_contentnodes = num_nodes if num_contentnodes is None else num_contentnodes
+    num_correlations = num_relations if num_correlations is None else num_correlations
+    published = PUBLICATION_STATUSES.published
+    std_tree_id = StandardNode._tree_manager._get_next_tree_id()
+    content_tree_id = ContentNode._tree_manager._get_next_tree_id()
+    start_time = time.time()
+
+    def log(*args):
+        if verbose:
+            print('[{:7.1f}s]'.format(time.time() - start_time), *args)
+
+    prev_std_ids = None
+    for j in range(num_jurisdictions):
+        juri = Jurisdiction.objects.create(
+            name=prefix + str(j),
+            display_name=prefix + ' jurisdiction ' + str(j),
+            country=rng.choice(SYNTHETIC_COUNTRIES),
+            language='en',
+        )
+        #
+        # Vocabularies and terms
+        vocab = ControlledVocabulary.objects.create(jurisdiction=juri, name='Subjects', label='Subjects',
+                                                    kind=SPECIAL_VOCABULARY_KINDS.subjects, language='en')
+        terms = assign_char_ids([
+            Term(vocabulary=vocab, path='T{}'.format(i) if i < 10 else 'T{}/{}'.format(i % 10, i),
+                 label=make_text(rng, 2), definition=make_text(rng, 8), sort_order=float(i))
+            for i in range(num_terms)
+        ])
+        Term.objects.bulk_create(terms, batch_size=SYNTHETIC_BATCH_SIZE)
+        levels_vocab = ControlledVocabulary.objects.create(jurisdiction=juri, name='EducationLevels',
+                                                           label='Education levels', language='en',
+                                                           kind=SPECIAL_VOCABULARY_KINDS.education_levels)
+        level_terms = assign_char_ids([
+            Term(vocabulary=levels_vocab, path='G{}'.format(i), label='Grade {}'.format(i), sort_order=float(i))
+            for i in range(1, 13)
+        ])
+        Term.objects.bulk_create(level_terms)
+        if terms:
+            bulk_create_relations(TermRelation, num_relations, lambda: TermRelation(
+                jurisdiction=juri,
+                source=rng.choice(terms),
+                target=rng.choice(terms),
+                kind=rng.choice(term_rel_kinds),
+            ))
+        log(juri.name, 'created', len(terms) + len(level_terms), 'terms and', num_relations, 'term relations')
+        #
+        # Standards
+        doc = StandardsDocument.objects.create(jurisdiction=juri, name=prefix + 'Doc' + str(j),
+                                               title=make_text(rng, 3) + ' curriculum', language='en',
+                                               digitization_method='manual_entry',
+                                               license=None, publication_status=published)
+        doc.subjects.set(terms[:10])
+        doc.education_levels.set(level_terms)
+        std_shape = TreeShape(rng, num_nodes + 1, depth)
+        std_ids = bulk_create_tree(StandardNode, std_shape, std_tree_id + j, lambda index: StandardNode(
+            document=doc,
+            notation=std_shape.notations[index],
+            description=make_text(rng, 12) if index else doc.title,
+            language='en',
+            source_id=str(index),
+        ))
+        log(juri.name, 'created', len(std_ids), 'standard nodes')
+        crosswalk = StandardsCrosswalk.objects.create(jurisdiction=juri, title=make_text(rng, 3) + ' crosswalk',
+                                                      digitization_method='bulk_import',
+                                                      license=None, publication_status=published)
+        target_ids = prev_std_ids or std_ids
+        if num_nodes:
+            bulk_create_relations(StandardNodeRelation, num_relations, lambda: StandardNodeRelation(
+                crosswalk=crosswalk,
+                source_id=std_ids[rng.randrange(1, len(std_ids))],
+                target_id=target_ids[rng.randrange(1, len(target_ids))],
+                kind=None,
+            ))
+        log(juri.name, 'created', num_relations, 'crosswalk relations')
+        #
+        # Content
+        col = ContentCollection.objects.create(jurisdiction=juri, name=prefix + 'Col' + str(j),
+                                               title=make_text(rng, 3) + ' library', language='en',
+                                               import_method='bulk_import',
+                                               license=None, publication_status=published)
+        content_shape = TreeShape(rng, num_contentnodes + 1, depth)
+        content_ids = bulk_create_tree(ContentNode, content_shape, content_tree_id + j, lambda index: ContentNode(
+            collection=col,
+            title=make_text(rng, 5) if index else col.title,
+            description=make_text(rng, 20) if index else '',
+            language='en',
+            size=rng.randint(1000, 50000000),
+            source_domain='example.org',
+            source_id=str(index),
+            source_url='https://example.org/content/{}'.format(index),
+            content_id=uuid.UUID(int=rng.getrandbits(128)),
+            license=None,
+            publication_status=published,
+        ))
+        if num_contentnodes:
+            bulk_create_relations(ContentNodeRelation, num_relations, lambda: ContentNodeRelation(
+                jurisdiction=juri,
+                source_id=content_ids[rng.randrange(1, len(content_ids))],
+                target_id=content_ids[rng.randrange(1, len(content_ids))],
+            ))
+        log(juri.name, 'created', len(content_ids), 'content nodes and', num_relations, 'relations')
+        correlation = ContentCorrelation.objects.create(jurisdiction=juri, title=make_text(rng, 3) + ' correlation',
+                                                        digitization_method='bulk_import',
+                                                        license=None, publication_status=published)
+        if num_nodes and num_contentnodes:
+            bulk_create_relations(ContentStandardRelation, num_correlations, lambda: ContentStandardRelation(
+                correlation=correlation,
+                contentnode_id=content_ids[rng.randrange(1, len(content_ids))],
+                standardnode_id=std_ids[rng.randrange(1, len(std_ids))],
+                kind=None,
+            ))
+        log(juri.name, 'created', num_correlations, 'content standard relations')
+        prev_std_ids = std_ids
@@ -3,6 +3,28 @@ import pytest
 from standards.models import Jurisdiction, UserProfile
 
 from standards.models import ControlledVocabulary, Term, TermRelation
+from standards.registry import term_registry
+
+@pytest.fixture(autouse=True)
+def nplusone(settings):
+    """
+    Fail the requests made in the tests that repeat the same query more than
+    ``settings.ROCDATA_NPLUSONE_THRESHOLD`` times (see standards.nplusone).
+    """
+    settings.ROCDATA_NPLUSONE = 'raise'
+    return settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_term_registry(settings):
+    """
+    Reload the term registry in each test, since the terms loaded in earlier
+    tests were rolled back (so the changes were never committed), and compare
+    it to the DB in every request so the numbers of queries are repeatable.
+    """
+    settings.ROCDATA_TERM_REGISTRY_CHECK_SECONDS = 0
+    term_registry.invalidate()
+
 
 @pytest.fixture
 def juri():
@@ -15,6 +15,9 @@ class CharIdModel(models.Model):
 class CharIdModelWithPrefix(models.Model):
     field = CharIdField(prefix='WP', length=10)
 
+class CharIdModelWithLongPrefix(models.Model):
+    field = CharIdField(prefix='CSR', length=10)
+
 class NullableCharIdModel(models.Model):
     field = CharIdField(blank=True, null=True)
 
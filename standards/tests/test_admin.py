@@ -0,0 +1,86 @@
+import pytest
+
+from standards import admin as standards_admin
+from standards.admin import EstimatedCountPaginator, get_estimated_count
+from standards.models import StandardsDocument, StandardNode, Term
+
+
+@pytest.fixture
+def admin_settings(settings):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    return settings
+
+
+@pytest.fixture
+def document(juri):
+    doc = StandardsDocument.objects.create(name='GHANA-MATH', title='Mathematics', jurisdiction=juri)
+    root = StandardNode.objects.create(document=doc, description='ROOT')
+    for i in range(3):
+        strand = StandardNode.objects.create(document=doc, parent=root, notation='B{}'.format(i),
+                                             description='Basic {}'.format(i), sort_order=i)
+        StandardNode.objects.create(document=doc, parent=strand, notation='B{}.1'.format(i),
+                                    description='Counting {}'.format(i))
+    return doc
+
+
+@pytest.mark.django_db
+def test_estimated_count_paginator(vocabterms, monkeypatch):
+    assert get_estimated_count(Term, 'default') >= Term.objects.count()
+    monkeypatch.setattr(standards_admin, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 1)
+    Term.objects.filter(path='B1').delete()    # the max rowid is unchanged
+    paginator = EstimatedCountPaginator(Term.objects.order_by('id'), 100)
+    assert paginator.count == get_estimated_count(Term, 'default') > Term.objects.count()
+    # filtered querysets use the exact count
+    paginator = EstimatedCountPaginator(Term.objects.filter(path__startswith='B').order_by('id'), 100)
+    assert paginator.count == Term.objects.filter(path__startswith='B').count()
+
+
+@pytest.mark.django_db
+def test_changelists_with_autocomplete_filters(vocab, vocabterms, document, admin_client, admin_settings):
+    for url in ['/admin/standards/term/', '/admin/standards/standardnode/',
+                '/admin/standards/termrelation/', '/admin/standards/contentnode/']:
+        response = admin_client.get(url)
+        assert response.status_code == 200
+    response = admin_client.get('/admin/standards/term/?vocabulary__id__exact={}'.format(vocab.id))
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert 'data-param="vocabulary__id__exact"' in content
+    assert 'data-ajax--url="/admin/standards/controlledvocabulary/autocomplete/"' in content
+    assert '<option value="{}" selected>'.format(vocab.id) in content
+    assert len(response.context['cl'].result_list) == vocab.terms.count()
+
+
+@pytest.mark.django_db
+def test_lazy_tree_view(document, admin_client, admin_settings):
+    response = admin_client.get('/admin/standards/standardsdocument/')
+    assert '/admin/standards/standardnode/tree/{}/'.format(document.id) in response.content.decode()
+    response = admin_client.get('/admin/standards/standardnode/tree/{}/'.format(document.id))
+    assert response.status_code == 200
+    assert '/admin/standards/standardnode/tree/{}/nodes/'.format(document.id) in response.content.decode()
+
+    nodes_url = '/admin/standards/standardnode/tree/{}/nodes/'.format(document.id)
+    data = admin_client.get(nodes_url).json()
+    assert [node['label'] for node in data['nodes']] == ['ROOT']
+    assert data['nodes'][0]['num_descendants'] == 6
+    assert data['next_offset'] is None
+    root_id = data['nodes'][0]['id']
+    data = admin_client.get(nodes_url, {'parent': root_id}).json()
+    assert [node['label'] for node in data['nodes']] == ['B0 Basic 0', 'B1 Basic 1', 'B2 Basic 2']
+    assert data['nodes'][0]['url'] == '/admin/standards/standardnode/{}/change/'.format(data['nodes'][0]['id'])
+
+
+@pytest.mark.django_db
+def test_lazy_tree_pages(document, admin_client, admin_settings, monkeypatch):
+    monkeypatch.setattr(standards_admin, 'ADMIN_TREE_PAGE_SIZE', 2)
+    root = StandardNode.objects.get(document=document, level=0)
+    nodes_url = '/admin/standards/standardnode/tree/{}/nodes/'.format(document.id)
+    data = admin_client.get(nodes_url, {'parent': root.id}).json()
+    assert len(data['nodes']) == 2 and data['next_offset'] == 2
+    data = admin_client.get(nodes_url, {'parent': root.id, 'offset': 2}).json()
+    assert len(data['nodes']) == 1 and data['next_offset'] is None
+
+
+@pytest.mark.django_db
+def test_lazy_tree_requires_staff(document, client, admin_settings):
+    response = client.get('/admin/standards/standardnode/tree/{}/nodes/'.format(document.id))
+    assert response.status_code == 302
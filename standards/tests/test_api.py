@@ -1,5 +1,7 @@
 import pytest
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from bs4 import BeautifulSoup
 
 TEST_SERVER_HOST = "http://testserver"
@@ -77,3 +79,90 @@ def test_get_json_endpoints(juri, vocab, vocabterms, client):
     assert data['path'] == term.path
     assert term.uri in data['uri']
     assert data['label'] == term.label
+
+
+@pytest.mark.django_db
+def test_get_vocabulary_full(juri, vocab, vocabterms, client):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get('/Ghana/terms/GradeLevels/full.json')
+    assert response.status_code == 200
+    # vocabulary + terms stats (for ETag) + terms data (ignoring silk profiler queries)
+    selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+    assert len([sql for sql in selects if 'silk_' not in sql]) == 3
+    data = response.json()
+    assert data['name'] == vocab.name
+    assert [t['path'] for t in data['terms']] == ['B1', 'B2']
+    b2_data = data['terms'][1]
+    assert b2_data['uri'] == TEST_SERVER_HOST + vocabterms['b2'].uri
+    assert [t['path'] for t in b2_data['children']] == ['B2/2']
+    assert b2_data['children'][0]['label'] == 'Basic 2.2'
+    #
+    # Conditional request
+    etag = response['ETag']
+    response = client.get('/Ghana/terms/GradeLevels/full.json', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    #
+    # Modified vocabulary
+    vocabterms['b1'].delete()
+    response = client.get('/Ghana/terms/GradeLevels/full.json', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert [t['path'] for t in response.json()['terms']] == ['B2']
+
+
+@pytest.fixture
+def standardnodes(juri):
+    from standards.models import StandardsDocument, StandardNode
+    doc = StandardsDocument.objects.create(name='GHANA-MATH', title='Mathematics', jurisdiction=juri)
+    root = StandardNode.objects.create(document=doc, description='ROOT')
+    nodes = {'root': root}
+    for i in range(1, 3):
+        strand = nodes['B{}'.format(i)] = StandardNode.objects.create(
+            document=doc, parent=root, notation='B{}'.format(i), description='Basic', sort_order=i)
+        for j in range(1, 3):
+            sub = nodes['B{}.{}'.format(i, j)] = StandardNode.objects.create(
+                document=doc, parent=strand, notation='B{}.{}'.format(i, j), description='Basic', sort_order=j)
+            nodes['B{}.{}.1'.format(i, j)] = StandardNode.objects.create(
+                document=doc, parent=sub, notation='B{}.{}.1'.format(i, j), description='Basic')
+    return nodes
+
+
+@pytest.mark.django_db
+def test_get_standardnode_subtree(standardnodes, client):
+    url = '/Ghana/standardnodes/{}/subtree.json'.format(standardnodes['B1'].id)
+    data = client.get(url).json()
+    assert data['notation'] == 'B1'
+    assert [child['notation'] for child in data['children']] == ['B1.1', 'B1.2']
+    # the nodes at the depth limit link to their children
+    assert data['children'][0]['children'] == [TEST_SERVER_HOST + standardnodes['B1.1.1'].uri]
+    assert 'lft' not in data and 'tree_id' not in data
+    #
+    with CaptureQueriesContext(connection) as ctx:
+        data = client.get(url + '?depth=2').json()
+    num_queries = len([q for q in ctx.captured_queries if 'silk_' not in q['sql']])
+    assert [child['notation'] for child in data['children'][1]['children']] == ['B1.2.1']
+    assert data['children'][1]['children'][0]['children'] == []
+    with CaptureQueriesContext(connection) as ctx:
+        data = client.get('/Ghana/standardnodes/{}/subtree.json?depth=3'.format(standardnodes['root'].id)).json()
+    assert len([q for q in ctx.captured_queries if 'silk_' not in q['sql']]) == num_queries
+    assert [child['notation'] for child in data['children']] == ['B1', 'B2']
+    #
+    response = client.get(url + '?depth=-1')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_get_standardnode_subtree_flat(standardnodes, client):
+    url = '/Ghana/standardnodes/{}/subtree'.format(standardnodes['B2'].id)
+    data = client.get(url + '.json?format=flat&depth=2').json()
+    assert [node['notation'] for node in data] == ['B2', 'B2.1', 'B2.1.1', 'B2.2', 'B2.2.1']
+    assert [node['parent_id'] for node in data] == [
+        standardnodes['root'].id, standardnodes['B2'].id, standardnodes['B2.1'].id,
+        standardnodes['B2'].id, standardnodes['B2.2'].id]
+    assert 'children' not in data[0]
+    response = client.get(url + '?format=flat', HTTP_ACCEPT='application/json')
+    assert response['Content-Type'] == 'application/json'
+    assert len(response.json()) == 3
+    response = client.get(url + '?format=flat')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/html')
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from django.core.management import call_command
+
+from standards.benchmarks import BENCHMARK_ENDPOINTS, compare_benchmarks, percentile
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([3.0], 95) == 3.0
+
+
+def test_compare_benchmarks():
+    baseline = {'results': {'a json': {'p95_ms': 10.0, 'queries': 3}, 'b json': {'p95_ms': 10.0, 'queries': 3}}}
+    current = {'results': {'a json': {'p95_ms': 11.0, 'queries': 3}, 'b json': {'p95_ms': 13.0, 'queries': 4}}}
+    regressions = compare_benchmarks(baseline, current, max_regression=0.2)
+    assert regressions == ['b json: p95_ms 10.0ms -> 13.0ms', 'b json: queries 3 -> 4']
+
+
+@pytest.mark.django_db
+def test_benchmark_endpoints_command(tmp_path):
+    output = str(tmp_path / 'bench.json')
+    call_command('benchmark_endpoints', generate=True, nodes=30, relations=30,
+                 iterations=3, warmup=1, output=output)
+    with open(output) as inf:
+        benchmarks = json.load(inf)
+    assert benchmarks['meta']['dataset']['standardnodes'] == 31
+    assert benchmarks['meta']['peak_rss_kb'] > 0
+    assert len(benchmarks['results']) == 2 * len(BENCHMARK_ENDPOINTS)
+    result = benchmarks['results']['document-full json']
+    assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] <= result['max_ms']
+    assert result['queries'] > 0 and result['bytes'] > 0
+    # comparing to itself finds no regressions
+    call_command('benchmark_endpoints', iterations=1, warmup=0, endpoints='term-detail',
+                 compare=output, max_regression=100.0)
@@ -1,5 +1,6 @@
 
 import json
+from unittest import mock
 
 from django.core import exceptions, serializers
 from django.db import IntegrityError
@@ -11,12 +12,13 @@ from django.test import (
 from standards.tests.models import (
     CharIdModel,
     CharIdModelWithPrefix,
+    CharIdModelWithLongPrefix,
     NullableCharIdModel,
     PrimaryKeyCharIdModel,
     RelatedToCharIdModel,
     CharIdGrandchildModel
 )
-from standards.fields import CharIdField
+from standards.fields import CharIdField, assign_char_ids
 
 
 
@@ -82,6 +84,25 @@ class TestMethods(SimpleTestCase):
         name, path, args, kwargs = field.deconstruct()
         self.assertIn('length', kwargs.keys())
 
+    def test_derive_id(self):
+        field = CharIdField(prefix='CSR', length=10)
+        new_id = field.derive_id('channel1', 'example.org', 'node1')
+        self.assertEqual(new_id, field.derive_id('channel1', 'example.org', 'node1'))
+        self.assertEqual(len(new_id), 10)
+        self.assertEqual(new_id[0:3], 'CSR')
+        self.assertTrue(all(ch in CharIdField.ALPHABET for ch in new_id[3:]))
+
+    def test_derive_id_depends_on_all_parts(self):
+        field = CharIdField(prefix='C', length=10)
+        ids = set([
+            field.derive_id('channel1', 'example.org', 'node1'),
+            field.derive_id('channel2', 'example.org', 'node1'),
+            field.derive_id('channel1', 'example.com', 'node1'),
+            field.derive_id('channel1', 'example.org', 'node2'),
+            field.derive_id('channel1', 'example.orgnode1', ''),
+        ])
+        self.assertEqual(len(ids), 5)
+
 class TestQuerying(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -203,6 +224,62 @@ class TestAsPrimaryKey(TestCase):
 
 
 
+class TestIdAllocation(TestCase):
+    def setUp(self):
+        self.field = CharIdModelWithLongPrefix._meta.get_field('field')
+        self.field._id_pool = []   # start each test with an empty id pool
+
+    def test_allocated_ids(self):
+        ids = self.field.allocate_ids(50)
+        self.assertEqual(len(set(ids)), 50)
+        for new_id in ids:
+            self.assertEqual(len(new_id), 10)
+            self.assertEqual(new_id[0:3], 'CSR')
+            self.assertTrue(all(ch in CharIdField.ALPHABET for ch in new_id[3:]))
+
+    def test_allocate_uses_one_query(self):
+        with self.assertNumQueries(1):
+            ids = self.field.allocate_ids(300)
+        self.assertEqual(len(set(ids)), 300)
+
+    def test_save_uses_id_pool(self):
+        with self.assertNumQueries(2):
+            CharIdModelWithLongPrefix.objects.create()
+        with self.assertNumQueries(1):
+            CharIdModelWithLongPrefix.objects.create()
+        self.assertEqual(CharIdModelWithLongPrefix.objects.values('field').distinct().count(), 2)
+
+    def test_collisions_are_skipped(self):
+        CharIdModelWithLongPrefix.objects.create(field='CSRtaken01')
+        CharIdModelWithLongPrefix.objects.create(field='CSRtaken02')
+        candidates = [{'CSRtaken01', 'CSRfree001'}, {'CSRtaken02', 'CSRfree002'}]
+        with mock.patch.object(self.field, 'generate_candidate_ids', side_effect=candidates):
+            with self.assertNumQueries(2):
+                ids = self.field.allocate_ids(2)
+        self.assertEqual(sorted(ids), ['CSRfree001', 'CSRfree002'])
+
+    def test_collisions_exhaust_attempts(self):
+        CharIdModelWithLongPrefix.objects.create(field='CSRtaken01')
+        with mock.patch.object(self.field, 'generate_candidate_ids', return_value={'CSRtaken01'}):
+            with self.assertRaises(RuntimeError):
+                self.field.allocate_ids(1)
+
+    def test_bulk_create(self):
+        objs = [CharIdModelWithLongPrefix() for i in range(20)]
+        objs[0].field = 'CSRmanual1'
+        with self.assertNumQueries(2):
+            CharIdModelWithLongPrefix.objects.bulk_create(assign_char_ids(objs))
+        self.assertEqual(CharIdModelWithLongPrefix.objects.count(), 20)
+        self.assertTrue(CharIdModelWithLongPrefix.objects.filter(field='CSRmanual1').exists())
+
+    def test_bulk_create_pk(self):
+        objs = assign_char_ids([PrimaryKeyCharIdModel(), PrimaryKeyCharIdModel(id=None)])
+        self.assertTrue(all(obj.id for obj in objs))
+        PrimaryKeyCharIdModel.objects.bulk_create(objs)
+        self.assertEqual(PrimaryKeyCharIdModel.objects.count(), 2)
+
+
+
 class TestAsPrimaryKeyTransactionTests(TransactionTestCase):
     # Need a TransactionTestCase to avoid deferring FK constraint checking.
 
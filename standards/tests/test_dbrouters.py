@@ -0,0 +1,93 @@
+import time
+from unittest import mock
+
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from standards.dbrouters import LAST_WRITE_COOKIE_NAME
+from standards.dbrouters import ReplicaRouter, ReplicaRoutingMiddleware, replica_health
+from standards.models import Term
+
+
+@override_settings(ROCDATA_DB_REPLICAS=['replica1', 'replica2'])
+class TestReplicaRouting(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.middleware = ReplicaRoutingMiddleware(self.get_response)
+        self.read_dbs = []
+        replica_health._down_until = {}
+        # the replica aliases don't exist in the test settings
+        connections_patcher = mock.patch('standards.dbrouters.connections',
+                                         {'replica1': mock.Mock(), 'replica2': mock.Mock()})
+        connections_patcher.start()
+        self.addCleanup(connections_patcher.stop)
+
+    def get_response(self, request):
+        # two reads per request to check they use the same database
+        self.read_dbs.append(self.router.db_for_read(Term))
+        self.read_dbs.append(self.router.db_for_read(Term))
+        self.write_db = self.router.db_for_write(Term)
+        return HttpResponse()
+
+    def test_safe_requests_read_from_one_replica(self):
+        with mock.patch.object(replica_health, 'check', return_value=True):
+            self.middleware(self.factory.get('/Ghana/terms/Subjects'))
+        self.assertIn(self.read_dbs[0], ['replica1', 'replica2'])
+        self.assertEqual(self.read_dbs[0], self.read_dbs[1])
+        self.assertEqual(self.write_db, 'default')
+        # outside of requests (e.g. importers) reads go to the primary
+        self.assertEqual(self.router.db_for_read(Term), 'default')
+
+    def test_writes_and_admin_use_primary(self):
+        with mock.patch.object(replica_health, 'check', return_value=True):
+            response = self.middleware(self.factory.post('/Ghana/terms/Subjects/'))
+            self.middleware(self.factory.get('/admin/standards/term/'))
+        self.assertEqual(self.read_dbs, ['default'] * 4)
+        self.assertIn(LAST_WRITE_COOKIE_NAME, response.cookies)
+
+    def test_read_your_writes(self):
+        with mock.patch.object(replica_health, 'check', return_value=True):
+            request = self.factory.get('/Ghana/terms/Subjects')
+            request.COOKIES[LAST_WRITE_COOKIE_NAME] = str(int(time.time()))
+            self.middleware(request)
+            request = self.factory.get('/Ghana/terms/Subjects')
+            request.COOKIES[LAST_WRITE_COOKIE_NAME] = str(int(time.time()) - 3600)
+            self.middleware(request)
+        self.assertEqual(self.read_dbs[0:2], ['default', 'default'])
+        self.assertIn(self.read_dbs[2], ['replica1', 'replica2'])
+
+    def test_fallback_to_healthy_replica_and_primary(self):
+        connections = {'replica1': mock.Mock(connection=None), 'replica2': mock.Mock(connection=None)}
+        connections['replica1'].ensure_connection.side_effect = DatabaseError('down')
+        # try the replicas in order so replica1 is always checked first
+        with mock.patch('standards.dbrouters.connections', connections), \
+                mock.patch('standards.dbrouters.random.shuffle'):
+            self.middleware(self.factory.get('/Ghana'))
+            self.assertTrue(replica_health.is_down('replica1'))
+            connections['replica2'].ensure_connection.side_effect = DatabaseError('down')
+            self.middleware(self.factory.get('/Ghana'))
+        self.assertEqual(self.read_dbs, ['replica2', 'replica2', 'default', 'default'])
+
+    def test_replica_error_during_request_retries_on_primary(self):
+        connections = {'replica1': mock.Mock(connection=object()), 'replica2': mock.Mock(connection=object())}
+
+        def get_response(request):
+            read_db = self.router.db_for_read(Term)
+            self.read_dbs.append(read_db)
+            if read_db != 'default':
+                # e.g. the persistent connection to the replica was dropped
+                connections[read_db].errors_occurred = True
+                return HttpResponse(status=500)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        with mock.patch('standards.dbrouters.connections', connections), \
+                mock.patch('standards.dbrouters.random.shuffle'):
+            response = middleware(self.factory.get('/Ghana'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read_dbs, ['replica1', 'default'])
+        self.assertTrue(replica_health.is_down('replica1'))
+        connections['replica1'].close.assert_called_once_with()
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from standards import fixtures
+from standards.fixtures import FIXTURES_MODELS, dump_fixtures, load_fixtures
+from standards.models import StandardNode, ContentNode
+from standards.synthetic import generate_synthetic_data
+
+
+TREE_FIELDS = ('id', 'parent_id', 'tree_id', 'level', 'lft', 'rght')
+
+
+def read_fixtures(directory):
+    datas = {}
+    for filename in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, filename), encoding='utf-8') as inf:
+            datas[filename] = inf.read()
+    return datas
+
+
+def delete_fixtures_data():
+    for model in reversed(FIXTURES_MODELS):
+        model._base_manager.all().delete()
+
+
+@pytest.mark.django_db
+def test_dump_and_load_fixtures(tmp_path, monkeypatch):
+    monkeypatch.setattr(fixtures, 'FIXTURES_BATCH_SIZE', 50)
+    generate_synthetic_data(num_jurisdictions=2, num_terms=20, num_nodes=120, num_relations=30, depth=3)
+    trees = {model: set(model.objects.values_list(*TREE_FIELDS)) for model in [StandardNode, ContentNode]}
+    manifest = dump_fixtures(str(tmp_path / 'dump1'))
+    assert [entry['model'] for entry in manifest['models']][:3] == [
+        'standards.termrelation', 'standards.standardsdocument', 'standards.standardnode']
+    assert {entry['model']: entry['count'] for entry in manifest['models']}['standards.standardnode'] == 2 * 121
+    with open(tmp_path / 'dump1' / 'standards.standardnode.ndjson') as inf:
+        node = json.loads(inf.readline())
+    assert node['fields']['document'] and isinstance(node['fields']['subjects'], list)
+
+    delete_fixtures_data()
+    with CaptureQueriesContext(connection) as ctx:
+        counts = load_fixtures(str(tmp_path / 'dump1'))
+    assert counts['standards.contentnode'] == 2 * 121
+    # bulk inserts: the queries don't grow with the number of rows per batch
+    assert len(ctx.captured_queries) < 150
+    for model, tree in trees.items():
+        assert set(model.objects.values_list(*TREE_FIELDS)) == tree
+    dump_fixtures(str(tmp_path / 'dump2'))
+    assert read_fixtures(str(tmp_path / 'dump1')) == read_fixtures(str(tmp_path / 'dump2'))
+
+    with pytest.raises(ValueError, match='already exists'):
+        load_fixtures(str(tmp_path / 'dump1'))
+    load_fixtures(str(tmp_path / 'dump1'), overwrite=True)
+    dump_fixtures(str(tmp_path / 'dump3'))
+    assert read_fixtures(str(tmp_path / 'dump1')) == read_fixtures(str(tmp_path / 'dump3'))
+
+
+@pytest.mark.django_db
+def test_fixtures_commands(tmp_path, capsys):
+    generate_synthetic_data(num_jurisdictions=1, num_terms=10, num_nodes=20, num_relations=5, depth=2)
+    call_command('dumpfixtures', str(tmp_path), models='standards.standardsdocument,standards.standardnode')
+    assert sorted(os.listdir(tmp_path)) == [
+        'manifest.json', 'standards.standardnode.ndjson', 'standards.standardsdocument.ndjson']
+    with pytest.raises(SystemExit):
+        call_command('dumpfixtures', str(tmp_path), models='standards.nosuchmodel')
+    delete_fixtures_data()
+    call_command('loadfixtures', str(tmp_path))
+    assert 'Loaded 21 standards.standardnode' in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        call_command('loadfixtures', str(tmp_path))
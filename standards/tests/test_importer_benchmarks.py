@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from django.core.management import call_command
+
+from importers.benchmarks import IMPORTER_BENCHMARKS, compare_importer_benchmarks
+from standards.models import Jurisdiction, ContentNode, Term
+
+
+def test_compare_importer_benchmarks():
+    def make_result(nodes_per_sec, queries, peak):
+        return {'nodes_per_sec': nodes_per_sec, 'queries': queries, 'tracemalloc_peak_kb': peak}
+    baseline = {'results': {'a fresh': make_result(100.0, 10, 100.0), 'b fresh': make_result(100.0, 10, 100.0)}}
+    current = {'results': {'a fresh': make_result(90.0, 10, 110.0), 'b fresh': make_result(70.0, 11, 130.0)}}
+    regressions = compare_importer_benchmarks(baseline, current, max_regression=0.2)
+    assert regressions == [
+        'b fresh: nodes/s 100.0 -> 70.0',
+        'b fresh: queries 10 -> 11',
+        'b fresh: peak memory 100.0KB -> 130.0KB',
+    ]
+
+
+@pytest.mark.django_db
+def test_benchmark_importers_command(tmp_path):
+    output = str(tmp_path / 'bench.json')
+    call_command('benchmark_importers', depth=2, fanout=3, term_files=2, top=3,
+                 workdir=str(tmp_path / 'inputs'), output=output)
+    with open(output) as inf:
+        benchmarks = json.load(inf)
+    assert len(benchmarks['results']) == 2 * len(IMPORTER_BENCHMARKS)
+    assert benchmarks['results']['ccimport_kolibri fresh']['nodes'] == 3 + 9
+    assert benchmarks['results']['loadterms fresh']['nodes'] == 2 * (3 + 9)
+    assert benchmarks['results']['stdimport_hackathon fresh']['nodes'] == 1 + 3 + 9
+    for result in benchmarks['results'].values():
+        assert result['nodes_per_sec'] > 0 and result['queries'] > 0
+        assert result['tracemalloc_peak_kb'] > 0
+        assert 0 < len(result['top_allocations']) <= 3
+    assert (tmp_path / 'inputs' / 'loadterms' / 'update' / 'BenchVocab1.yml').exists()
+    # the imported data is rolled back
+    assert not Jurisdiction.objects.filter(name='ImporterBench').exists()
+    assert ContentNode.objects.count() == 0 and Term.objects.count() == 0
+    # comparing to a slower baseline finds no regressions (query counts can vary
+    # by one or two between runs depending on the state of the id allocator)
+    for result in benchmarks['results'].values():
+        result['nodes_per_sec'] /= 100
+        result['queries'] += 5
+    baseline = str(tmp_path / 'baseline.json')
+    with open(baseline, 'w') as outf:
+        json.dump(benchmarks, outf)
+    call_command('benchmark_importers', importers='loadterms', modes='fresh', depth=2, fanout=3, term_files=2,
+                 compare=baseline, max_regression=100.0)
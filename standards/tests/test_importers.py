@@ -0,0 +1,155 @@
+import json
+import os
+import random
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from importers.benchmarks import KOLIBRI_VOCABULARY_FILES, make_kolibri_node, make_kolibri_tree
+from importers.management.commands.ccimport_kolibri import derive_contentnode_id
+from standards.models import Jurisdiction, StandardsDocument, StandardNode
+from standards.models import ContentCollection, ContentNode
+
+
+# HACKATHON DB IMPORTER
+################################################################################
+
+def make_hackathon_node(pk, path, sort_order, document=1):
+    return {
+        "model": "hackathon.standardnode",
+        "pk": pk,
+        "fields": {
+            "document": document,
+            "path": path,
+            "sort_order": sort_order,
+            "identifier": "N" + str(pk),
+            "title": "Node " + str(pk),
+            "notes": "",
+            "extra_fields": {},
+        },
+    }
+
+
+@pytest.fixture
+def hackathon_dumpdatas(tmp_path):
+    docs = [
+        {"model": "hackathon.curriculumdocument", "pk": 1,
+         "fields": {"source_id": "zambia-math-5to7", "title": "Zambia math"}},
+        {"model": "hackathon.curriculumdocument", "pk": 2,
+         "fields": {"source_id": "not-imported", "title": "Skipped"}},
+    ]
+    nodes = [
+        make_hackathon_node(10, "0001", 1),                 # hackathon root
+        make_hackathon_node(12, "00010002", 2),
+        make_hackathon_node(11, "00010001", 1),
+        make_hackathon_node(13, "000100010001", 1),
+        make_hackathon_node(14, "0001000100010001", 1),
+        make_hackathon_node(15, "000100010002", 2),
+        make_hackathon_node(20, "0002", 1, document=2),
+    ]
+    (tmp_path / "hackathon_CurriculumDocument_data.json").write_text(json.dumps(docs))
+    (tmp_path / "hackathon_StandardNode_data.json").write_text(json.dumps(nodes))
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_stdimport_hackathon(hackathon_dumpdatas):
+    Jurisdiction.objects.create(name="Zambia", display_name="Zambia", country="ZM")
+    call_command('stdimport_hackathon', '--dumpdatas_dir', str(hackathon_dumpdatas), '--source_id', 'zambia-math-5to7')
+    stddoc = StandardsDocument.objects.get(name="zambia-math-5to7")
+    nodes = StandardNode.objects.filter(document=stddoc)
+    assert nodes.count() == 6
+    root = stddoc.root
+    assert [ch.source_id for ch in root.get_children()] == ['11', '12']
+    node13 = nodes.get(source_id='13')
+    assert [n.source_id for n in node13.get_ancestors()] == ['', '11']
+    assert [n.source_id for n in node13.get_descendants()] == ['14']
+    # precomputed MPTT fields match the ones computed by django-mptt
+    mptt_fields = lambda: sorted(nodes.values_list('id', 'lft', 'rght', 'level', 'tree_id'))
+    imported_mptt_fields = mptt_fields()
+    StandardNode._tree_manager.partial_rebuild(root.tree_id)
+    assert mptt_fields() == imported_mptt_fields
+    # re-importing replaces the document
+    call_command('stdimport_hackathon', '--dumpdatas_dir', str(hackathon_dumpdatas), '--source_id', 'zambia-math-5to7')
+    assert StandardsDocument.objects.filter(name="zambia-math-5to7").count() == 1
+    assert StandardNode.objects.count() == 6
+
+
+
+
+# KOLIBRI CHANNEL IMPORTER
+################################################################################
+
+@pytest.fixture
+def kolibri_tree_path(tmp_path):
+    Jurisdiction.objects.create(name="LE", display_name="Learning Equality")
+    Jurisdiction.objects.create(name="Global", display_name="Global Terms")
+    terms_dir = os.path.join(settings.BASE_DIR, 'data', 'terms')
+    call_command('loadterms', *[os.path.join(terms_dir, filename) for filename in KOLIBRI_VOCABULARY_FILES])
+    rng = random.Random(0)
+    tree = make_kolibri_tree(rng, depth=2, fanout=3, files_per_node=1)
+    path = tmp_path / "channel.json"
+    path.write_text(json.dumps(tree))
+    return path
+
+
+@pytest.mark.django_db
+def test_ccimport_kolibri_deterministic_ids(kolibri_tree_path):
+    def import_channel(**options):
+        call_command('ccimport_kolibri', str(kolibri_tree_path), jurisdiction='LE', name='channel',
+                     deterministic_ids=True, **options)
+        return ContentCollection.objects.get(name='channel')
+
+    col = import_channel()
+    ids = dict(ContentNode.objects.filter(collection=col).values_list('source_id', 'id'))
+    assert len(ids) == 1 + 3 + 9
+    for source_id, id in ids.items():
+        assert id == derive_contentnode_id(col, source_id)
+    # importing the channel again gives the same ids
+    col_id = col.id
+    col.delete()
+    col = import_channel()
+    assert col.id == col_id
+    assert dict(ContentNode.objects.filter(collection=col).values_list('source_id', 'id')) == ids
+    # re-importing updates the existing nodes and inserts the new ones
+    tree = json.loads(kolibri_tree_path.read_text())
+    new_node = make_kolibri_node(random.Random(1), 'video', 1)
+    tree['children'][0]['children'].append(new_node)
+    tree['children'][1]['title'] = 'Renamed topic'
+    kolibri_tree_path.write_text(json.dumps(tree))
+    col = import_channel(update=True)
+    new_ids = dict(ContentNode.objects.filter(collection=col).values_list('source_id', 'id'))
+    assert new_ids == dict(ids, **{new_node['id']: derive_contentnode_id(col, new_node['id'])})
+    assert ContentNode.objects.get(id=ids[tree['children'][1]['id']]).title == 'Renamed topic'
+
+
+@pytest.mark.django_db
+def test_ccimport_kolibri_deterministic_ids_moved_nodes(kolibri_tree_path):
+    def import_channel(**options):
+        call_command('ccimport_kolibri', str(kolibri_tree_path), jurisdiction='LE', name='channel',
+                     deterministic_ids=True, **options)
+        return ContentCollection.objects.get(name='channel')
+
+    col = import_channel()
+    ids = dict(ContentNode.objects.filter(collection=col).values_list('source_id', 'id'))
+    # move the first topic with its children under the last topic
+    tree = json.loads(kolibri_tree_path.read_text())
+    moved = tree['children'].pop(0)
+    tree['children'][-1]['children'].append(moved)
+    kolibri_tree_path.write_text(json.dumps(tree))
+    col = import_channel(update=True)
+    assert dict(ContentNode.objects.filter(collection=col).values_list('source_id', 'id')) == ids
+    moved_node = ContentNode.objects.get(id=ids[moved['id']])
+    assert moved_node.parent_id == ids[tree['children'][-1]['id']]
+    assert moved_node.publication_status != 'retired'
+    assert [child.source_id for child in moved_node.get_children()] == [child['id'] for child in moved['children']]
+    assert not ContentNode.objects.filter(collection=col, publication_status='retired').exists()
+    root = ContentNode.objects.get(id=col.root.id)
+    assert root.get_descendant_count() == len(ids) - 1     # the MPTT fields are consistent
+    assert moved_node.get_descendant_count() == len(moved['children'])
+    # the channel can't be imported again in another collection
+    with pytest.raises(SystemExit):
+        call_command('ccimport_kolibri', str(kolibri_tree_path), jurisdiction='LE', name='channel2',
+                     deterministic_ids=True)
+    assert not ContentCollection.objects.filter(name='channel2').exists()
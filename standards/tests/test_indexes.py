@@ -0,0 +1,101 @@
+import importlib
+import re
+
+import pytest
+
+from django.conf import settings
+from django.db import connection
+
+from standards.api import TermViewSet
+from standards.models import Jurisdiction, ControlledVocabulary, Term
+from standards.models import StandardsDocument, StandardNode
+from standards.models import ContentCollection, ContentNode
+from standards.models.standards import PUBLICATION_STATUSES
+from standards.synthetic import generate_synthetic_data
+
+
+# Tables with fewer rows than this can be scanned (e.g. jurisdictions)
+SMALL_TABLE_ROWS = 50
+
+SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(\w+)')
+
+
+def get_endpoint_viewsets():
+    """
+    Return the viewsets registered under /{juri}/ plus the manually wired terms viewset.
+    """
+    urls = importlib.import_module(settings.ROOT_URLCONF)
+    viewsets = [viewset for prefix, viewset, basename in urls.jurisdiction_router.registry]
+    return viewsets + [TermViewSet]
+
+
+def get_main_querysets(viewset_class, juri):
+    """
+    Return the querysets used by the list and detail endpoints of `viewset_class`.
+    """
+    view = viewset_class()
+    view.kwargs = {'jurisdiction_name': juri.name}
+    if viewset_class is TermViewSet:
+        view.kwargs['vocabulary_name'] = ControlledVocabulary.objects.filter(jurisdiction=juri).first().name
+    list_queryset = view.get_queryset()
+    lookup_field = view.lookup_field or 'pk'
+    lookup_value = list_queryset.values_list(lookup_field, flat=True).first()
+    detail_queryset = view.get_queryset().filter(**{lookup_field: lookup_value})
+    return [('list', list_queryset), ('detail', detail_queryset)]
+
+
+def get_full_scans(queryset, large_tables):
+    plan = queryset.explain()
+    return [table for table in SCAN_RE.findall(plan) if table in large_tables]
+
+
+@pytest.fixture
+def synthetic_tables():
+    """
+    Create synthetic data, update the planner statistics, and return the names
+    of the tables that are too large to be scanned.
+    """
+    generate_synthetic_data(num_jurisdictions=3, num_terms=300, num_nodes=300, num_relations=300)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        large_tables = set()
+        for table in connection.introspection.table_names(cursor):
+            cursor.execute('SELECT COUNT(*) FROM "{}"'.format(table))
+            if cursor.fetchone()[0] >= SMALL_TABLE_ROWS:
+                large_tables.add(table)
+    return large_tables
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='parses SQLite query plans')
+@pytest.mark.django_db
+def test_endpoint_queries_use_indexes(synthetic_tables):
+    large_tables = synthetic_tables
+    juri = Jurisdiction.objects.get(name='Synth1')
+    failures = []
+    for viewset_class in get_endpoint_viewsets():
+        for endpoint, queryset in get_main_querysets(viewset_class, juri):
+            full_scans = get_full_scans(queryset, large_tables)
+            if full_scans:
+                failures.append('{} {}: full scan of {}'.format(viewset_class.__name__, endpoint, full_scans))
+    assert not failures, '\n'.join(failures)
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='parses SQLite query plans')
+@pytest.mark.django_db
+def test_lookups_use_composite_indexes(synthetic_tables):
+    juri = Jurisdiction.objects.get(name='Synth1')
+    document = StandardsDocument.objects.get(jurisdiction=juri)
+    collection = ContentCollection.objects.get(jurisdiction=juri)
+    vocab = ControlledVocabulary.objects.get(jurisdiction=juri, name='Subjects')
+    published = PUBLICATION_STATUSES.published
+    expected_indexes = [
+        (StandardNode.objects.filter(document=document, source_id='7'), 'standardnode_doc_source_idx'),
+        (ContentNode.objects.filter(collection=collection, source_id='7'), 'contentnode_col_source_idx'),
+        (Term.objects.filter(vocabulary=vocab, path='T7/17'), 'standards_term_vocabulary_id_path'),
+        (Term.objects.filter(vocabulary=vocab).order_by('sort_order', 'path'), 'term_vocab_sort_idx'),
+        (StandardsDocument.objects.filter(jurisdiction=juri, publication_status=published), 'stddoc_published_juri_idx'),
+        (ContentCollection.objects.filter(jurisdiction=juri, publication_status=published), 'collection_published_juri_idx'),
+    ]
+    for queryset, index_name in expected_indexes:
+        plan = queryset.explain()
+        assert index_name in plan, plan
@@ -0,0 +1,168 @@
+import pytest
+import yaml
+
+from django.core.management import call_command
+
+from standards.management.commands.loadterms import Command, parse_terms_data
+from standards.models import ControlledVocabulary, Term, TermRelation
+from standards.models.terms import TERM_REL_KINDS
+
+
+def get_termsdata(terms):
+    return {
+        "type": "ControlledVocabulary",
+        "jurisdiction": "Ghana",
+        "name": "Subjects",
+        "label": "Ghana Subjects",
+        "language": "en",
+        "country": "GH",
+        "terms": terms,
+    }
+
+DEEP_TERMS = [
+    {"term": "Math", "label": "Mathematics", "children": [
+        {"term": "Algebra", "children": [
+            {"term": "Linear", "children": [
+                {"term": "Systems", "definition": "Systems of linear equations"},
+            ]},
+        ]},
+        {"term": "Geometry"},
+    ]},
+    {"term": "English", "language": "fr"},
+]
+
+LOAD_OPTIONS = {"jurisdiction": None, "overwrite": True}
+
+
+# PARSING
+################################################################################
+
+def test_parse_arbitrary_depth():
+    parsed = parse_terms_data(get_termsdata(DEEP_TERMS))
+    paths = [t['path'] for t in parsed['terms']]
+    assert paths == [
+        'Math',
+        'Math/Algebra',
+        'Math/Algebra/Linear',
+        'Math/Algebra/Linear/Systems',
+        'Math/Geometry',
+        'English',
+    ]
+    terms_by_path = dict((t['path'], t) for t in parsed['terms'])
+    assert terms_by_path['Math/Geometry']['sort_order'] == 2.0
+    assert terms_by_path['Math/Algebra']['label'] == 'Algebra'
+    assert terms_by_path['Math/Algebra/Linear/Systems']['definition'] == 'Systems of linear equations'
+    assert terms_by_path['English']['language'] == 'fr'
+    assert terms_by_path['Math']['language'] == 'en'
+
+
+def test_parse_rejects_duplicate_paths():
+    terms = [{"term": "Math"}, {"term": "Math"}]
+    with pytest.raises(ValueError):
+        parse_terms_data(get_termsdata(terms))
+
+
+def test_parse_rejects_missing_term():
+    terms = [{"term": "Math", "children": [{"label": "No term key"}]}]
+    with pytest.raises(ValueError):
+        parse_terms_data(get_termsdata(terms))
+
+
+
+# LOADING
+################################################################################
+
+@pytest.mark.django_db
+def test_load_deep_vocabulary(juri):
+    Command().load_terms_data(get_termsdata(DEEP_TERMS), LOAD_OPTIONS)
+    vocab = ControlledVocabulary.objects.get(jurisdiction=juri, name='Subjects')
+    assert vocab.terms.count() == 6
+    systems = Term.objects.get(vocabulary=vocab, path='Math/Algebra/Linear/Systems')
+    assert systems.get_parent().path == 'Math/Algebra/Linear'
+
+
+@pytest.mark.django_db
+def test_overwrite_preserves_ids_and_relations(juri):
+    Command().load_terms_data(get_termsdata(DEEP_TERMS), LOAD_OPTIONS)
+    vocab = ControlledVocabulary.objects.get(jurisdiction=juri, name='Subjects')
+    math = Term.objects.get(vocabulary=vocab, path='Math')
+    english = Term.objects.get(vocabulary=vocab, path='English')
+    geometry = Term.objects.get(vocabulary=vocab, path='Math/Geometry')
+    rel = TermRelation.objects.create(source=math, kind=TERM_REL_KINDS.related, target=english, jurisdiction=juri)
+    # reload with a changed label, a removed term, and a new term
+    new_terms = [
+        {"term": "Math", "label": "Maths", "children": [
+            {"term": "Algebra", "children": [
+                {"term": "Linear", "children": [
+                    {"term": "Systems", "definition": "Systems of linear equations"},
+                ]},
+            ]},
+        ]},
+        {"term": "English", "language": "fr"},
+        {"term": "Science"},
+    ]
+    Command().load_terms_data(get_termsdata(new_terms), LOAD_OPTIONS)
+    assert Term.objects.get(vocabulary=vocab, path='Math').id == math.id
+    assert Term.objects.get(vocabulary=vocab, path='Math').label == 'Maths'
+    assert Term.objects.get(vocabulary=vocab, path='English').id == english.id
+    assert Term.objects.filter(vocabulary=vocab, path='Science').exists()
+    assert not Term.objects.filter(id=geometry.id).exists()
+    assert TermRelation.objects.filter(id=rel.id).exists()
+    assert vocab.terms.count() == 6
+
+
+@pytest.mark.django_db
+def test_overwrite_updates_vocabulary_attributes(juri):
+    Command().load_terms_data(get_termsdata(DEEP_TERMS), LOAD_OPTIONS)
+    termsdata = get_termsdata(DEEP_TERMS)
+    termsdata.update(label='Ghana Subjects (2021)', language='es')
+    Command().load_terms_data(termsdata, LOAD_OPTIONS)
+    vocab = ControlledVocabulary.objects.get(jurisdiction=juri, name='Subjects')
+    assert (vocab.label, vocab.language) == ('Ghana Subjects (2021)', 'es')
+    assert Term.objects.get(vocabulary=vocab, path='Math').language == 'es'
+    # the country must be the country of the jurisdiction
+    termsdata.update(country='KE', language='en')
+    with pytest.raises(SystemExit):
+        Command().load_terms_data(termsdata, LOAD_OPTIONS)
+    assert ControlledVocabulary.objects.get(id=vocab.id).language == 'es'
+
+
+
+# LOADING MANY VOCABULARIES
+################################################################################
+
+@pytest.mark.django_db
+def test_load_directory_and_manifest(tmp_path):
+    termsdir = tmp_path / 'terms'
+    termsdir.mkdir()
+    for name in ['Subjects', 'GradeLevels', 'Values']:
+        termsdata = get_termsdata([{"term": "A", "children": [{"term": "B"}]}])
+        termsdata['name'] = name
+        (termsdir / (name + '.yml')).write_text(yaml.dump(termsdata))
+    manifest = {
+        "type": "TermsManifest",
+        "jurisdictions": [{"name": "Ghana", "display_name": "Ghana NaCCA", "country": "GH"}],
+        "terms": ["terms"],
+    }
+    manifest_path = tmp_path / 'manifest.yml'
+    manifest_path.write_text(yaml.dump(manifest))
+    call_command('loadterms', '--manifest', str(manifest_path), '--workers', '2')
+    vocabs = ControlledVocabulary.objects.filter(jurisdiction__name='Ghana')
+    assert sorted(vocabs.values_list('name', flat=True)) == ['GradeLevels', 'Subjects', 'Values']
+    assert Term.objects.filter(vocabulary__in=vocabs, path='A/B').count() == 3
+    # reloading the whole directory keeps all term ids
+    term_ids = set(Term.objects.values_list('id', flat=True))
+    call_command('loadterms', '--overwrite', str(termsdir))
+    assert set(Term.objects.values_list('id', flat=True)) == term_ids
+
+
+@pytest.mark.django_db
+def test_load_invalid_file_loads_nothing(juri, tmp_path):
+    good = get_termsdata([{"term": "A"}])
+    bad = get_termsdata([{"term": "A"}, {"term": "A"}])
+    bad['name'] = 'Bad'
+    (tmp_path / 'Good.yml').write_text(yaml.dump(good))
+    (tmp_path / 'Bad.yml').write_text(yaml.dump(bad))
+    with pytest.raises(SystemExit):
+        call_command('loadterms', str(tmp_path / '*.yml'))
+    assert not ControlledVocabulary.objects.exists()
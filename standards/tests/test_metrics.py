@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+
+import pytest
+
+from standards.metrics import MetricsStore, MmapValues, get_metrics_store
+from standards.metrics import observe_histogram, read_mmap_values, render_metrics
+
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_mmap_values_roundtrip(tmp_path):
+    path = str(tmp_path / '1.db')
+    values = MmapValues(path)
+    for i in range(3000):      # grows the file past its initial size
+        values.inc('key{}'.format(i % 1500), 0.5)
+    values.close()
+    with open(path, 'rb') as dbf:
+        stored = read_mmap_values(dbf.read())
+    assert len(stored) == 1500 and set(stored.values()) == {1.0}
+    # reopening the file (same pid) keeps adding to the stored values
+    values = MmapValues(path)
+    values.inc('key0', 1.0)
+    values.close()
+    with open(path, 'rb') as dbf:
+        assert read_mmap_values(dbf.read())['key0'] == 2.0
+
+
+def increment_in_child(directory):
+    MetricsStore(directory).inc('shared', 2.0)
+
+
+def test_metrics_store_aggregates_processes(tmp_path):
+    store = MetricsStore(str(tmp_path))
+    store.inc('shared', 1.0)
+    processes = [multiprocessing.Process(target=increment_in_child, args=(str(tmp_path),)) for i in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert store.collect() == {'shared': 7.0}
+    # the files of the exited processes were merged into the file of this process
+    assert [path.name for path in tmp_path.iterdir()] == ['{}.db'.format(os.getpid())]
+    assert store.collect() == {'shared': 7.0}
+    store.close()
+
+
+@pytest.fixture
+def metrics_settings(settings, tmp_path):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    settings.ROCDATA_METRICS = True
+    settings.ROCDATA_METRICS_DIR = str(tmp_path / 'metrics')
+    settings.ROCDATA_METRICS_TOKEN = 'secret'
+    yield settings
+    get_metrics_store().close()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(vocabterms, client, metrics_settings):
+    for i in range(3):
+        assert client.get('/Ghana/terms/GradeLevels/full.json').status_code == 200
+    assert client.get('/Ghana/terms/GradeLevels/B2.html').status_code == 200
+    assert client.get('/Ghana/terms/Missing.json').status_code == 404
+    response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.content.decode('utf-8')
+    assert '# TYPE roc_request_duration_seconds histogram' in text
+    samples = parse_metrics(text)
+    full = 'route="jurisdiction-vocabulary-full",format="json",status="200"'
+    assert samples['roc_request_duration_seconds_count{' + full + '}'] == 3
+    assert samples['roc_request_duration_seconds_bucket{' + full + ',le="+Inf"}'] == 3
+    assert samples['roc_request_queries_count{' + full + '}'] == 3
+    assert samples['roc_response_bytes_sum{' + full + '}'] > 0
+    term = 'route="jurisdiction-vocabulary-term-detail",format="html",status="200"'
+    assert samples['roc_request_db_duration_seconds_count{' + term + '}'] == 1
+    missing = 'route="jurisdiction-vocabulary-detail",format="json",status="404"'
+    assert samples['roc_request_duration_seconds_count{' + missing + '}'] == 1
+    # the first full request misses the cache and the next ones hit it
+    assert samples['roc_cache_requests_total{route="jurisdiction-vocabulary-full",format="json",result="miss"}'] == 1
+    assert samples['roc_cache_requests_total{route="jurisdiction-vocabulary-full",format="json",result="hit"}'] == 2
+
+
+@pytest.mark.django_db
+def test_metrics_access(client, admin_client, metrics_settings):
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+    assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code == 200
+    assert admin_client.get('/metrics').status_code == 200
+    metrics_settings.ROCDATA_METRICS_TOKEN = None
+    assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer None').status_code == 403
+
+
+@pytest.mark.django_db
+def test_metrics_disabled(client, metrics_settings):
+    metrics_settings.ROCDATA_METRICS = False
+    assert client.get('/metrics').status_code == 404
+
+
+def test_render_metrics_buckets_are_cumulative():
+    store = MetricsStore()
+    for value in [0.001, 0.02, 0.02, 20.0]:
+        observe_histogram(store, 'roc_request_duration_seconds', ['r', 'json', '200'], value)
+    samples = parse_metrics(render_metrics(store.collect()))
+    labels = 'route="r",format="json",status="200"'
+    assert samples['roc_request_duration_seconds_bucket{' + labels + ',le="0.005"}'] == 1
+    assert samples['roc_request_duration_seconds_bucket{' + labels + ',le="0.025"}'] == 3
+    assert samples['roc_request_duration_seconds_bucket{' + labels + ',le="10.0"}'] == 3
+    assert samples['roc_request_duration_seconds_bucket{' + labels + ',le="+Inf"}'] == 4
+    assert samples['roc_request_duration_seconds_count{' + labels + '}'] == 4
+    assert samples['roc_request_duration_seconds_sum{' + labels + '}'] == pytest.approx(20.041)
@@ -0,0 +1,71 @@
+import logging
+
+import pytest
+
+from django.test import RequestFactory
+from rest_framework import serializers
+
+from standards.models import StandardsDocument
+from standards.nplusone import NPlusOneError, detect_n_plus_one, normalize_sql
+from standards.serializers import JurisdictionHyperlinkField
+
+
+class DocumentLinkSerializer(serializers.ModelSerializer):
+    jurisdiction = JurisdictionHyperlinkField()
+
+    class Meta:
+        model = StandardsDocument
+        fields = ['name', 'jurisdiction']
+
+
+@pytest.fixture
+def documents(juri):
+    for i in range(5):
+        StandardsDocument.objects.create(name='DOC{}'.format(i), title='Document {}'.format(i), jurisdiction=juri)
+
+
+def test_normalize_sql():
+    assert normalize_sql(
+        'SELECT "t1"."id" FROM "t1"\n  WHERE "t1"."id" IN (%s, %s, %s) AND "t1"."name" = \'it\'\'s\' LIMIT 21'
+    ) == 'SELECT "t1"."id" FROM "t1" WHERE "t1"."id" IN (...) AND "t1"."name" = ? LIMIT ?'
+    assert normalize_sql('SELECT * FROM t WHERE id = %s') == normalize_sql('SELECT * FROM t WHERE id = 42')
+
+
+@pytest.mark.django_db
+def test_detect_n_plus_one_names_serializer_field(documents):
+    request = RequestFactory().get('/')
+    serializer = DocumentLinkSerializer(StandardsDocument.objects.all(), many=True, context={'request': request})
+    with pytest.raises(NPlusOneError) as excinfo:
+        with detect_n_plus_one('documents', threshold=3):
+            serializer.data
+    report = str(excinfo.value)
+    assert report.startswith('N+1 queries in documents:')
+    assert '5 x SELECT' in report and 'FROM "standards_jurisdiction" WHERE "standards_jurisdiction"."id" = ?' in report
+    assert 'field DocumentLinkSerializer.jurisdiction at standards/tests/test_nplusone.py' in report
+    # fixed by select_related
+    queryset = StandardsDocument.objects.select_related('jurisdiction')
+    serializer = DocumentLinkSerializer(queryset, many=True, context={'request': request})
+    with detect_n_plus_one('documents', threshold=3) as detector:
+        serializer.data
+    assert sum(detector.counts.values()) == 1
+
+
+@pytest.mark.django_db
+def test_detect_n_plus_one_warn(documents, caplog):
+    with caplog.at_level(logging.WARNING, logger='standards.nplusone'):
+        with detect_n_plus_one('loop', threshold=3, action='warn'):
+            for document in StandardsDocument.objects.all():
+                document.jurisdiction.name
+    assert len(caplog.records) == 1
+    assert 'field (none) at standards/tests/test_nplusone.py' in caplog.records[0].getMessage()
+
+
+@pytest.mark.django_db
+def test_nplusone_middleware(documents, client, settings):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    assert client.get('/Ghana/terms.json').status_code == 200
+    settings.ROCDATA_NPLUSONE_THRESHOLD = 0
+    with pytest.raises(NPlusOneError, match='N\\+1 queries in GET /Ghana/terms.json'):
+        client.get('/Ghana/terms.json')
+    settings.ROCDATA_NPLUSONE = 'off'
+    assert client.get('/Ghana/terms.json').status_code == 200
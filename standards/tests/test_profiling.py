@@ -0,0 +1,86 @@
+import json
+import os
+import pstats
+
+import pytest
+
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+from standards.profiling import list_profiles, prune_profiles
+
+
+@pytest.fixture
+def profiling_settings(settings, tmp_path):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    settings.ROCDATA_PROFILES_DIR = str(tmp_path / 'profiles')
+    settings.ROCDATA_PROFILING_INTERVAL_SECONDS = 0
+    return settings
+
+
+@pytest.fixture
+def staff_token(db):
+    user = User.objects.create_user('staff', password='pass', is_staff=True)
+    return Token.objects.create(user=user).key
+
+
+@pytest.mark.django_db
+def test_profile_pstats(juri, client, profiling_settings, staff_token):
+    response = client.get('/Ghana.json', HTTP_X_PROFILE='pstats', HTTP_AUTHORIZATION='Token ' + staff_token)
+    assert response.status_code == 200
+    filename = response['X-Profile']
+    assert filename.startswith('request-') and filename.endswith('-GET-Ghana.json-{}.prof'.format(os.getpid()))
+    stats = pstats.Stats(os.path.join(profiling_settings.ROCDATA_PROFILES_DIR, filename))
+    assert any(func[2] == 'retrieve' for func in stats.stats)
+
+
+@pytest.mark.django_db
+def test_profile_speedscope(juri, client, profiling_settings, staff_token):
+    profiling_settings.ROCDATA_PROFILING_SAMPLE_INTERVAL = 0.0001
+    response = client.get('/Ghana.json?profile=speedscope', HTTP_AUTHORIZATION='Token ' + staff_token)
+    assert response.status_code == 200
+    with open(os.path.join(profiling_settings.ROCDATA_PROFILES_DIR, response['X-Profile'])) as inf:
+        data = json.load(inf)
+    profile = data['profiles'][0]
+    assert profile['type'] == 'sampled' and profile['name'] == 'GET /Ghana.json?profile=speedscope'
+    assert len(profile['samples']) == len(profile['weights']) > 0
+    frames = data['shared']['frames']
+    assert all(0 <= index < len(frames) for sample in profile['samples'] for index in sample)
+
+
+@pytest.mark.django_db
+def test_profile_requires_staff(juri, client, profiling_settings):
+    user = User.objects.create_user('user', password='pass')
+    token = Token.objects.create(user=user).key
+    for headers in [{}, {'HTTP_AUTHORIZATION': 'Token ' + token}, {'HTTP_AUTHORIZATION': 'Token bad'}]:
+        response = client.get('/Ghana.json', HTTP_X_PROFILE='1', **headers)
+        assert response.status_code == 200
+        assert 'X-Profile' not in response
+    assert not os.path.exists(profiling_settings.ROCDATA_PROFILES_DIR)
+    # staff users logged in to the admin
+    User.objects.create_user('staff', password='pass', is_staff=True)
+    client.login(username='staff', password='pass')
+    assert client.get('/Ghana.json?profile=1')['X-Profile'].endswith('.prof')
+
+
+@pytest.mark.django_db
+def test_profile_rate_limit(juri, client, profiling_settings, staff_token):
+    profiling_settings.ROCDATA_PROFILING_INTERVAL_SECONDS = 60
+    first = client.get('/Ghana.json?profile=1', HTTP_AUTHORIZATION='Token ' + staff_token)
+    second = client.get('/Ghana.json?profile=1', HTTP_AUTHORIZATION='Token ' + staff_token)
+    assert first['X-Profile'].endswith('.prof')
+    assert second.status_code == 200
+    assert second['X-Profile'] == 'rate-limited'
+    assert len(list_profiles(profiling_settings.ROCDATA_PROFILES_DIR)) == 1
+
+
+def test_prune_profiles(tmp_path):
+    for i in range(5):
+        (tmp_path / 'request-2026010{}T000000-GET-x-1.prof'.format(i)).write_text('')
+    (tmp_path / 'silk.prof').write_text('')
+    prune_profiles(str(tmp_path), 2)
+    assert [os.path.basename(p) for p in list_profiles(str(tmp_path))] == [
+        'request-20260103T000000-GET-x-1.prof',
+        'request-20260104T000000-GET-x-1.prof',
+    ]
+    assert (tmp_path / 'silk.prof').exists()
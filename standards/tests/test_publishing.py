@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from django.db import connections
+from django.test import RequestFactory
+
+from standards.publishing import get_base_url, get_publishing_context
+
+
+def test_default_publishing_context_per_request(settings):
+    settings.ROCDATA_PUBLISHING_CONTEXT = 'default'
+    rf = RequestFactory()
+    request1 = rf.get('/Ghana', HTTP_HOST='localhost:8000')
+    request2 = rf.get('/Ghana', HTTP_HOST='rocdata.global', secure=True)
+    pc1 = get_publishing_context(request=request1)
+    pc2 = get_publishing_context(request=request2)
+    assert get_base_url(pc1) == 'http://localhost:8000'
+    assert get_base_url(pc2) == 'https://rocdata.global'
+    assert get_publishing_context(request=request1) is pc1      # resolved once per request
+    assert settings.ROCDATA_PUBLISHING_CONTEXTS['default']['netloc'] is None
+    with pytest.raises(AttributeError):
+        pc1.netloc = 'example.org'
+    with pytest.raises(ValueError):
+        get_publishing_context()
+
+
+@pytest.mark.parametrize('name, base_url', [
+    ('rocserver', 'https://rocdata.global'),
+    ('w3id.org', 'https://w3id.org/rocdata'),
+    ('githubpages_rocserver', 'https://rocdata.github.io/rocserver/rocdata'),
+])
+def test_static_publishing_contexts(settings, name, base_url):
+    settings.ROCDATA_PUBLISHING_CONTEXT = name
+    assert get_base_url(get_publishing_context()) == base_url
+    request = RequestFactory().get('/Ghana', HTTP_HOST='localhost')
+    assert get_base_url(get_publishing_context(request=request)) == base_url
+
+
+@pytest.mark.django_db
+def test_concurrent_requests_from_different_hosts(juri, client, settings):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    settings.ROCDATA_PUBLISHING_CONTEXT = 'default'
+    hosts = ['localhost:8000', '127.0.0.1:8000', 'rocdata.global']
+    errors = []
+    barrier = threading.Barrier(len(hosts))
+
+    def get_uris(host):
+        barrier.wait()
+        try:
+            for _ in range(10):
+                uri = client.get('/Ghana.json', HTTP_HOST=host).json()['uri']
+                if uri != 'http://' + host + '/Ghana':
+                    errors.append((host, uri))
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=get_uris, args=(host,)) for host in hosts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,210 @@
+"""
+Query-count budgets for all the API endpoints: every endpoint is requested in
+every format for a small and a large synthetic data set, and the number of
+database queries must not grow with the data (tree endpoints may make one more
+query per extra level of the trees, which are deeper in the large data set). A table of the query counts and wall times is printed at the end,
+so it can be diffed between commits.
+"""
+import math
+import time
+
+import pytest
+
+from django.db import connection
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+
+from standards.models import Jurisdiction, ControlledVocabulary, Term, TermRelation
+from standards.models import StandardsDocument, StandardNode
+from standards.models import StandardsCrosswalk, StandardNodeRelation
+from standards.models import ContentCollection, ContentNode, ContentNodeRelation
+from standards.models import ContentCorrelation, ContentStandardRelation
+from standards.registry import term_registry
+from standards.synthetic import generate_synthetic_data
+
+
+SMALL_SIZE = 10
+LARGE_SIZE = 100
+
+# Maximum depth of the synthetic trees of each size, which grows like log2(size)
+TREE_DEPTHS = {SMALL_SIZE: math.ceil(math.log2(SMALL_SIZE)), LARGE_SIZE: math.ceil(math.log2(LARGE_SIZE))}
+
+# Querystrings used to request each format (the same as the format suffixes)
+FORMATS = {
+    'json': '?format=json',
+    'html': '?format=html',
+    'api': '?format=api',
+}
+
+# Endpoint name -> (path template, is_tree). The path templates are filled in
+# using the objects returned by `get_path_kwargs`.
+ENDPOINTS = {
+    'jurisdiction-detail': ('/{juri}', False),
+    'jurisdiction-vocabulary-list': ('/{juri}/terms', False),
+    'jurisdiction-vocabulary-detail': ('/{juri}/terms/{vocab}', False),
+    'jurisdiction-vocabulary-full': ('/{juri}/terms/{vocab}/full', True),
+    'jurisdiction-vocabulary-term-list': ('/{juri}/terms/{vocab}/', False),
+    'jurisdiction-vocabulary-term-detail': ('/{juri}/terms/{vocab}/{term}', False),
+    'jurisdiction-termrelation-list': ('/{juri}/termrels', False),
+    'jurisdiction-termrelation-detail': ('/{juri}/termrels/{termrel}', False),
+    'jurisdiction-document-list': ('/{juri}/documents', False),
+    'jurisdiction-document-detail': ('/{juri}/documents/{document}', False),
+    'jurisdiction-document-full': ('/{juri}/documents/{document}/full', True),
+    'jurisdiction-standardnode-list': ('/{juri}/standardnodes', False),
+    'jurisdiction-standardnode-detail': ('/{juri}/standardnodes/{standardnode}', False),
+    'jurisdiction-standardnode-subtree': ('/{juri}/standardnodes/{standardnode}/subtree', False),
+    'jurisdiction-standardscrosswalk-list': ('/{juri}/standardscrosswalks', False),
+    'jurisdiction-standardscrosswalk-detail': ('/{juri}/standardscrosswalks/{crosswalk}', False),
+    'jurisdiction-standardnoderel-list': ('/{juri}/standardnoderels', False),
+    'jurisdiction-standardnoderel-detail': ('/{juri}/standardnoderels/{standardnoderel}', False),
+    'jurisdiction-contentcollection-list': ('/{juri}/contentcollections', False),
+    'jurisdiction-contentcollection-detail': ('/{juri}/contentcollections/{collection}', False),
+    'jurisdiction-contentcollection-full': ('/{juri}/contentcollections/{collection}/full', True),
+    'jurisdiction-contentnode-list': ('/{juri}/contentnodes', False),
+    'jurisdiction-contentnode-detail': ('/{juri}/contentnodes/{contentnode}', False),
+    'jurisdiction-contentnode-subtree': ('/{juri}/contentnodes/{contentnode}/subtree', False),
+    'jurisdiction-contentnoderel-list': ('/{juri}/contentnoderels', False),
+    'jurisdiction-contentnoderel-detail': ('/{juri}/contentnoderels/{contentnoderel}', False),
+    'jurisdiction-contentcorrelation-list': ('/{juri}/contentcorrelations', False),
+    'jurisdiction-contentcorrelation-detail': ('/{juri}/contentcorrelations/{correlation}', False),
+    'jurisdiction-contentstandardrel-list': ('/{juri}/contentstandardrels', False),
+    'jurisdiction-contentstandardrel-detail': ('/{juri}/contentstandardrels/{contentstandardrel}', False),
+}
+
+# URL names that are not API endpoints over the standards data
+NON_API_URL_NAMES = {
+    'homepage', 'pagesroot', 'page', 'pagesroot-noslash', 'page-noslash',
+    'jurisdiction-list',                                    # shadowed by the homepage
+    'skos-dump', 'jurisdiction-skos-dump',                  # streamed, tested in test_skos.py
+    'jurisdiction-vocabulary-term-list-with-format-suffix',  # same view as the term list
+    'metrics',                                              # no DB queries, tested in test_metrics.py
+    'admin-slowqueries',                                    # staff-only, tested in test_slowqueries.py
+}
+
+# (endpoint, format) -> {size: (num_queries, seconds)}, reported after the tests
+QUERY_BUDGET_RESULTS = {}
+
+
+
+def count_queries(captured_queries):
+    """
+    Return the number of queries excluding those of the django-silk profiler.
+    """
+    return sum(1 for query in captured_queries if 'silk_' not in query['sql'])
+
+
+def get_path_kwargs(juri):
+    """
+    Return the values used to fill in the endpoint path templates for `juri`.
+    """
+    vocab = ControlledVocabulary.objects.filter(jurisdiction=juri).first()
+    return dict(
+        juri=juri.name,
+        vocab=vocab.name,
+        term=Term.objects.filter(vocabulary=vocab).first().path,
+        termrel=TermRelation.objects.filter(jurisdiction=juri).first().id,
+        document=StandardsDocument.objects.filter(jurisdiction=juri).first().id,
+        standardnode=StandardNode.objects.filter(document__jurisdiction=juri, level=1).first().id,
+        crosswalk=StandardsCrosswalk.objects.filter(jurisdiction=juri).first().id,
+        standardnoderel=StandardNodeRelation.objects.filter(crosswalk__jurisdiction=juri).first().id,
+        collection=ContentCollection.objects.filter(jurisdiction=juri).first().id,
+        contentnode=ContentNode.objects.filter(collection__jurisdiction=juri, level=1).first().id,
+        contentnoderel=ContentNodeRelation.objects.filter(jurisdiction=juri).first().id,
+        correlation=ContentCorrelation.objects.filter(jurisdiction=juri).first().id,
+        contentstandardrel=ContentStandardRelation.objects.filter(correlation__jurisdiction=juri).first().id,
+    )
+
+
+def get_tree_depth(juri):
+    """
+    Return the number of levels of the deepest standards or content tree of `juri`.
+    """
+    std_depth = StandardNode.objects.filter(document__jurisdiction=juri).aggregate(depth=Max('level'))['depth']
+    content_depth = ContentNode.objects.filter(collection__jurisdiction=juri).aggregate(depth=Max('level'))['depth']
+    return max(std_depth, content_depth) + 1
+
+
+def measure(client, path):
+    """
+    Return the number of queries and the wall time of a GET request to `path`.
+    The request is made twice and the second one is measured, so per-process
+    caches (e.g. the term registry) are warm.
+    """
+    response = client.get(path)
+    assert response.status_code == 200, path
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        response = client.get(path)
+        elapsed = time.perf_counter() - start
+    assert response.status_code == 200, path
+    return count_queries(ctx.captured_queries), elapsed
+
+
+@pytest.fixture(scope='module', autouse=True)
+def query_budget_report(request):
+    """
+    Print the table of query counts and wall times after the tests of this module.
+    """
+    yield
+    if not QUERY_BUDGET_RESULTS:
+        return
+    reporter = request.config.pluginmanager.get_plugin('terminalreporter')
+    header = '{:<42} {:<5} {:>8} {:>8} {:>10} {:>10}'.format(
+        'endpoint', 'fmt', 'q_small', 'q_large', 'ms_small', 'ms_large')
+    lines = ['', 'Query budgets (sizes {} and {})'.format(SMALL_SIZE, LARGE_SIZE), header]
+    for (name, fmt), results in sorted(QUERY_BUDGET_RESULTS.items()):
+        (q_small, t_small), (q_large, t_large) = results[SMALL_SIZE], results[LARGE_SIZE]
+        lines.append('{:<42} {:<5} {:>8} {:>8} {:>10.1f} {:>10.1f}'.format(
+            name, fmt, q_small, q_large, t_small * 1000, t_large * 1000))
+    capture_manager = request.config.pluginmanager.get_plugin('capturemanager')
+    with capture_manager.global_and_fixture_disabled():
+        for line in lines:
+            reporter.write_line(line)
+    QUERY_BUDGET_RESULTS.clear()
+
+
+
+def test_all_api_routes_have_budgets():
+    url_names = set()
+    resolvers = [get_resolver()]
+    while resolvers:
+        for pattern in resolvers.pop().url_patterns:
+            if hasattr(pattern, 'url_patterns'):
+                if pattern.namespace is None:  # skip the admin and silk apps
+                    resolvers.append(pattern)
+            elif pattern.name and not pattern.name.startswith('django-admindocs-'):  # (rocdocs)
+                url_names.add(pattern.name)
+    missing = url_names - set(ENDPOINTS) - NON_API_URL_NAMES
+    assert not missing, 'Add query budgets for: {}'.format(sorted(missing))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(ENDPOINTS))
+def test_query_budget(name, client, settings):
+    # measure the endpoints without the profiler's own queries and overhead
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    path_template, is_tree = ENDPOINTS[name]
+    # the large data set is added after measuring the small one, so queries
+    # that are not scoped to a jurisdiction (e.g. form choices) also see growth
+    results, depths = {}, {}
+    for size, prefix in [(SMALL_SIZE, 'Small'), (LARGE_SIZE, 'Large')]:
+        generate_synthetic_data(num_jurisdictions=1, num_terms=size, num_nodes=size,
+                                num_relations=size, depth=TREE_DEPTHS[size], prefix=prefix)
+        term_registry.invalidate()
+        juri = Jurisdiction.objects.get(name=prefix + '0')
+        depths[size] = get_tree_depth(juri)
+        path = path_template.format(**get_path_kwargs(juri))
+        for fmt, querystring in FORMATS.items():
+            results.setdefault(fmt, {})[size] = measure(client, path + querystring)
+    assert depths[LARGE_SIZE] > depths[SMALL_SIZE]
+    # trees may need an extra query per level
+    allowance = depths[LARGE_SIZE] - depths[SMALL_SIZE] if is_tree else 0
+    failures = []
+    for fmt, fmt_results in results.items():
+        QUERY_BUDGET_RESULTS[(name, fmt)] = fmt_results
+        num_small, num_large = fmt_results[SMALL_SIZE][0], fmt_results[LARGE_SIZE][0]
+        if num_large > num_small + allowance:
+            failures.append('{}: {} queries for {} items but {} queries for {} items'.format(
+                fmt, num_small, SMALL_SIZE, num_large, LARGE_SIZE))
+    assert not failures, '\n'.join(failures)
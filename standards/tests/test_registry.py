@@ -0,0 +1,118 @@
+import pytest
+
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+from standards.models import ControlledVocabulary, Jurisdiction, StandardsDocument, Term, TermRelation
+from standards.models.terms import TERM_REL_KINDS
+from standards.registry import term_registry
+from standards.utils import get_default_standard_node_relation_kind
+
+
+@pytest.mark.django_db
+def test_registry_lookups(juri, vocab, vocabterms):
+    term_registry.ensure_loaded()
+    b2, b22 = vocabterms['b2'], vocabterms['b22']
+    with CaptureQueriesContext(connection) as ctx:
+        term = term_registry.get_term('Ghana', 'GradeLevels', 'B2/2')
+        assert term.id == b22.id
+        assert term.uri == b22.uri
+        assert term_registry.get_uri(b2.id) == b2.uri
+        assert term_registry.get_label(b2.id) == 'Basic 2'
+        assert term_registry.get_parent(b22.id).id == b2.id
+        assert term_registry.get_parent(b2.id) is None
+        assert [t.id for t in term_registry.get_children(b2.id)] == [b22.id]
+        assert [t.id for t in term_registry.get_descendants(b2.id)] == [b22.id]
+        assert term_registry.get_vocabulary('Ghana', 'GradeLevels').uri == vocab.uri
+    assert len(ctx.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_registry_hierarchy_skips_missing_paths(vocab):
+    a = Term.objects.create(path='A', label='A', vocabulary=vocab, sort_order=1)
+    abc = Term.objects.create(path='A/B/C', label='C', vocabulary=vocab, sort_order=2)
+    abd = Term.objects.create(path='A/B/D', label='D', vocabulary=vocab, sort_order=1)
+    Term.objects.create(path='AB', label='AB', vocabulary=vocab)
+    assert term_registry.get_parent(abc.id).id == a.id
+    assert [t.id for t in term_registry.get_children(a.id)] == [abd.id, abc.id]
+    assert set(t.id for t in term_registry.get_descendants(a.id)) == set([abc.id, abd.id])
+
+
+@pytest.mark.django_db
+def test_registry_reloads_after_save(vocab, vocabterms):
+    b1 = vocabterms['b1']
+    assert term_registry.get_label(b1.id) == 'Basic 1'
+    generation = term_registry.generation
+    b1.label = 'Basic One'
+    b1.save()
+    assert term_registry.generation > generation
+    assert term_registry.get_label(b1.id) == 'Basic One'
+    b1.delete()
+    assert term_registry.get_term_by_id(b1.id) is None
+
+
+@pytest.mark.django_db
+def test_term_hyperlinks_use_registry(juri, vocab, vocabterms, client):
+    b1, b22 = vocabterms['b1'], vocabterms['b22']
+    rel = TermRelation.objects.create(source=b1, kind=TERM_REL_KINDS.related, target=b22, jurisdiction=juri)
+    response = client.get('/Ghana/termrels/' + rel.id + '.json')
+    data = response.json()
+    assert data['source'].endswith(b1.uri)
+    assert data['target'].endswith(b22.uri)
+
+
+@pytest.mark.django_db
+def test_registry_detects_changes_from_other_processes(vocab, vocabterms):
+    b1 = vocabterms['b1']
+    assert term_registry.get_label(b1.id) == 'Basic 1'
+    # queryset updates don't send signals, like the changes made by other workers
+    Term.objects.filter(id=b1.id).update(label='Basic One', date_modified=timezone.now())
+    assert term_registry.get_label(b1.id) == 'Basic 1'
+    term_registry.check_database()          # done at the start of each request
+    assert term_registry.get_label(b1.id) == 'Basic One'
+    with CaptureQueriesContext(connection) as ctx:
+        term_registry.check_database()
+        assert term_registry.get_label(b1.id) == 'Basic One'
+    assert len(ctx.captured_queries) == 1   # the fingerprint query
+
+
+@pytest.mark.django_db
+def test_term_lookups_use_registry(vocab, vocabterms):
+    b2, b22 = vocabterms['b2'], vocabterms['b22']
+    term_registry.ensure_loaded()
+    term = Term.objects.get(id=b22.id)
+    with CaptureQueriesContext(connection) as ctx:
+        parent = term.get_parent()
+        assert parent.id == b2.id and parent.path == 'B2' and parent.label == 'Basic 2'
+        assert Term.objects.get_by_natural_key('Ghana', 'GradeLevels', 'B2/2').id == b22.id
+    assert len(ctx.captured_queries) == 0
+    assert parent.vocabulary == vocab
+    orphan = Term.objects.create(path='C/1', label='C1', vocabulary=vocab)
+    with pytest.raises(Term.DoesNotExist):
+        orphan.get_parent()
+
+
+@pytest.mark.django_db
+def test_default_terms_use_registry(juri):
+    global_juri = Jurisdiction.objects.create(name='Global', display_name='Global Terms')
+    licenses = ControlledVocabulary.objects.create(name='LicenseKinds', jurisdiction=global_juri)
+    arr = Term.objects.create(path='All_Rights_Reserved', label='All Rights Reserved', vocabulary=licenses)
+    term_registry.ensure_loaded()
+    with CaptureQueriesContext(connection) as ctx:
+        doc = StandardsDocument(name='GHANA-MATH', title='Mathematics', jurisdiction=juri)
+    assert len(ctx.captured_queries) == 0
+    assert doc.license_id == arr.id
+    assert get_default_standard_node_relation_kind() is None
+
+
+@pytest.mark.django_db
+def test_registry_checks_are_rate_limited(vocab, vocabterms, settings):
+    settings.ROCDATA_TERM_REGISTRY_CHECK_SECONDS = 60
+    term_registry.ensure_loaded()
+    term_registry._checked_at = None
+    with CaptureQueriesContext(connection) as ctx:
+        for i in range(3):
+            term_registry.check_database()
+            term_registry.get_label(vocabterms['b1'].id)
+    assert len(ctx.captured_queries) == 1   # only the first request compares the fingerprint
@@ -0,0 +1,55 @@
+import gzip
+
+import pytest
+
+from django.core.management import call_command
+
+from standards.models import TermRelation
+from standards.models.terms import TERM_REL_KINDS
+from standards.skos import Literal, format_node
+
+
+BASE = 'https://rocdata.global'
+
+
+def test_format_node():
+    assert format_node('http://ex.org/a b') == '<http://ex.org/a%20b>'
+    assert format_node(Literal('say "hi"\n', 'en')) == '"say \\"hi\\"\\n"@en'
+    assert format_node(Literal('B1')) == '"B1"'
+
+
+@pytest.mark.django_db
+def test_dumpskos_command(juri, vocab, vocabterms, tmp_path):
+    b1, b22 = vocabterms['b1'], vocabterms['b22']
+    TermRelation.objects.create(source=b1, kind=TERM_REL_KINDS.related, target=b22, jurisdiction=juri)
+    TermRelation.objects.create(source=b1, kind=TERM_REL_KINDS.exactMatch, target_uri='http://ex.org/b1', jurisdiction=juri)
+    output = tmp_path / 'skos.nt.gz'
+    call_command('dumpskos', '--base_url', BASE + '/', '--output', str(output))
+    lines = set(gzip.open(str(output)).read().decode('utf-8').splitlines())
+    skos = 'http://www.w3.org/2004/02/skos/core#'
+    vocab_iri = '<' + BASE + '/Ghana/terms/GradeLevels>'
+    b2_iri = '<' + BASE + '/Ghana/terms/GradeLevels/B2>'
+    b22_iri = '<' + BASE + '/Ghana/terms/GradeLevels/B2/2>'
+    assert vocab_iri + ' <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <' + skos + 'ConceptScheme> .' in lines
+    assert b22_iri + ' <' + skos + 'prefLabel> "Basic 2.2" .' in lines
+    assert b22_iri + ' <' + skos + 'broader> ' + b2_iri + ' .' in lines
+    assert b2_iri + ' <' + skos + 'topConceptOf> ' + vocab_iri + ' .' in lines
+    b1_iri = '<' + BASE + '/Ghana/terms/GradeLevels/B1>'
+    assert b1_iri + ' <' + skos + 'related> ' + b22_iri + ' .' in lines
+    assert b1_iri + ' <' + skos + 'exactMatch> <http://ex.org/b1> .' in lines
+
+
+@pytest.mark.django_db
+def test_skos_endpoint(juri, vocab, vocabterms, client):
+    response = client.get('/Ghana/skos.ttl', HTTP_ACCEPT_ENCODING='gzip')
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    text = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+    assert '@prefix skos: <http://www.w3.org/2004/02/skos/core#> .' in text
+    assert '<http://testserver/Ghana/terms/GradeLevels/B2/2> skos:broader <http://testserver/Ghana/terms/GradeLevels/B2> .' in text
+    #
+    response = client.get('/skos.nt')
+    text = b''.join(response.streaming_content).decode('utf-8')
+    assert '<http://testserver/Ghana/terms/GradeLevels/B1> <http://www.w3.org/2004/02/skos/core#inScheme>' in text
+    #
+    assert client.get('/Nowhere/skos.nt').status_code == 404
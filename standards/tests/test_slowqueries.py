@@ -0,0 +1,93 @@
+import json
+from unittest import mock
+
+import pytest
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection, transaction
+
+from standards.slowqueries import read_slow_queries, summarize_slow_queries
+from standards.timing import RequestTimings
+
+
+@pytest.fixture
+def slow_query_settings(settings, tmp_path):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    settings.ROCDATA_SLOW_QUERY_SECONDS = 0.0    # every query is slow
+    settings.ROCDATA_SLOW_QUERY_SAMPLE_RATE = 1.0
+    settings.ROCDATA_SLOW_QUERY_LOG = str(tmp_path / 'logs' / 'slowqueries.log')
+    return settings
+
+
+@pytest.mark.django_db
+def test_slow_queries_are_logged_with_explain(vocabterms, client, slow_query_settings):
+    response = client.get('/Ghana/terms/GradeLevels.json')
+    assert response.status_code == 200
+    with open(slow_query_settings.ROCDATA_SLOW_QUERY_LOG) as logf:
+        entries = [json.loads(line) for line in logf]
+    assert entries
+    vocab_query = entries[0]
+    assert 'FROM "standards_controlledvocabulary"' in vocab_query['sql']
+    assert vocab_query['path'] == '/Ghana/terms/GradeLevels.json'
+    assert vocab_query['view'] == 'ControlledVocabularyViewSet.retrieve'
+    assert vocab_query['field'] is None
+    assert "'GradeLevels'" in vocab_query['params']
+    assert vocab_query['explain'] and any('standards_controlledvocabulary' in line for line in vocab_query['explain'])
+    assert vocab_query['stack'][0].startswith('standards/api.py')
+    # the queries made while serializing are attributed to the serializer field
+    terms_query = next(entry for entry in entries if 'FROM "standards_term"' in entry['sql'])
+    assert terms_query['field'] == 'ControlledVocabularySerializer.terms'
+    assert read_slow_queries()[0] == entries[-1]
+
+
+@pytest.mark.django_db
+def test_slow_queries_threshold(juri, client, slow_query_settings):
+    slow_query_settings.ROCDATA_SLOW_QUERY_SECONDS = 60.0
+    assert client.get('/Ghana.json').status_code == 200
+    assert read_slow_queries() == []
+
+
+def test_summarize_slow_queries():
+    entries = [
+        {'sql': 'A', 'duration_ms': 10.0},
+        {'sql': 'B', 'duration_ms': 50.0},
+        {'sql': 'A', 'duration_ms': 30.0},
+    ]
+    summaries = summarize_slow_queries(entries)
+    assert [(s['sql'], s['count'], s['max_ms'], s['mean_ms']) for s in summaries] == [
+        ('B', 1, 50.0, 50.0),
+        ('A', 2, 30.0, 20.0),
+    ]
+    assert summaries[1]['latest'] == entries[0]
+
+
+@pytest.mark.django_db
+def test_slow_queries_admin_report(juri, client, slow_query_settings):
+    client.get('/Ghana.json')
+    assert client.get('/admin/slowqueries/').status_code == 302    # login required
+    User.objects.create_superuser('admin', 'admin@example.org', 'pass')
+    client.login(username='admin', password='pass')
+    response = client.get('/admin/slowqueries/')
+    assert response.status_code == 200
+    assert b'standards_jurisdiction' in response.content
+    assert b'JurisdictionViewSet.retrieve' in response.content
+
+
+@pytest.mark.django_db
+def test_failed_and_unexplainable_queries(juri, slow_query_settings):
+    timings = RequestTimings(path='/test')
+    with pytest.raises(DatabaseError):
+        with transaction.atomic(), connection.execute_wrapper(timings), connection.cursor() as cursor:
+            cursor.execute('SELECT * FROM missing_table')
+    assert read_slow_queries() == []
+    # a query that can't be explained is logged, and the transaction continues
+    with transaction.atomic(), connection.execute_wrapper(timings), connection.cursor() as cursor:
+        cursor.execute('SELECT id, name FROM standards_jurisdiction WHERE name = %s', ['Ghana'])
+        with mock.patch.object(connection.ops, 'explain_query_prefix', return_value='NOT SQL'):
+            cursor.execute('SELECT COUNT(*) FROM standards_jurisdiction')
+        cursor.execute('SELECT COUNT(*) FROM standards_jurisdiction')
+        assert cursor.fetchone()[0] == 1
+    entries = read_slow_queries()[::-1]
+    assert len(entries) == 3 and timings.queries == 4
+    assert entries[1]['explain'][0].startswith('EXPLAIN failed: ')
+    assert not entries[0]['explain'][0].startswith('EXPLAIN failed: ')
@@ -0,0 +1,54 @@
+import gzip
+import json
+
+import pytest
+
+from django.test import RequestFactory, override_settings
+
+from standards.models import StandardsDocument, StandardNode
+from standards.snapshots import SnapshotMiddleware, export_snapshot
+
+
+@pytest.fixture
+def published_doc(juri):
+    doc = StandardsDocument.objects.create(name='GH-MATH', title='Ghana Math', jurisdiction=juri, publication_status='published')
+    root = StandardNode.objects.create(document=doc, description='ROOT')
+    StandardNode.objects.create(document=doc, parent=root, notation='B1', description='Basic 1')
+    return doc
+
+
+def not_from_snapshot(request):
+    raise AssertionError('request not served from snapshot ' + request.path)
+
+
+@pytest.mark.django_db
+def test_export_and_serve_snapshot(juri, vocab, vocabterms, published_doc, tmp_path, django_assert_num_queries):
+    StandardsDocument.objects.create(name='GH-DRAFT', title='Draft', jurisdiction=juri, publication_status='draft')
+    snapshot_path = str(tmp_path / 'snapshot.sqlite3')
+    count = export_snapshot(snapshot_path, 'testserver', scheme='http')
+    # juri + vocab (detail and full) + 3 terms + document (detail and full) + 2 nodes
+    assert count == 10
+    factory = RequestFactory()
+    with override_settings(ROCDATA_SNAPSHOT_PATH=snapshot_path):
+        middleware = SnapshotMiddleware(not_from_snapshot)
+        with django_assert_num_queries(0):
+            response = middleware(factory.get('/Ghana/documents/' + published_doc.id + '/full.json'))
+            data = json.loads(response.content)
+            assert data['title'] == 'Ghana Math'
+            assert data['children'][0]['notation'] == 'B1'
+            assert data['children'][0]['uri'].startswith('http://testserver/Ghana/standardnodes/')
+            #
+            response = middleware(factory.get('/Ghana/terms/GradeLevels/B2/2', HTTP_ACCEPT='application/json',
+                                              HTTP_ACCEPT_ENCODING='gzip'))
+            assert response['Content-Encoding'] == 'gzip'
+            assert json.loads(gzip.decompress(response.content))['label'] == 'Basic 2.2'
+            #
+            response = middleware(factory.get('/Ghana.json', HTTP_IF_NONE_MATCH=response['ETag']))
+            assert response.status_code == 200
+            response = middleware(factory.get('/Ghana.json', HTTP_IF_NONE_MATCH=response['ETag']))
+            assert response.status_code == 304
+        # drafts and HTML pages are not in the snapshot
+        with pytest.raises(AssertionError):
+            middleware(factory.get('/Ghana/documents.json'))
+        with pytest.raises(AssertionError):
+            middleware(factory.get('/Ghana'))
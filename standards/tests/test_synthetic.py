@@ -0,0 +1,44 @@
+import pytest
+
+from django.core.management import call_command
+
+from standards.models import Jurisdiction, StandardNode, ContentNode, ContentStandardRelation
+from standards.synthetic import generate_synthetic_data
+
+
+TREE_FIELDS = ('id', 'parent_id', 'tree_id', 'level', 'lft', 'rght')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('model', [StandardNode, ContentNode])
+def test_synthetic_trees_have_correct_mptt_fields(model):
+    generate_synthetic_data(num_jurisdictions=2, num_terms=20, num_nodes=300, num_relations=10, depth=3)
+    generated = set(model.objects.values_list(*TREE_FIELDS))
+    assert len(generated) == 2 * 301
+    assert max(level for _, _, _, level, _, _ in generated) == 3
+    # rebuilding the trees from the parent links must not change anything
+    model._tree_manager.rebuild()
+    assert set(model.objects.values_list(*TREE_FIELDS)) == generated
+
+
+@pytest.mark.django_db
+def test_synthetic_data_is_seeded():
+    def get_descriptions(prefix, seed):
+        generate_synthetic_data(num_jurisdictions=1, num_terms=10, num_nodes=50, num_relations=10,
+                                depth=2, seed=seed, prefix=prefix)
+        nodes = StandardNode.objects.filter(document__jurisdiction__name=prefix + '0')
+        return list(nodes.order_by('lft').values_list('notation', 'description'))
+    descriptions = get_descriptions('A', seed=1)
+    assert descriptions == get_descriptions('B', seed=1)
+    assert descriptions != get_descriptions('C', seed=2)
+
+
+@pytest.mark.django_db
+def test_generate_synthetic_command():
+    call_command('generate_synthetic', jurisdictions=2, nodes=40, contentnodes=60, correlations=30, prefix='Cmd')
+    assert Jurisdiction.objects.filter(name__startswith='Cmd').count() == 2
+    assert StandardNode.objects.filter(document__jurisdiction__name='Cmd1').count() == 41
+    assert ContentNode.objects.filter(collection__jurisdiction__name='Cmd1').count() == 61
+    assert ContentStandardRelation.objects.filter(correlation__jurisdiction__name='Cmd1').count() == 30
+    with pytest.raises(SystemExit):
+        call_command('generate_synthetic', jurisdictions=1, prefix='Cmd')
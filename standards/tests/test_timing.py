@@ -0,0 +1,59 @@
+import json
+import logging
+import re
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from standards.timing import timing_phase, _request_timings
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@pytest.fixture
+def no_silk(settings):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+
+
+def test_timing_phase_outside_requests():
+    with timing_phase('serialize'):
+        pass
+    assert _request_timings.get() is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fmt, phases', [
+    ('json', ['db', 'serialize', 'process_uris', 'render', 'total']),
+    ('html', ['db', 'serialize', 'process_uris', 'htmlize', 'render', 'total']),
+])
+def test_server_timing_header(vocabterms, client, no_silk, fmt, phases):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get('/Ghana/terms/GradeLevels/B2.' + fmt)
+    assert response.status_code == 200
+    metrics = parse_server_timing(response['Server-Timing'])
+    assert list(metrics) == phases
+    assert metrics['db']['desc'] == '"{} queries"'.format(len(ctx.captured_queries))
+    durations = dict((name, float(params['dur'])) for name, params in metrics.items())
+    assert all(duration >= 0 for duration in durations.values())
+    assert durations['total'] >= durations['serialize'] + durations['render']
+
+
+@pytest.mark.django_db
+def test_server_timing_log(juri, client, no_silk, caplog):
+    with caplog.at_level(logging.INFO, logger='standards.timing'), CaptureQueriesContext(connection) as ctx:
+        response = client.get('/Ghana.json')
+    records = [json.loads(record.getMessage()) for record in caplog.records if record.name == 'standards.timing']
+    assert len(records) == 1
+    record = records[0]
+    assert record['method'] == 'GET' and record['path'] == '/Ghana.json' and record['status'] == 200
+    assert record['queries'] == len(ctx.captured_queries)
+    assert set(record) >= {'total_ms', 'db_ms', 'serialize_ms', 'process_uris_ms', 'render_ms'}
+    assert re.search(r'total;dur={}\b'.format(record['total_ms']), response['Server-Timing'])
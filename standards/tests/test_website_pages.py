@@ -0,0 +1,116 @@
+import json
+import os
+import time
+
+import pytest
+import requests
+
+from django.core.management import call_command
+
+from website import views
+from website.pagecache import PageCache
+
+
+GDOC_HTML = b"""<html><head><style>.c1 { color: red }</style></head>
+<body><p>Welcome to <a href="https://www.google.com/url?q=https://rocdata.global/pages/background&amp;sa=D">ROC</a></p></body></html>"""
+
+
+class FakeGoogleDocs:
+    """
+    Stands in for ``requests.get`` of the google docs embed URLs.
+    """
+    def __init__(self):
+        self.urls = []
+        self.down = False
+
+    def __call__(self, url, timeout=None):
+        self.urls.append(url)
+        if self.down:
+            raise requests.ConnectionError('google docs is down')
+        response = requests.Response()
+        response.status_code = 200
+        response._content = GDOC_HTML
+        return response
+
+
+@pytest.fixture
+def gdocs(settings, tmp_path, monkeypatch):
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('silk.')]
+    settings.WEBSITE_PAGES_CACHE_DIR = str(tmp_path / 'pages')
+    settings.WEBSITE_PAGES_CACHE_SECONDS = 300
+    fake = FakeGoogleDocs()
+    monkeypatch.setattr(views.requests, 'get', fake)
+    return fake
+
+
+@pytest.mark.django_db
+def test_pages_are_cached(client, gdocs, settings):
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'.c1 { color: red }' in response.content
+    assert b'href="https://rocdata.global/pages/background"' in response.content
+    assert 'cache;desc="0 hits 1 misses"' in response['Server-Timing']
+    response = client.get('/')
+    assert response.status_code == 200
+    assert 'cache;desc="1 hits 0 misses"' in response['Server-Timing']
+    assert client.get('/pages/glossary').status_code == 200
+    assert gdocs.urls == [
+        settings.WEBSITE_PAGES_GOOGLE_DOCS['homepage']['embed_url'],
+        settings.WEBSITE_PAGES_GOOGLE_DOCS['glossary']['embed_url'],
+    ]
+    with open(os.path.join(settings.WEBSITE_PAGES_CACHE_DIR, 'homepage.json')) as inf:
+        assert json.load(inf)['context']['title'] == settings.WEBSITE_PAGES_GOOGLE_DOCS['homepage']['title']
+
+
+def test_page_cache_stale_while_revalidate(gdocs, settings):
+    cache = PageCache(settings.WEBSITE_PAGES_CACHE_DIR, 60, views.get_context_from_gdoc_html)
+    context = cache.get('homepage')
+    assert len(gdocs.urls) == 1
+    # other processes use the copy on disk
+    other_cache = PageCache(settings.WEBSITE_PAGES_CACHE_DIR, 60, views.get_context_from_gdoc_html)
+    assert other_cache.get('homepage') == context
+    assert len(gdocs.urls) == 1
+
+    # stale copies are served while they are refreshed in the background
+    path = cache.get_path('homepage')
+    with open(path) as inf:
+        saved = json.load(inf)
+    saved['fetched_at'] -= 120
+    with open(path, 'w') as outf:
+        json.dump(saved, outf)
+    cache.entries['homepage']['checked_at'] -= 120
+    gdocs.down = True
+    assert cache.get('homepage') == context
+    for _ in range(100):
+        if not cache.refreshing:
+            break
+        time.sleep(0.01)
+    assert len(gdocs.urls) == 2
+    # the failed refresh keeps the stale copy and waits for the next ttl
+    assert cache.get('homepage') == context
+    assert len(gdocs.urls) == 2
+
+    gdocs.down = False
+    entry = cache.refresh('homepage')
+    assert entry['fetched_at'] > saved['fetched_at']
+    assert len(gdocs.urls) == 3
+
+
+def test_page_cache_errors_without_copy(gdocs, settings):
+    gdocs.down = True
+    cache = PageCache(settings.WEBSITE_PAGES_CACHE_DIR, 60, views.get_context_from_gdoc_html)
+    with pytest.raises(requests.ConnectionError):
+        cache.get('homepage')
+
+
+def test_prebuild_pages(gdocs, settings, capsys):
+    call_command('prebuild_pages')
+    assert len(gdocs.urls) == len(settings.WEBSITE_PAGES_GOOGLE_DOCS)
+    assert sorted(os.listdir(settings.WEBSITE_PAGES_CACHE_DIR)) == sorted(
+        name + '.json' for name in settings.WEBSITE_PAGES_GOOGLE_DOCS)
+    with pytest.raises(SystemExit):
+        call_command('prebuild_pages', 'nosuchpage')
+    gdocs.down = True
+    with pytest.raises(SystemExit):
+        call_command('prebuild_pages', 'homepage')
+    assert 'ERROR: failed to fetch page homepage' in capsys.readouterr().out
@@ -0,0 +1,171 @@
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from standards import metrics
+from standards.slowqueries import record_slow_query
+
+
+logger = logging.getLogger(__name__)
+
+# Phases measured using `timing_phase` in the API views, in the order reported
+TIMING_PHASES = ['serialize', 'process_uris', 'htmlize', 'render']
+
+# Timings of the current request (None outside of ServerTimingMiddleware)
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+
+
+# TIMINGS
+################################################################################
+
+class RequestTimings:
+    """
+    The durations (in seconds) of the phases of a request at `path`, and the
+    number and total duration of its database queries. Also used as the database
+    execute wrapper that times the queries and records the slow ones.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.slow_query_seconds = settings.ROCDATA_SLOW_QUERY_SECONDS
+        self.start = time.perf_counter()
+        self.total = None
+        self.render_start = None
+        self.phases = {}
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.db_time += duration
+            self.queries += 1
+        # failed queries are not recorded (their EXPLAIN could hide the error)
+        if self.slow_query_seconds is not None and duration >= self.slow_query_seconds:
+            record_slow_query(sql, params, many, context, duration, path=self.path)
+        return result
+
+    def get_header(self):
+        """
+        Return the ``Server-Timing`` header value, e.g.
+        ``db;dur=3.1;desc="4 queries", serialize;dur=5.0, total;dur=9.8``.
+        """
+        entries = ['db;dur={:.1f};desc="{} queries"'.format(self.db_time * 1000, self.queries)]
+        if self.cache_hits or self.cache_misses:
+            entries.append('cache;desc="{} hits {} misses"'.format(self.cache_hits, self.cache_misses))
+        for phase in TIMING_PHASES:
+            if phase in self.phases:
+                entries.append('{};dur={:.1f}'.format(phase, self.phases[phase] * 1000))
+        entries.append('total;dur={:.1f}'.format(self.total * 1000))
+        return ', '.join(entries)
+
+    def get_log_record(self, request, response):
+        record = dict(
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            total_ms=round(self.total * 1000, 1),
+            db_ms=round(self.db_time * 1000, 1),
+            queries=self.queries,
+        )
+        if self.cache_hits or self.cache_misses:
+            record['cache_hits'] = self.cache_hits
+            record['cache_misses'] = self.cache_misses
+        for phase in TIMING_PHASES:
+            if phase in self.phases:
+                record[phase + '_ms'] = round(self.phases[phase] * 1000, 1)
+        return record
+
+
+@contextlib.contextmanager
+def timing_phase(phase):
+    """
+    Add the time spent in the ``with`` block to `phase` of the current request's
+    timings. Does nothing when the request is not timed.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def record_cache_access(hit):
+    """
+    Count a cache lookup (`hit` or miss) made by the current request, reported
+    in the ``Server-Timing`` header and the request metrics.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        return
+    if hit:
+        timings.cache_hits += 1
+    else:
+        timings.cache_misses += 1
+
+
+
+
+# MIDDLEWARE
+################################################################################
+
+class ServerTimingMiddleware:
+    """
+    Measure the total time of each request, the number and time of its database
+    queries, and the phases marked using ``timing_phase`` in the API views, plus
+    the rendering of template responses (DRF responses). The figures are sent
+    in the ``Server-Timing`` header (if ``settings.ROCDATA_SERVER_TIMING``),
+    logged as JSON to ``standards.timing``, and recorded in the request metrics
+    (if ``settings.ROCDATA_METRICS``, see ``standards.metrics``).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings(path=request.path)
+        token = _request_timings.set(timings)
+        try:
+            with contextlib.ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        end = time.perf_counter()
+        if timings.render_start is not None:
+            timings.add('render', end - timings.render_start)
+        timings.total = end - timings.start
+        if settings.ROCDATA_SERVER_TIMING:
+            response['Server-Timing'] = timings.get_header()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(timings.get_log_record(request, response)))
+        if settings.ROCDATA_METRICS:
+            metrics.observe_request(request, response, timings)
+        return response
+
+    def process_template_response(self, request, response):
+        # called right before the response is rendered
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.render_start = time.perf_counter()
+        return response
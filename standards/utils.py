@@ -3,55 +3,42 @@ from urllib.parse import urlparse
 
 import pycountry
 
-from standards.models import Term
-
 
 
 # DEFAULT TERM SETTERS
 ################################################################################
 
+def get_global_term_id(vocabulary_name, path):
+    """
+    Return the id of the term `path` in the Global vocabulary `vocabulary_name`
+    (or None) from the term registry, so creating objects makes no queries.
+    """
+    from standards.registry import term_registry   # the registry imports the models
+    term = term_registry.get_term("Global", vocabulary_name, path)
+    return term.id if term else None
+
+
 def get_default_license():
     """
     Return default value for license foreign key fields (All Rights Reserved).
     Used for StandardsDocument, StandardsCrosswalk, ContentCollection,
     ContentNode, and ContentCorrelation classes.
     """
-    try:
-        return Term.objects.get(
-            vocabulary__jurisdiction__name="Global",
-            vocabulary__name="LicenseKinds",
-            path="All_Rights_Reserved"
-        )
-    except Term.DoesNotExist:
-        return None
+    return get_global_term_id("LicenseKinds", "All_Rights_Reserved")
 
 
 def get_default_standard_node_relation_kind():
     """
     Return the default ``kind`` for ``StandardNodeRelation`` objects.
     """
-    try:
-        return Term.objects.get(
-            vocabulary__jurisdiction__name="Global",
-            vocabulary__name="StandardNodeRelationKinds",
-            path="majorAlignment"
-        )
-    except Term.DoesNotExist:
-        return None
+    return get_global_term_id("StandardNodeRelationKinds", "majorAlignment")
 
 
 def get_default_content_standard_relation_kind():
     """
     Return the default ``kind`` for ``ContentStandardRelation`` objects.
     """
-    try:
-        return Term.objects.get(
-            vocabulary__jurisdiction__name="Global",
-            vocabulary__name="ContentStandardRelationKinds",
-            path="majorCorrelation"
-        )
-    except Term.DoesNotExist:
-        return None
+    return get_global_term_id("ContentStandardRelationKinds", "majorCorrelation")
 
 
 
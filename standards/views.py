@@ -1,3 +1,55 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import patch_vary_headers
 
-# Create your views here.
+from standards.models import Jurisdiction
+from standards.publishing import get_base_url, get_publishing_context
+from standards.skos import iter_chunks, iter_rdf_lines, iter_skos_triples
+from standards.slowqueries import read_slow_queries, summarize_slow_queries
+
+
+SKOS_CONTENT_TYPES = {
+    'nt': 'application/n-triples; charset=utf-8',
+    'ttl': 'text/turtle; charset=utf-8',
+}
+
+
+def skos_dump(request, rdf_format, jurisdiction_name=None):
+    """
+    Stream the vocabularies, terms, and term relations of the jurisdiction
+    `jurisdiction_name` (or of the whole server) as N-Triples or Turtle,
+    gzip-compressed on the fly when the client accepts it.
+    """
+    if jurisdiction_name:
+        get_object_or_404(Jurisdiction, name=jurisdiction_name)
+    base_url = get_base_url(get_publishing_context(request=request))
+    use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    lines = iter_rdf_lines(iter_skos_triples(base_url, jurisdiction_name), rdf_format)
+    response = StreamingHttpResponse(
+        iter_chunks(lines, gzip=use_gzip),
+        content_type=SKOS_CONTENT_TYPES[rdf_format],
+    )
+    if use_gzip:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+@staff_member_required
+def slow_queries_report(request):
+    """
+    Admin page with the slow queries recorded in ``settings.ROCDATA_SLOW_QUERY_LOG``.
+    """
+    entries = read_slow_queries()
+    context = dict(
+        admin.site.each_context(request),
+        title='Slow queries',
+        threshold_ms=settings.ROCDATA_SLOW_QUERY_SECONDS * 1000,
+        log_path=settings.ROCDATA_SLOW_QUERY_LOG,
+        num_entries=len(entries),
+        summaries=summarize_slow_queries(entries),
+    )
+    return render(request, 'admin/slow_queries.html', context)
@@ -0,0 +1,35 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from website.pagecache import get_page_cache
+
+
+class Command(BaseCommand):
+    """
+    Fetch all the ``settings.WEBSITE_PAGES_GOOGLE_DOCS`` pages into the page
+    cache, so the website serves them immediately after a deploy.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument("pages", nargs="*", help="Names of the pages to fetch (default: all)")
+
+
+    def handle(self, *args, **options):
+        names = options['pages'] or list(settings.WEBSITE_PAGES_GOOGLE_DOCS.keys())
+        for name in names:
+            if name not in settings.WEBSITE_PAGES_GOOGLE_DOCS:
+                print('ERROR: unknown page', name)
+                sys.exit(-3)
+
+        cache = get_page_cache()
+        failed = []
+        for name in names:
+            try:
+                cache.refresh(name, raise_errors=True)
+                print('Fetched page', name)
+            except Exception as e:
+                print('ERROR: failed to fetch page', name, e)
+                failed.append(name)
+        if failed:
+            sys.exit(-10)
@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from standards.timing import record_cache_access
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+# PAGE CACHE
+################################################################################
+
+class PageCache:
+    """
+    Cache of the template contexts of the ``settings.WEBSITE_PAGES_GOOGLE_DOCS``
+    pages, kept in memory and in JSON files in `directory` (shared by the
+    worker processes and across restarts). Cached pages are served immediately;
+    pages older than `ttl` seconds are refreshed in a background thread
+    (stale-while-revalidate), and the stale copy is kept if the refresh fails.
+    `fetch` is the function that returns the context of a page dict.
+    """
+
+    def __init__(self, directory, ttl, fetch):
+        self.directory = directory
+        self.ttl = ttl
+        self.fetch = fetch
+        self.lock = threading.Lock()
+        self.entries = {}           # page name -> {'context', 'fetched_at', 'checked_at'}
+        self.refreshing = set()     # page names refreshed by background threads
+
+    def get_path(self, name):
+        return os.path.join(self.directory, '{}.json'.format(name))
+
+    def get(self, name):
+        """
+        Return the context of the page `name`, fetching it only if there is no
+        cached copy, and start a background refresh if the copy is stale.
+        """
+        entry = self.entries.get(name) or self.load(name)
+        if entry is None:
+            record_cache_access(hit=False)
+            return self.refresh(name, raise_errors=True)['context']
+        record_cache_access(hit=True)
+        if time.time() - entry['checked_at'] >= self.ttl:
+            self.refresh_in_background(name)
+        return entry['context']
+
+    def load(self, name):
+        """
+        Load the copy of the page `name` saved by any process (or return None).
+        """
+        try:
+            with open(self.get_path(name)) as inf:
+                saved = json.load(inf)
+        except (OSError, ValueError):
+            return None
+        entry = dict(saved, checked_at=saved['fetched_at'])
+        with self.lock:
+            self.entries[name] = entry
+        return entry
+
+    def refresh(self, name, raise_errors=False):
+        """
+        Fetch the page `name` and save it. On errors, keep the stale copy (and
+        wait `ttl` before the next attempt) unless `raise_errors` is set.
+        Returns the cache entry of the page.
+        """
+        page_dict = settings.WEBSITE_PAGES_GOOGLE_DOCS[name]
+        try:
+            context = self.fetch(page_dict)
+        except Exception:
+            entry = self.entries.get(name)
+            if raise_errors or entry is None:
+                raise
+            logger.warning('Failed to refresh page %s, serving the stale copy', name, exc_info=True)
+            with self.lock:
+                entry['checked_at'] = time.time()
+            return entry
+        now = time.time()
+        entry = dict(context=context, fetched_at=now, checked_at=now)
+        self.save(name, entry)
+        with self.lock:
+            self.entries[name] = entry
+        return entry
+
+    def save(self, name, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_path(name)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as outf:
+            json.dump(dict(context=entry['context'], fetched_at=entry['fetched_at']), outf)
+        os.replace(tmp_path, path)
+
+    def refresh_in_background(self, name):
+        with self.lock:
+            if name in self.refreshing:
+                return
+            self.refreshing.add(name)
+        thread = threading.Thread(target=self._background_refresh, args=(name,), daemon=True)
+        thread.start()
+        return thread
+
+    def _background_refresh(self, name):
+        try:
+            # use the copy saved by another process if it is fresh enough
+            saved = self.load(name)
+            if saved is None or time.time() - saved['fetched_at'] >= self.ttl:
+                self.refresh(name)
+        except Exception:
+            logger.exception('Failed to refresh page %s', name)
+        finally:
+            with self.lock:
+                self.refreshing.discard(name)
+
+
+_page_cache = None
+
+def get_page_cache():
+    global _page_cache
+    if _page_cache is None or _page_cache.directory != settings.WEBSITE_PAGES_CACHE_DIR \
+            or _page_cache.ttl != settings.WEBSITE_PAGES_CACHE_SECONDS:
+        from website.views import get_context_from_gdoc_html   # the views use the cache
+        _page_cache = PageCache(settings.WEBSITE_PAGES_CACHE_DIR, settings.WEBSITE_PAGES_CACHE_SECONDS,
+                                get_context_from_gdoc_html)
+    return _page_cache
@@ -9,6 +9,8 @@ from django.shortcuts import redirect
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
+from website.pagecache import get_page_cache
+
 
 # INFO WEBPAGES
 ################################################################################
@@ -18,11 +20,13 @@ def get_context_from_gdoc_html(page_dict):
     Given ``page_dict`` containing an ``embed_url`` key, this function will
     GET the HTML source of the page and extract and parts we need from it.
     Returns a ``context`` dict ready to pass onto ``google_doc_embed_page.html``.
+    The views get the contexts from the page cache (see ``website.pagecache``).
     """
     context = page_dict.copy()
 
     # 0. get the HTML of the gdoc
-    response = requests.get(page_dict["embed_url"])
+    response = requests.get(page_dict["embed_url"], timeout=settings.WEBSITE_PAGES_FETCH_TIMEOUT)
+    response.raise_for_status()
     soup = BeautifulSoup(response.content, 'html5lib')
 
     # 1. get doc styles from head
@@ -36,7 +40,6 @@ def get_context_from_gdoc_html(page_dict):
         if link.has_attr('href') and 'https://www.google.com/url?q=' in link['href']:
             old_href = link['href']
             href = old_href[len('https://www.google.com/url?q='):]
-            print(href)
             new_href = href.split("&")[0] if "&" in href else href
             link['href'] = unquote(new_href)
 
@@ -52,8 +55,7 @@ def homepage(request):
     """
     ROC homepage served under ``/`` (the website root).
     """
-    page_dict = settings.WEBSITE_PAGES_GOOGLE_DOCS['homepage']
-    context = get_context_from_gdoc_html(page_dict)
+    context = get_page_cache().get('homepage')
     template_name = 'website/google_doc_embed_page.html'
     return render(request, template_name, context)
 
@@ -79,8 +81,7 @@ def page(request, val):
 
     elif val in settings.WEBSITE_PAGES_GOOGLE_DOCS:
         # google doc embed pages
-        page_dict = settings.WEBSITE_PAGES_GOOGLE_DOCS[val]
-        context = get_context_from_gdoc_html(page_dict)
+        context = get_page_cache().get(val)
         template_name = 'website/google_doc_embed_page.html'
         return render(request, template_name, context)
 